@@ -0,0 +1,234 @@
+"""
+Benchmark harness for the QUBO solvers and the coarsening pipeline.
+
+Runs `FullQuboSolver`, `AveragePartitionSolver`, `coarsen_cvrptw_problem`
+and `solve_with_multilevel_quantum` (NumPy simulator backend) over Solomon
+instances and customer counts, and records per run: QUBO variable and term
+counts, build, sampling and total time, peak Python heap (tracemalloc, so
+native buffers outside the allocator are not counted), cost and
+feasibility. Coarsening runs also record the meta-node count, and
+multilevel runs the largest subproblem (qubits, Hamiltonian terms), the
+number of subproblems and the coarsening and refinement times. Results are
+written as JSON and CSV under Results/benchmarks and can be compared
+against a saved baseline to catch regressions.
+"""
+import csv
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+from repo_paths import REPO_ROOT, add_module_paths
+
+add_module_paths()
+
+import numpy as np
+
+from input import read_solomon
+from vrp_problem import VRPProblem
+import vrp_solvers
+from MetaNodeCoarsening import load_solomon_data, coarsen_cvrptw_problem
+import ld_daqc_with_graph_coarsening as ld_daqc
+from ld_daqc_simulator import LDDAQCSimulator
+
+RESULT_FIELDS = [
+    'benchmark', 'instance', 'solver', 'num_customers', 'num_variables', 'num_terms',
+    'build_time', 'sample_time', 'total_time', 'python_heap_mb', 'cost', 'feasible',
+    'num_metanodes', 'num_subproblems', 'coarsen_time', 'refine_time',
+]
+RESULTS_DIR = os.path.join(REPO_ROOT, "Results", "benchmarks")
+
+
+def _measure(run):
+    """ Runs `run()` under tracemalloc; returns (result, seconds, peak Python heap MB). """
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        result = run()
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, elapsed, peak / 2 ** 20
+
+
+def bench_vrp_solver(instance, solver_name, num_customers, num_vehicles, A1=1.0, A2=200.0, num_reads=50):
+    """ One QUBO solve on a fresh problem, so the template build is timed. """
+    problem_data = read_solomon(instance, num_customers)
+    problem = VRPProblem(
+        sources=problem_data['sources'],
+        costs=problem_data['costs'],
+        time_costs=problem_data['time_costs'],
+        capacities=np.array([problem_data['capacities'][0]] * num_vehicles),
+        dests=problem_data['dests'],
+        weights=problem_data['weights']
+    )
+    solver = getattr(vrp_solvers, solver_name)(problem)
+    solution, elapsed, peak = _measure(lambda: solver.solve(A1, A2, num_reads=num_reads))
+    template = problem.get_qubo_template(solver.get_vehicle_k_limits())
+    return {
+        'num_variables': template.num_variables,
+        'num_terms': template.num_terms,
+        'build_time': solver.timings.get('build'),
+        'sample_time': solver.timings.get('sample'),
+        'total_time': elapsed,
+        'python_heap_mb': peak,
+        'cost': float(solution.total_cost()),
+        'feasible': bool(solution.check()),
+    }
+
+
+def bench_metanode_coarsening(instance, num_customers, target_size=20, method='vectorized'):
+    df, vehicle_capacity = load_solomon_data(instance)
+    df = df.iloc[:num_customers + 1]
+    nodes, elapsed, peak = _measure(lambda: coarsen_cvrptw_problem(df, vehicle_capacity, target_size, method=method))
+    covered = sorted(c for node in nodes[1:] for c in node.nodes)
+    return {
+        'num_metanodes': len(nodes) - 1,
+        'build_time': elapsed,
+        'total_time': elapsed,
+        'python_heap_mb': peak,
+        'feasible': covered == list(range(1, num_customers + 1)),
+    }
+
+
+def truncate_params(params, num_customers):
+    """ CVRPTW params restricted to the depot and the first customers. """
+    n = num_customers + 1
+    truncated = dict(params, total_customers=num_customers)
+    truncated['dataframe'] = params['dataframe'].iloc[:n]
+    truncated['distance_matrix'] = np.asarray(params['distance_matrix'])[:n, :n]
+    for key in ('demands', 'ready_times', 'due_dates', 'service_times'):
+        truncated[key] = np.asarray(params[key])[:n]
+    return truncated
+
+
+def bench_multilevel_quantum(instance, num_customers, vehicle_capacity=200, subproblem_size=10,
+                             cluster_radius=15.0, p_layers=3, T_time=10, seed=0):
+    """
+    One `solve_with_multilevel_quantum` run; stage times come from its
+    `step_stats`, with build and sample times summed over the quantum
+    decision steps.
+    """
+    params = truncate_params(ld_daqc.load_and_prepare_data(instance, vehicle_capacity), num_customers)
+    backend = LDDAQCSimulator(seed=seed)
+    stats = []
+    (routes, cost), elapsed, peak = _measure(lambda: ld_daqc.solve_with_multilevel_quantum(
+        params, p_layers, T_time, 0.4, 1.0, backend, subproblem_size, cluster_radius, step_stats=stats))
+    steps = [entry for entry in stats if entry['stage'] == 'step']
+    stage_time = {entry['stage']: entry['time'] for entry in stats if entry['stage'] != 'step'}
+    served = sorted(c for route in routes for c in route if c != 0)
+    feasible = served == list(range(1, num_customers + 1)) and all(
+        ld_daqc.get_route_cost_and_feasibility(route, params)[1] is not None
+        and sum(params['demands'][c] for c in route) <= vehicle_capacity for route in routes)
+    return {
+        'num_variables': max((step['qubits'] for step in steps), default=0),
+        'num_terms': max((step['terms'] for step in steps), default=0),
+        'num_subproblems': len(steps),
+        'build_time': sum(step['build_time'] for step in steps),
+        'sample_time': sum(step['sample_time'] for step in steps),
+        'coarsen_time': stage_time.get('coarsen'),
+        'refine_time': stage_time.get('refine'),
+        'total_time': elapsed,
+        'python_heap_mb': peak,
+        'cost': float(cost),
+        'feasible': feasible,
+    }
+
+
+def run_benchmarks(instances, sizes, num_vehicles=3, num_reads=50, qubo_solvers=('FullQuboSolver', 'AveragePartitionSolver'),
+                   coarsen_target=20, multilevel_subproblem=10):
+    """
+    Runs every benchmark for every (instance, size) pair.
+    `sizes` maps benchmark name ('qubo', 'coarsen', 'multilevel') to customer counts.
+    """
+    rows = []
+
+    def record(benchmark, instance, solver, num_customers, run):
+        print(f"{benchmark:10s} {os.path.basename(instance):10s} {solver:24s} n={num_customers}")
+        row = {field: None for field in RESULT_FIELDS}
+        row.update({'benchmark': benchmark, 'instance': os.path.basename(instance), 'solver': solver, 'num_customers': num_customers})
+        try:
+            row.update(run())
+        except Exception as e:
+            print(f"  failed: {e}")
+            row['feasible'] = False
+        rows.append(row)
+
+    for instance in instances:
+        for n in sizes.get('qubo', ()):
+            for solver_name in qubo_solvers:
+                record('qubo', instance, solver_name, n, lambda: bench_vrp_solver(instance, solver_name, n, num_vehicles, num_reads=num_reads))
+        for n in sizes.get('coarsen', ()):
+            record('coarsen', instance, 'coarsen_cvrptw_problem', n, lambda: bench_metanode_coarsening(instance, n, coarsen_target))
+        for n in sizes.get('multilevel', ()):
+            record('multilevel', instance, 'solve_with_multilevel_quantum', n,
+                   lambda: bench_multilevel_quantum(instance, n, subproblem_size=multilevel_subproblem))
+    return rows
+
+
+def write_results(rows, name, results_dir=RESULTS_DIR):
+    """ Writes `<name>.json` and `<name>.csv`; returns the JSON path. """
+    os.makedirs(results_dir, exist_ok=True)
+    json_path = os.path.join(results_dir, f"{name}.json")
+    with open(json_path, 'w') as f:
+        json.dump(rows, f, indent=2)
+    with open(os.path.join(results_dir, f"{name}.csv"), 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=RESULT_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+    return json_path
+
+
+def compare_to_baseline(rows, baseline_path, time_tolerance=1.5, cost_tolerance=1.05, min_seconds=0.05):
+    """
+    Returns a list of regression messages against a saved baseline JSON:
+    slower by more than `time_tolerance` (and `min_seconds`), costlier by
+    more than `cost_tolerance`, a changed QUBO size, or lost feasibility.
+    """
+    with open(baseline_path) as f:
+        baseline = {(r['benchmark'], r['instance'], r['solver'], r['num_customers']): r for r in json.load(f)}
+
+    regressions = []
+    for row in rows:
+        key = (row['benchmark'], row['instance'], row['solver'], row['num_customers'])
+        base = baseline.get(key)
+        if base is None:
+            continue
+        label = ' '.join(str(k) for k in key)
+        for field in ('build_time', 'sample_time', 'coarsen_time', 'refine_time', 'total_time'):
+            new, old = row.get(field), base.get(field)
+            if new is not None and old is not None and new > old * time_tolerance and new - old > min_seconds:
+                regressions.append(f"{label}: {field} {old:.3f}s -> {new:.3f}s")
+        for field in ('num_variables', 'num_terms', 'num_metanodes', 'num_subproblems'):
+            if base.get(field) is not None and row.get(field) != base.get(field):
+                regressions.append(f"{label}: {field} {base.get(field)} -> {row.get(field)}")
+        if row.get('cost') is not None and base.get('cost') is not None and row['cost'] > base['cost'] * cost_tolerance:
+            regressions.append(f"{label}: cost {base['cost']:.2f} -> {row['cost']:.2f}")
+        if base.get('feasible') and not row.get('feasible'):
+            regressions.append(f"{label}: no longer feasible")
+    return regressions
+
+
+if __name__ == "__main__":
+    DATA_DIR = os.path.join(REPO_ROOT, "Data", "Global_Datasets", "Solomon")
+    INSTANCES = [os.path.join(DATA_DIR, name) for name in ("c101.txt", "r101.txt", "rc101.txt")]
+    SIZES = {'qubo': (8, 12), 'coarsen': (50, 100), 'multilevel': (50,)}
+    BASELINE = os.path.join(RESULTS_DIR, "baseline.json")
+    SAVE_BASELINE = False
+
+    results = run_benchmarks(INSTANCES, SIZES)
+    output = write_results(results, time.strftime("benchmark_%Y%m%d_%H%M%S"))
+    print(f"\nResults written to {output}")
+
+    if SAVE_BASELINE or not os.path.exists(BASELINE):
+        write_results(results, "baseline")
+        print(f"Baseline saved to {BASELINE}")
+    else:
+        found = compare_to_baseline(results, BASELINE)
+        print(f"{len(found)} regression(s) against {BASELINE}")
+        for message in found:
+            print(f"  {message}")
+        sys.exit(1 if found else 0)
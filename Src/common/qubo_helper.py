@@ -1,5 +1,7 @@
 from itertools import product
 
+import numpy as np
+
 # Simple class helping creating qubo dict.
 class Qubo:
     def __init__(self):
@@ -45,4 +47,258 @@ class Qubo:
         
 
     def get_dict(self):
-        return self.dict.copy()
\ No newline at end of file
+        return self.dict.copy()
+
+def coalesce_terms(rows, cols, values, num_variables):
+    """
+    Sums duplicate (row, col) entries of a COO term list in one pass.
+
+    Every term is folded onto the upper triangle (row <= col), so (i, j) and
+    (j, i) end up in the same entry. `values` may be 1-D or 2-D; a 2-D array
+    holds one column per QUBO part and all columns are summed together.
+    Returns the unique rows, cols and summed values in row-major order.
+    """
+    rows = np.asarray(rows, dtype=np.int64)
+    cols = np.asarray(cols, dtype=np.int64)
+    values = np.asarray(values, dtype=np.float64)
+    lo = np.minimum(rows, cols)
+    hi = np.maximum(rows, cols)
+    keys, inverse = np.unique(lo * num_variables + hi, return_inverse=True)
+    inverse = inverse.ravel()
+    if values.ndim == 1:
+        summed = np.bincount(inverse, weights=values, minlength=len(keys))
+    else:
+        summed = np.column_stack([
+            np.bincount(inverse, weights=values[:, p], minlength=len(keys))
+            for p in range(values.shape[1])
+        ]) if len(keys) else np.zeros((0, values.shape[1]))
+    return keys // num_variables, keys % num_variables, summed
+
+
+def slack_weights(bound):
+    """
+    Weights of the log-encoded slack of an integer in [0, bound]: powers of
+    two, the last one clipped so that they sum to `bound`.
+    """
+    bound = int(bound)
+    num_bits = bound.bit_length()
+    weights = 2 ** np.arange(num_bits, dtype=np.float64)
+    if num_bits:
+        weights[-1] = bound - (2 ** (num_bits - 1) - 1)
+    return weights
+
+
+def encode_slack(value, bound):
+    """ Bits b of `value` in the `slack_weights(bound)` encoding, filled from the largest weight. """
+    value = int(value)
+    weights = slack_weights(bound)
+    bits = np.zeros(len(weights), dtype=np.int8)
+    for b in reversed(range(len(weights))):
+        if weights[b] <= value:
+            bits[b] = 1
+            value -= int(weights[b])
+    return bits
+
+
+# Array-backed qubo with integer variable indices.
+class SparseQubo:
+    """
+    QUBO stored as COO arrays over integer variable indices.
+
+    Variables keep their original labels (e.g. the (m, j, k) tuples used by
+    the VRP formulations) in `labels`, but all coefficients are appended in
+    bulk as (rows, cols, values) arrays and deduplicated once, when the model
+    is handed to a sampler. This avoids the per-term dict traffic of `Qubo`.
+    """
+
+    def __init__(self, labels=None):
+        self.labels = []
+        self.index = dict()
+        self._rows = []
+        self._cols = []
+        self._values = []
+        self._coo = None
+        if labels is not None:
+            self.add_variables(labels)
+
+    @classmethod
+    def from_arrays(cls, labels, rows, cols, values):
+        qubo = cls(labels)
+        qubo.add_terms(rows, cols, values)
+        return qubo
+
+    @classmethod
+    def from_coo(cls, labels, rows, cols, values, index=None):
+        """ Wraps arrays that are already deduplicated (see `coalesce_terms`). """
+        qubo = cls()
+        qubo.labels = list(labels)
+        qubo.index = dict(index) if index is not None else {label: i for i, label in enumerate(labels)}
+        qubo._coo = (rows, cols, values)
+        qubo._rows, qubo._cols, qubo._values = [rows], [cols], [values]
+        return qubo
+
+    @property
+    def num_variables(self):
+        return len(self.labels)
+
+    @property
+    def num_terms(self):
+        return len(self.to_coo()[0])
+
+    def add_variables(self, labels):
+        """ Registers labels (if new) and returns their integer indices. """
+        indices = np.empty(len(labels), dtype=np.int64)
+        for pos, label in enumerate(labels):
+            idx = self.index.get(label)
+            if idx is None:
+                idx = len(self.labels)
+                self.index[label] = idx
+                self.labels.append(label)
+            indices[pos] = idx
+        return indices
+
+    def add_terms(self, rows, cols, values):
+        """ Appends a block of coefficients given by index arrays. """
+        rows = np.asarray(rows, dtype=np.int64).ravel()
+        cols = np.asarray(cols, dtype=np.int64).ravel()
+        values = np.broadcast_to(np.asarray(values, dtype=np.float64), rows.shape)
+        self._rows.append(rows)
+        self._cols.append(cols)
+        self._values.append(np.array(values))
+        self._coo = None
+
+    def add_linear(self, indices, values):
+        self.add_terms(indices, indices, values)
+
+    def add(self, field, value):
+        """ Label-based single-term add, kept for parity with `Qubo`. """
+        row, col = self.add_variables(field)
+        self.add_terms([row], [col], [value])
+
+    def add_only_one_constraint(self, indices, const):
+        """ Enforces sum(variables) == 1 over the given variable indices. """
+        indices = np.asarray(indices, dtype=np.int64)
+        self.add_linear(indices, -const)
+        # Same weight as `Qubo`: +C on both (i, j) and (j, i).
+        rows, cols = np.triu_indices(len(indices), k=1)
+        self.add_terms(indices[rows], indices[cols], 2 * const)
+
+    def add_at_most_one_constraint(self, indices, const):
+        """ Enforces sum(variables) <= 1 over the given variable indices. """
+        indices = np.asarray(indices, dtype=np.int64)
+        rows, cols = np.triu_indices(len(indices), k=1)
+        self.add_terms(indices[rows], indices[cols], const)
+
+    def add_linear_inequality(self, indices, coefficients, bound, const, slack_label):
+        """
+        Enforces sum(coefficients * variables) <= bound as
+        const * (sum(coefficients * variables) + slack - bound)^2, where the
+        integer slack in [0, bound] is log-encoded on new variables
+        (slack_label, b): powers of two, the last one clipped to `bound`.
+        Returns the slack variable indices.
+        """
+        weights = slack_weights(bound)
+        slack = self.add_variables([(slack_label, b) for b in range(len(weights))])
+
+        indices = np.concatenate((np.asarray(indices, dtype=np.int64), slack))
+        coefficients = np.concatenate((np.asarray(coefficients, dtype=np.float64), weights))
+        self.add_linear(indices, const * (coefficients ** 2 - 2 * bound * coefficients))
+        rows, cols = np.triu_indices(len(indices), k=1)
+        self.add_terms(indices[rows], indices[cols], 2 * const * coefficients[rows] * coefficients[cols])
+        return slack
+
+    def merge_with(self, qubo, const1, const2):
+        """ Adds `qubo` scaled by const2 (const1 is unused, as in `Qubo`). """
+        rows, cols, values = qubo.to_coo()
+        mapping = self.add_variables(qubo.labels)
+        self.add_terms(mapping[rows], mapping[cols], values * const2)
+
+    def to_coo(self):
+        """ Returns deduplicated upper-triangular (rows, cols, values). """
+        if self._coo is None:
+            if self._rows:
+                rows = np.concatenate(self._rows)
+                cols = np.concatenate(self._cols)
+                values = np.concatenate(self._values)
+            else:
+                rows = cols = np.zeros(0, dtype=np.int64)
+                values = np.zeros(0)
+            self._coo = coalesce_terms(rows, cols, values, max(self.num_variables, 1))
+            self._rows, self._cols, self._values = [self._coo[0]], [self._coo[1]], [self._coo[2]]
+        return self._coo
+
+    def to_csr(self):
+        """ Returns the upper-triangular matrix as (indptr, indices, data). """
+        rows, cols, values = self.to_coo()
+        indptr = np.zeros(self.num_variables + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=self.num_variables), out=indptr[1:])
+        return indptr, cols, values
+
+    def to_numpy_matrix(self):
+        """ Dense upper-triangular QUBO matrix, linear terms on the diagonal. """
+        rows, cols, values = self.to_coo()
+        matrix = np.zeros((self.num_variables, self.num_variables))
+        matrix[rows, cols] = values
+        return matrix
+
+    def to_bqm(self, relabel=True):
+        """
+        Builds a `dimod.BinaryQuadraticModel` straight from the arrays.
+
+        With relabel=False the model keeps integer variables 0..n-1, which is
+        the cheapest option; samples can be mapped back through `labels`.
+        """
+        import dimod
+
+        rows, cols, values = self.to_coo()
+        diagonal = rows == cols
+        linear = np.zeros(self.num_variables)
+        linear[rows[diagonal]] = values[diagonal]
+        quadratic = (rows[~diagonal], cols[~diagonal], values[~diagonal])
+        return dimod.BinaryQuadraticModel.from_numpy_vectors(
+            linear, quadratic, 0.0, dimod.BINARY,
+            variable_order=self.labels if relabel else None
+        )
+
+    def get_dict(self):
+        rows, cols, values = self.to_coo()
+        labels = self.labels
+        return {(labels[r], labels[c]): v for r, c, v in zip(rows.tolist(), cols.tolist(), values.tolist())}
+
+    @property
+    def dict(self):
+        return self.get_dict()
+
+
+# Reusable qubo whose named parts can be re-weighted without a rebuild.
+class QuboTemplate:
+    """
+    Deduplicated QUBO terms with one coefficient column per named part.
+
+    The sparsity pattern is shared by all parts, so e.g. the cost and
+    constraint parts of the paper formulation are stored once and every
+    (A1, A2) point is a single matrix-vector product, see `weighted`.
+    """
+
+    def __init__(self, labels, rows, cols, **parts):
+        self.labels = list(labels)
+        self.index = {label: i for i, label in enumerate(self.labels)}
+        self.part_names = list(parts)
+        values = np.column_stack([np.asarray(parts[name], dtype=np.float64) for name in self.part_names])
+        self.rows, self.cols, self.values = coalesce_terms(rows, cols, values, max(len(self.labels), 1))
+
+    @property
+    def num_variables(self):
+        return len(self.labels)
+
+    @property
+    def num_terms(self):
+        return len(self.rows)
+
+    def weighted(self, **weights):
+        """ Returns sum(weights[name] * part) as a SparseQubo. """
+        unknown = set(weights) - set(self.part_names)
+        if unknown:
+            raise ValueError(f"Unknown qubo parts: {sorted(unknown)}")
+        w = np.array([weights.get(name, 0.0) for name in self.part_names], dtype=np.float64)
+        return SparseQubo.from_coo(self.labels, self.rows, self.cols, self.values @ w, index=self.index)
@@ -0,0 +1,35 @@
+"""
+Module directories of the flat-import layout, for code outside them.
+
+The variants import their modules by file name (e.g. `from vrp_problem
+import VRPProblem`), so scripts in other directories and the test suite put
+these directories on sys.path first. Directories holding module names that
+exist in several variants (problem.py, qubo_dwave_solver.py, ...) are left
+out; `load_module` imports such a file under a unique name.
+"""
+import importlib.util
+import os
+import sys
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+MODULE_DIRS = ("Src/common", "Src/preprocessing/MetaNode_Graph_Coarsening", "Variants/VRP", "Variants/VRP/solvers",
+               "Variants/VRP/solvers/shared", "Variants/CVRP/solvers/shared", "Variants/CVRPTW/solvers",
+               "Variants/CVRPTW/solvers/shared")
+SOLOMON_DIR = os.path.join(REPO_ROOT, "Data", "Global_Datasets", "Solomon")
+
+
+def add_module_paths():
+    for path in MODULE_DIRS:
+        path = os.path.join(REPO_ROOT, path)
+        if path not in sys.path:
+            sys.path.insert(0, path)
+
+
+def load_module(relative_path, name):
+    """ Imports the repo file `relative_path` as module `name`. """
+    if name not in sys.modules:
+        spec = importlib.util.spec_from_file_location(name, os.path.join(REPO_ROOT, relative_path))
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        spec.loader.exec_module(module)
+    return sys.modules[name]
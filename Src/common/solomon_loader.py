@@ -0,0 +1,135 @@
+"""
+Shared Solomon instance loader.
+
+Parses a Solomon VRPTW text file once, computes the full Euclidean distance
+matrix in one vectorized pass and caches every array as a `.npy` file in a
+`.solomon_cache` directory next to the source file. Later loads memory-map
+the cached arrays, so batch jobs start immediately and worker processes
+share the same pages instead of each holding a private copy. A cache entry
+is rebuilt when the source file's mtime or size changes.
+"""
+import json
+import os
+
+import numpy as np
+
+CACHE_DIR_NAME = ".solomon_cache"
+CACHE_VERSION = 1
+ARRAY_FIELDS = ("ids", "coords", "demands", "ready_times", "due_dates", "service_times", "distance_matrix")
+
+
+def parse_solomon(path):
+    """ Reads the raw columns of a Solomon file into numpy arrays. """
+    with open(path, 'r') as f:
+        lines = f.readlines()
+
+    # Vehicle info is on line 5 (index 4), customers start on line 10 (index 9)
+    vehicle_info = lines[4].split()
+    rows = [line.split() for line in lines[9:] if line.strip()]
+    table = np.array(rows, dtype=np.float64)
+
+    return {
+        'name': os.path.splitext(os.path.basename(path))[0],
+        'num_vehicles': int(vehicle_info[0]),
+        'capacity': int(vehicle_info[1]),
+        'ids': table[:, 0].astype(np.int64),
+        'coords': table[:, 1:3],
+        'demands': table[:, 3].astype(np.int64),
+        'ready_times': table[:, 4],
+        'due_dates': table[:, 5],
+        'service_times': table[:, 6],
+    }
+
+
+def euclidean_distance_matrix(coords, dtype=np.float64):
+    """ Pairwise Euclidean distances, computed in float64 and cast to `dtype`. """
+    coords = np.asarray(coords, dtype=np.float64)
+    diff = coords[:, np.newaxis, :] - coords[np.newaxis, :, :]
+    return np.sqrt((diff ** 2).sum(axis=2)).astype(dtype, copy=False)
+
+
+def _cache_path(path, dtype, cache_dir):
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(os.path.abspath(path)), CACHE_DIR_NAME)
+    name = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(cache_dir, f"{name}.{np.dtype(dtype).name}")
+
+
+def _source_stamp(path):
+    stat = os.stat(path)
+    return {'version': CACHE_VERSION, 'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size}
+
+
+def _save_atomic(target, save):
+    tmp = f"{target}.{os.getpid()}.tmp"
+    with open(tmp, 'wb') as f:
+        save(f)
+    os.replace(tmp, target)
+
+
+def _write_cache(entry_dir, instance, stamp):
+    os.makedirs(entry_dir, exist_ok=True)
+    for field in ARRAY_FIELDS:
+        _save_atomic(os.path.join(entry_dir, f"{field}.npy"), lambda f: np.save(f, instance[field]))
+    meta = dict(stamp, name=instance['name'], num_vehicles=instance['num_vehicles'], capacity=instance['capacity'])
+    # meta.json is written last, so its presence marks a complete entry.
+    _save_atomic(os.path.join(entry_dir, "meta.json"), lambda f: f.write(json.dumps(meta).encode()))
+
+
+def _read_cache(entry_dir, stamp, mmap_mode):
+    try:
+        with open(os.path.join(entry_dir, "meta.json")) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if any(meta.get(key) != value for key, value in stamp.items()):
+        return None
+    instance = {key: meta[key] for key in ('name', 'num_vehicles', 'capacity')}
+    try:
+        for field in ARRAY_FIELDS:
+            instance[field] = np.load(os.path.join(entry_dir, f"{field}.npy"), mmap_mode=mmap_mode)
+    except (OSError, ValueError):
+        return None
+    return instance
+
+
+def load_solomon(path, dtype=np.float64, use_cache=True, cache_dir=None, mmap_mode='r'):
+    """
+    Loads a Solomon instance with its distance matrix.
+
+    Parameters
+    ----------
+    path : str
+        Path to the Solomon `.txt` file.
+    dtype : numpy dtype, optional
+        Floating type of the distance matrix (float64 or float32).
+    use_cache : bool, optional
+        Read and write the on-disk cache next to the source file.
+    cache_dir : str, optional
+        Overrides the cache location.
+    mmap_mode : str or None, optional
+        Passed to `np.load`; the default 'r' maps cached arrays read-only.
+
+    Returns
+    -------
+    dict
+        'name', 'num_vehicles', 'capacity' and the arrays 'ids', 'coords',
+        'demands', 'ready_times', 'due_dates', 'service_times' and
+        'distance_matrix'. Row 0 is the depot.
+    """
+    if not use_cache:
+        instance = parse_solomon(path)
+        instance['distance_matrix'] = euclidean_distance_matrix(instance['coords'], dtype)
+        return instance
+
+    entry_dir = _cache_path(path, dtype, cache_dir)
+    stamp = _source_stamp(path)
+    instance = _read_cache(entry_dir, stamp, mmap_mode)
+    if instance is None:
+        instance = parse_solomon(path)
+        instance['distance_matrix'] = euclidean_distance_matrix(instance['coords'], dtype)
+        try:
+            _write_cache(entry_dir, instance, stamp)
+        except OSError as e:
+            print(f"Warning: could not write Solomon cache for {path}: {e}")
+    return instance
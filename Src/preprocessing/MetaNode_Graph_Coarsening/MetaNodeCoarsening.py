@@ -1,8 +1,10 @@
 import pandas as pd
 import numpy as np
 import itertools
+import heapq
 import matplotlib.pyplot as plt
 from scipy.spatial import ConvexHull
+from solomon_loader import load_solomon
 # Defining the Meta-Node
 class MetaNode:
     def __init__(self, node_id, original_nodes, demand, ready_time, due_date, service_time, x, y, internal_sequence=None):
@@ -19,24 +21,91 @@ class MetaNode:
     def __repr__(self):
         return f"MetaNode(id={self.id}, nodes={self.nodes}, demand={self.demand}, window=[{self.ready_time}, {self.due_date}])"
 
-def load_solomon_data(filepath):
-    with open(filepath, 'r') as f:
-        lines = f.readlines()
-    vehicle_info = lines[4].strip().split()
-    vehicle_capacity = int(vehicle_info[1])
-    data = []
-    for line in lines[9:]:
-        parts = line.strip().split()
-        if not parts:
-            continue
-        customer_id, x, y, demand, ready_time, due_date, service_time = map(float, parts)
-        data.append([int(customer_id), x, y, int(demand), ready_time, due_date, service_time])
-    df = pd.DataFrame(data, columns=["id", "x", "y", "demand", "ready_time", "due_date", "service_time"])
+def load_solomon_data(filepath, dtype=np.float64):
+    # `dtype` picks the shared cache entry, so a float32 solver run and the
+    # coarsener read the same cached instance.
+    instance = load_solomon(filepath, dtype=dtype)
+    vehicle_capacity = instance['capacity']
+    df = pd.DataFrame({
+        "id": instance['ids'],
+        "x": instance['coords'][:, 0],
+        "y": instance['coords'][:, 1],
+        "demand": instance['demands'],
+        "ready_time": instance['ready_times'],
+        "due_date": instance['due_dates'],
+        "service_time": instance['service_times'],
+    })
     df.set_index("id", inplace=True)
     return df, vehicle_capacity
 
 
-def coarsen_cvrptw_problem(df, vehicle_capacity, target_node_count):
+def evaluate_merge(node1, node2, t_12, vehicle_capacity):
+    """
+    Capacity and time-window part of merging node1 and node2, where node1
+    comes first in iteration order. Returns None for an infeasible merge,
+    otherwise (p_t, p_d, internal_seq, service_time, ready_time, due_date)
+    of the better orientation.
+    """
+    if node1.demand + node2.demand > vehicle_capacity:
+        return None
+    p_d = (node1.demand + node2.demand) / vehicle_capacity
+    cost_12 = node1.service_time + t_12 + node2.service_time
+    e_m_12 = node1.ready_time
+    l_m_12 = min(node1.due_date, node2.due_date - node1.service_time - t_12) 
+    cost_21 = node2.service_time + t_12 + node1.service_time
+    e_m_21 = node2.ready_time
+    l_m_21 = min(node2.due_date, node1.due_date - node2.service_time - t_12) 
+    is_12_feasible = e_m_12 <= l_m_12
+    is_21_feasible = e_m_21 <= l_m_21
+    if not is_12_feasible and not is_21_feasible:
+        return None
+    if is_12_feasible and (not is_21_feasible or cost_12 <= cost_21):
+        internal_seq = node1.internal_sequence + node2.internal_sequence
+        new_service_time = cost_12
+        new_ready_time = e_m_12
+        new_due_date = l_m_12
+    else:
+        internal_seq = node2.internal_sequence + node1.internal_sequence
+        new_service_time = cost_21
+        new_ready_time = e_m_21
+        new_due_date = l_m_21
+    window_span = new_due_date - new_ready_time
+    p_t = 1 / (1 + window_span) if window_span > 0 else 1
+    return p_t, p_d, internal_seq, new_service_time, new_ready_time, new_due_date
+
+
+def merge_score(t_12, max_dist, p_t, p_d):
+    p_c = t_12 / max_dist if max_dist > 0 else 0
+    return 0.4 * p_c + 0.4 * p_t + 0.2 * p_d
+
+
+def merge_nodes(id1, node1, id2, node2, evaluation):
+    _, _, internal_seq, new_service_time, new_ready_time, new_due_date = evaluation
+    new_demand = node1.demand + node2.demand
+    return MetaNode(
+        node_id=min(id1, id2),
+        original_nodes=node1.nodes + node2.nodes,
+        demand=new_demand,
+        ready_time=new_ready_time,
+        due_date=new_due_date,
+        service_time=new_service_time,
+        x=(node1.x * node1.demand + node2.x * node2.demand) / new_demand,
+        y=(node1.y * node1.demand + node2.y * node2.demand) / new_demand,
+        internal_sequence=internal_seq
+    )
+
+
+def coarsen_cvrptw_problem(df, vehicle_capacity, target_node_count, method='heap'):
+    """
+    Greedily merges the customer pair with the lowest compatibility score
+    until `target_node_count` meta-nodes remain (see Theory.md).
+
+    method='heap' keeps the merge scores in an incremental priority queue
+    (see `_coarsen_with_heap`), method='vectorized' scores every pair per
+    iteration with the NumPy kernel `score_merge_candidates`, and
+    method='exhaustive' rescores every pair in Python. All three produce
+    the same merge sequence.
+    """
     # Initializing MetaNodes from the original customer data
     nodes = {}
     for idx, row in df.iterrows():
@@ -52,9 +121,119 @@ def coarsen_cvrptw_problem(df, vehicle_capacity, target_node_count):
             y=row['y']
         )
     
+    return coarsen_meta_nodes(list(nodes.values()), vehicle_capacity, target_node_count, method)
+
+
+def coarsen_meta_nodes(meta_nodes, vehicle_capacity, target_node_count, method='heap'):
+    """
+    Continues coarsening a [depot, meta-node, ...] list, e.g. the result of
+    `coarsen_cvrptw_problem` for a larger target. The merges only depend on
+    the current meta-nodes, so this gives the same nodes as coarsening the
+    original customers to `target_node_count` directly.
+    """
     # Exclude depot
-    depot = nodes.pop(0)
-    
+    depot = meta_nodes[0]
+    nodes = {node.id: node for node in meta_nodes[1:]}
+
+    if method == 'heap':
+        nodes = _coarsen_with_heap(nodes, vehicle_capacity, target_node_count)
+    elif method == 'vectorized':
+        nodes = _coarsen_vectorized(nodes, vehicle_capacity, target_node_count)
+    elif method == 'exhaustive':
+        nodes = _coarsen_exhaustive(nodes, vehicle_capacity, target_node_count)
+    else:
+        raise ValueError(f"Unknown coarsening method '{method}'.")
+
+    final_nodes = [depot] + list(nodes.values())
+    return final_nodes
+
+
+def score_merge_candidates(demand, ready, due, service, x, y, vehicle_capacity):
+    """
+    Scores every candidate pair of meta-nodes in one NumPy pass.
+
+    The arrays hold the node attributes in iteration order. Pairs (i, j)
+    with i < j are evaluated with the same arithmetic as `evaluate_merge`,
+    and infeasible pairs are masked with +inf. Returns (i, j, i_first,
+    score) for the first minimal pair in `itertools.combinations` order,
+    where i_first tells whether the merged node visits i before j, or None
+    when no merge is feasible.
+    """
+    n = len(demand)
+    if n < 2:
+        return None
+    coords = np.column_stack([x, y])
+    dist = np.sqrt(((coords[:, np.newaxis, :] - coords[np.newaxis, :, :]) ** 2).sum(axis=2))
+    max_dist = dist.max()
+
+    d_i, d_j = demand[:, None], demand[None, :]
+    s_i, s_j = service[:, None], service[None, :]
+    e_i, e_j = ready[:, None], ready[None, :]
+    l_i, l_j = due[:, None], due[None, :]
+
+    p_d = (d_i + d_j) / vehicle_capacity
+    cost_12 = s_i + dist + s_j
+    l_m_12 = np.minimum(l_i, l_j - s_i - dist)
+    cost_21 = s_j + dist + s_i
+    l_m_21 = np.minimum(l_j, l_i - s_j - dist)
+    is_12_feasible = e_i <= l_m_12
+    is_21_feasible = e_j <= l_m_21
+    use_12 = is_12_feasible & (~is_21_feasible | (cost_12 <= cost_21))
+
+    window_span = np.where(use_12, l_m_12 - e_i, l_m_21 - e_j)
+    with np.errstate(divide='ignore'):
+        p_t = np.where(window_span > 0, 1 / (1 + np.maximum(window_span, 0)), 1)
+    p_c = dist / max_dist if max_dist > 0 else np.zeros_like(dist)
+    score = 0.4 * p_c + 0.4 * p_t + 0.2 * p_d
+
+    feasible = (d_i + d_j <= vehicle_capacity) & (is_12_feasible | is_21_feasible)
+    feasible &= np.triu(np.ones((n, n), dtype=bool), k=1)
+    score = np.where(feasible, score, np.inf)
+    best = int(np.argmin(score))
+    i, j = divmod(best, n)
+    if not np.isfinite(score[i, j]):
+        return None
+    return i, j, bool(use_12[i, j]), float(score[i, j])
+
+
+def _coarsen_vectorized(nodes, vehicle_capacity, target_node_count):
+    ids = list(nodes.keys())
+    node_list = list(nodes.values())
+    attributes = ('demand', 'ready_time', 'due_date', 'service_time', 'x', 'y')
+    columns = {name: np.array([getattr(node, name) for node in node_list], dtype=np.float64) for name in attributes}
+
+    iteration = 0
+    while len(node_list) > target_node_count:
+        iteration += 1
+        best = score_merge_candidates(
+            columns['demand'], columns['ready_time'], columns['due_date'],
+            columns['service_time'], columns['x'], columns['y'], vehicle_capacity
+        )
+        # Perform the best merge for this iteration
+        if best is None:
+            print(f"\nStopping at iteration {iteration}: No more feasible merges found.")
+            break
+        i, j, _, _ = best
+        id1, id2 = ids[i], ids[j]
+        node1, node2 = node_list[i], node_list[j]
+        t_12 = np.sqrt(((np.array([node1.x, node1.y]) - np.array([node2.x, node2.y])) ** 2).sum())
+        new_node = merge_nodes(id1, node1, id2, node2, evaluate_merge(node1, node2, t_12, vehicle_capacity))
+
+        # Drop both rows and append the merged node, as the dict would.
+        keep = np.ones(len(node_list), dtype=bool)
+        keep[[i, j]] = False
+        ids = [nid for nid, k in zip(ids, keep) if k] + [new_node.id]
+        node_list = [node for node, k in zip(node_list, keep) if k] + [new_node]
+        for name in attributes:
+            columns[name] = np.append(columns[name][keep], getattr(new_node, name))
+
+        if iteration % 10 == 0:
+            print(f"Iteration {iteration}: Merged {id1} & {id2} -> New node {new_node.id}. Remaining: {len(node_list)}")
+
+    return dict(zip(ids, node_list))
+
+
+def _coarsen_exhaustive(nodes, vehicle_capacity, target_node_count):
     # Coarsen until the target size is reached
     iteration = 0
     while len(nodes) > target_node_count:
@@ -67,52 +246,17 @@ def coarsen_cvrptw_problem(df, vehicle_capacity, target_node_count):
             index=current_node_ids,
             columns=current_node_ids
         )
+        max_dist = dist_matrix.max().max()
         best_merge = {'score': float('inf'), 'pair': None, 'new_node': None}
         for id1, id2 in itertools.combinations(current_node_ids, 2):
             node1, node2 = nodes[id1], nodes[id2]
-            
-            if node1.demand + node2.demand > vehicle_capacity:
-                continue
-            p_d = (node1.demand + node2.demand) / vehicle_capacity
             t_12 = dist_matrix.loc[id1, id2]
-            cost_12 = node1.service_time + t_12 + node2.service_time
-            e_m_12 = node1.ready_time
-            l_m_12 = min(node1.due_date, node2.due_date - node1.service_time - t_12) 
-            cost_21 = node2.service_time + t_12 + node1.service_time
-            e_m_21 = node2.ready_time
-            l_m_21 = min(node2.due_date, node1.due_date - node2.service_time - t_12) 
-            is_12_feasible = e_m_12 <= l_m_12
-            is_21_feasible = e_m_21 <= l_m_21
-            if not is_12_feasible and not is_21_feasible:
+            evaluation = evaluate_merge(node1, node2, t_12, vehicle_capacity)
+            if evaluation is None:
                 continue
-            if is_12_feasible and (not is_21_feasible or cost_12 <= cost_21):
-                internal_seq = node1.internal_sequence + node2.internal_sequence
-                new_service_time = cost_12
-                new_ready_time = e_m_12
-                new_due_date = l_m_12
-            else:
-                internal_seq = node2.internal_sequence + node1.internal_sequence
-                new_service_time = cost_21
-                new_ready_time = e_m_21
-                new_due_date = l_m_21
-            p_c = t_12 / dist_matrix.max().max() if dist_matrix.max().max() > 0 else 0
-            window_span = new_due_date - new_ready_time
-            p_t = 1 / (1 + window_span) if window_span > 0 else 1            
-            score = 0.4 * p_c + 0.4 * p_t + 0.2 * p_d
+            score = merge_score(t_12, max_dist, evaluation[0], evaluation[1])
             if score < best_merge['score']:
-                new_demand = node1.demand + node2.demand
-                new_node_id = min(id1, id2)
-                new_node = MetaNode(
-                    node_id=new_node_id,
-                    original_nodes=node1.nodes + node2.nodes,
-                    demand=new_demand,
-                    ready_time=new_ready_time,
-                    due_date=new_due_date,
-                    service_time=new_service_time,
-                    x=(node1.x * node1.demand + node2.x * node2.demand) / new_demand,
-                    y=(node1.y * node1.demand + node2.y * node2.demand) / new_demand,
-                    internal_sequence=internal_seq
-                )
+                new_node = merge_nodes(id1, node1, id2, node2, evaluation)
                 best_merge.update({'score': score, 'pair': (id1, id2), 'new_node': new_node})
 
         # Perform the best merge for this iteration
@@ -128,6 +272,125 @@ def coarsen_cvrptw_problem(df, vehicle_capacity, target_node_count):
         
         if iteration % 10 == 0:
             print(f"Iteration {iteration}: Merged {id1} & {id2} -> New node {new_node.id}. Remaining: {len(nodes)}")
-    
-    final_nodes = [depot] + list(nodes.values())
-    return final_nodes
+    return nodes
+
+
+def _coarsen_with_heap(nodes, vehicle_capacity, target_node_count):
+    """
+    Incremental version of `_coarsen_exhaustive`.
+
+    Every meta-node gets a sequence number in dict insertion order, which is
+    the order `itertools.combinations` visits pairs in, so heap keys
+    (score, seq1, seq2) break ties exactly like the exhaustive scan. After a
+    merge only the pairs of the new node are scored and pushed; entries of
+    merged-away nodes are dropped lazily when popped.
+
+    The normaliser max_dist is the top of a lazy max-heap of all pairwise
+    distances. A merged node lies between its parents, so max_dist can only
+    shrink, which makes scores computed with an older max_dist lower bounds
+    of their current value. Such stale entries are rescored when they reach
+    the top. If rounding ever makes max_dist grow, all scores are rebuilt.
+    """
+    seq_nodes = {}
+    seq_ids = {}
+    coords = []
+    for seq, (node_id, node) in enumerate(nodes.items()):
+        seq_nodes[seq] = node
+        seq_ids[seq] = node_id
+        coords.append([node.x, node.y])
+    coords = np.array(coords, dtype=np.float64).reshape(-1, 2)
+    next_seq = len(seq_nodes)
+
+    dist_matrix = np.sqrt(((coords[:, np.newaxis, :] - coords[np.newaxis, :, :]) ** 2).sum(axis=2))
+    pairs = list(itertools.combinations(range(next_seq), 2))
+    dist_heap = [(-dist_matrix[s1, s2], s1, s2) for s1, s2 in pairs]
+    heapq.heapify(dist_heap)
+
+    def current_max_dist():
+        while dist_heap and (dist_heap[0][1] not in seq_nodes or dist_heap[0][2] not in seq_nodes):
+            heapq.heappop(dist_heap)
+        return -dist_heap[0][0] if dist_heap else 0.0
+
+    def score_entry(s1, s2, t_12, max_dist):
+        evaluation = evaluate_merge(seq_nodes[s1], seq_nodes[s2], t_12, vehicle_capacity)
+        if evaluation is None:
+            return None
+        p_t, p_d = evaluation[0], evaluation[1]
+        return (merge_score(t_12, max_dist, p_t, p_d), s1, s2, max_dist, t_12, p_t, p_d)
+
+    def build_score_heap(max_dist):
+        entries = []
+        seqs = sorted(seq_nodes)
+        for s1, s2 in itertools.combinations(seqs, 2):
+            t_12 = np.sqrt(((coords_of[s1] - coords_of[s2]) ** 2).sum())
+            entry = score_entry(s1, s2, t_12, max_dist)
+            if entry is not None:
+                entries.append(entry)
+        heapq.heapify(entries)
+        return entries
+
+    coords_of = {seq: coords[seq] for seq in seq_nodes}
+    max_dist = dist_matrix.max() if next_seq else 0.0
+    score_heap = []
+    for s1, s2 in pairs:
+        entry = score_entry(s1, s2, dist_matrix[s1, s2], max_dist)
+        if entry is not None:
+            score_heap.append(entry)
+    heapq.heapify(score_heap)
+
+    iteration = 0
+    while len(seq_nodes) > target_node_count:
+        iteration += 1
+        best = None
+        while score_heap:
+            entry = score_heap[0]
+            _, s1, s2, used_max_dist, t_12, p_t, p_d = entry
+            if s1 not in seq_nodes or s2 not in seq_nodes:
+                heapq.heappop(score_heap)
+            elif used_max_dist != max_dist:
+                heapq.heapreplace(score_heap, (merge_score(t_12, max_dist, p_t, p_d), s1, s2, max_dist, t_12, p_t, p_d))
+            else:
+                best = heapq.heappop(score_heap)
+                break
+
+        # Perform the best merge for this iteration
+        if best is None:
+            print(f"\nStopping at iteration {iteration}: No more feasible merges found.")
+            break
+        _, s1, s2, _, t_12, _, _ = best
+        id1, id2 = seq_ids[s1], seq_ids[s2]
+        node1, node2 = seq_nodes.pop(s1), seq_nodes.pop(s2)
+        evaluation = evaluate_merge(node1, node2, t_12, vehicle_capacity)
+        new_node = merge_nodes(id1, node1, id2, node2, evaluation)
+        del seq_ids[s1], seq_ids[s2], coords_of[s1], coords_of[s2]
+
+        new_seq = next_seq
+        next_seq += 1
+        new_coord = np.array([new_node.x, new_node.y], dtype=np.float64)
+        others = sorted(seq_nodes)
+        if others:
+            other_coords = np.array([coords_of[seq] for seq in others])
+            new_dists = np.sqrt(((other_coords - new_coord) ** 2).sum(axis=1))
+        else:
+            new_dists = np.zeros(0)
+        seq_nodes[new_seq] = new_node
+        seq_ids[new_seq] = new_node.id
+        coords_of[new_seq] = new_coord
+        for seq, t in zip(others, new_dists):
+            heapq.heappush(dist_heap, (-t, seq, new_seq))
+
+        new_max_dist = current_max_dist()
+        if new_max_dist > max_dist:
+            max_dist = new_max_dist
+            score_heap = build_score_heap(max_dist)
+        else:
+            max_dist = new_max_dist
+            for seq, t in zip(others, new_dists):
+                entry = score_entry(seq, new_seq, t, max_dist)
+                if entry is not None:
+                    heapq.heappush(score_heap, entry)
+
+        if iteration % 10 == 0:
+            print(f"Iteration {iteration}: Merged {id1} & {id2} -> New node {new_node.id}. Remaining: {len(seq_nodes)}")
+
+    return {seq_ids[seq]: seq_nodes[seq] for seq in sorted(seq_nodes)}
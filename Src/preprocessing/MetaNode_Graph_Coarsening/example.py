@@ -1,9 +1,13 @@
 import os
 import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import pandas as pd
-from MetaNodeCoarsening import load_solomon_data, coarsen_cvrptw_problem
+from MetaNodeCoarsening import load_solomon_data, coarsen_cvrptw_problem, coarsen_meta_nodes
 
-def process_all_instances(data_dir, output_csv, target_size=20):
+MANIFEST_COLUMNS = ["instance", "target_size", "num_nodes", "processing_time_sec", "peak_memory_mb", "status", "error"]
+
+def process_all_instances(data_dir, output_csv, target_size=20, method='vectorized'):
     results = []
 
     for filename in os.listdir(data_dir):
@@ -13,7 +17,7 @@ def process_all_instances(data_dir, output_csv, target_size=20):
                 start_time = time.time()
 
                 df, vehicle_capacity = load_solomon_data(filepath)
-                reduced_nodes = coarsen_cvrptw_problem(df, vehicle_capacity, target_size)
+                reduced_nodes = coarsen_cvrptw_problem(df, vehicle_capacity, target_size, method=method)
 
                 elapsed_time = time.time() - start_time
 
@@ -41,5 +45,141 @@ def process_all_instances(data_dir, output_csv, target_size=20):
     results_df.to_csv(output_csv, index=False)
     print(f"\nAll results saved to {output_csv}")
 
+def coarsen_instance(filepath, target_sizes, method='vectorized'):
+    """
+    Pipeline worker: coarsens one instance to every target size, largest
+    first, each from the meta-nodes of the previous one. Returns one
+    (meta-node rows, manifest row) pair per target; the manifest row holds
+    the time and peak memory of that step only.
+    """
+    filename = os.path.basename(filepath)
+    df, vehicle_capacity = load_solomon_data(filepath)
+    reduced_nodes = None
+    results = []
+    for target_size in sorted(target_sizes, reverse=True):
+        tracemalloc.start()
+        start_time = time.time()
+        try:
+            if reduced_nodes is None:
+                reduced_nodes = coarsen_cvrptw_problem(df, vehicle_capacity, target_size, method=method)
+            else:
+                reduced_nodes = coarsen_meta_nodes(reduced_nodes, vehicle_capacity, target_size, method=method)
+            elapsed_time = time.time() - start_time
+            _, peak_memory = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        rows = []
+        for node in reduced_nodes:
+            rows.append({
+                "instance": filename,
+                "target_size": target_size,
+                "node_id": node.id,
+                "original_nodes": node.nodes,
+                "num_original_nodes": len(node.nodes),
+                "demand": node.demand,
+                "ready_time": node.ready_time,
+                "due_date": node.due_date,
+                "service_time": node.service_time,
+                "x": node.x,
+                "y": node.y,
+                "processing_time_sec": elapsed_time
+            })
+        manifest_row = {
+            "instance": filename,
+            "target_size": target_size,
+            "num_nodes": len(reduced_nodes),
+            "processing_time_sec": elapsed_time,
+            "peak_memory_mb": peak_memory / 2**20,
+            "status": "ok",
+            "error": "",
+        }
+        results.append((rows, manifest_row))
+    return results
+
+
+def _load_manifest(manifest_csv):
+    if not os.path.exists(manifest_csv) or os.path.getsize(manifest_csv) == 0:
+        return pd.DataFrame(columns=MANIFEST_COLUMNS)
+    return pd.read_csv(manifest_csv, keep_default_na=False)
+
+
+def _append_csv(df, path):
+    write_header = not os.path.exists(path) or os.path.getsize(path) == 0
+    with open(path, "a", newline="") as f:
+        df.to_csv(f, header=write_header, index=False)
+        f.flush()
+
+
+def run_pipeline(data_dir, output_path, target_sizes=(20,), max_workers=None, method='vectorized', output_format='csv'):
+    """
+    Coarsens every Solomon instance in `data_dir` for every target size on a
+    process pool, streaming results to disk as each instance finishes.
+    Smaller targets of an instance continue from the coarsening of the next
+    larger one instead of starting again from the full graph.
+
+    With output_format='csv' meta-nodes are appended to `output_path`; with
+    'parquet' `output_path` is a directory holding one part file per
+    (instance, target_size). Timings and peak memory go to
+    `<output_path>.manifest.csv`. Pairs already marked 'ok' in the manifest
+    are skipped on a rerun, and failed ones are retried.
+    """
+    manifest_csv = f"{output_path.rstrip(os.sep)}.manifest.csv"
+    manifest = _load_manifest(manifest_csv)
+    finished = manifest[manifest["status"] == "ok"]
+    done = set(zip(finished["instance"], finished["target_size"].astype(int)))
+
+    if output_format == 'csv' and os.path.exists(output_path) and os.path.getsize(output_path) > 0:
+        # Drop rows of runs that died before their manifest row was written.
+        existing = pd.read_csv(output_path)
+        keep = [(i, int(t)) in done for i, t in zip(existing["instance"], existing["target_size"])]
+        if not all(keep):
+            existing[keep].to_csv(output_path, index=False)
+    elif output_format == 'parquet':
+        os.makedirs(output_path, exist_ok=True)
+    elif output_format != 'csv':
+        raise ValueError(f"Unknown output format '{output_format}'.")
+
+    tasks = {}
+    for filename in sorted(os.listdir(data_dir)):
+        if filename.lower().endswith(".txt"):
+            pending = [int(t) for t in target_sizes if (filename, int(t)) not in done]
+            if pending:
+                tasks[os.path.join(data_dir, filename)] = pending
+    print(f"{sum(map(len, tasks.values()))} coarsening runs to do, {len(done)} already finished.")
+
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(coarsen_instance, filepath, pending, method): (filepath, pending)
+                   for filepath, pending in tasks.items()}
+        for future in as_completed(futures):
+            filepath, pending = futures[future]
+            filename = os.path.basename(filepath)
+            try:
+                results = future.result()
+            except Exception as e:
+                print(f"Error processing {filename} (targets {pending}): {e}")
+                failed = []
+                for target_size in pending:
+                    manifest_row = dict.fromkeys(MANIFEST_COLUMNS, "")
+                    manifest_row.update({"instance": filename, "target_size": target_size, "status": "error", "error": str(e)})
+                    failed.append(manifest_row)
+                _append_csv(pd.DataFrame(failed, columns=MANIFEST_COLUMNS), manifest_csv)
+                continue
+
+            for rows, manifest_row in results:
+                target_size = manifest_row["target_size"]
+                rows_df = pd.DataFrame(rows)
+                if output_format == 'csv':
+                    _append_csv(rows_df, output_path)
+                else:
+                    part = os.path.join(output_path, f"{os.path.splitext(filename)[0]}_t{target_size}.parquet")
+                    rows_df.to_parquet(f"{part}.tmp", index=False)
+                    os.replace(f"{part}.tmp", part)
+                _append_csv(pd.DataFrame([manifest_row], columns=MANIFEST_COLUMNS), manifest_csv)
+                print(f"Processed {filename}: reduced to {manifest_row['num_nodes']} nodes (target {target_size}) "
+                      f"in {manifest_row['processing_time_sec']:.2f} sec, peak {manifest_row['peak_memory_mb']:.1f} MB.")
+
+    print(f"\nAll results saved to {output_path}")
+
 if __name__ == "__main__":
-    process_all_instances(data_dir="Data\Global_Datasets\Solomon", output_csv="coarsening_results_2.csv", target_size=2)
+    run_pipeline(data_dir=os.path.join("Data", "Global_Datasets", "Solomon"), output_path="coarsening_results_2.csv", target_sizes=(2,))
@@ -0,0 +1,15 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Src", "common"))
+from repo_paths import SOLOMON_DIR, add_module_paths
+
+add_module_paths()
+
+
+@pytest.fixture
+def solomon_path():
+    """ Path of a bundled Solomon instance, e.g. solomon_path('c101.txt'). """
+    return lambda name: os.path.join(SOLOMON_DIR, name)
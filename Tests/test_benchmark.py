@@ -0,0 +1,30 @@
+import json
+
+import pytest
+
+from repo_paths import load_module
+
+benchmark = load_module("Src/analysis/benchmark.py", "benchmark")
+
+
+def test_multilevel_stats_come_from_the_solver(solomon_path):
+    row = benchmark.bench_multilevel_quantum(solomon_path("c101.txt"), 20, subproblem_size=6)
+    assert row['feasible']
+    assert row['num_subproblems'] >= 1
+    assert 0 < row['num_variables'] <= 6
+    for field in ('build_time', 'sample_time', 'coarsen_time', 'refine_time', 'python_heap_mb'):
+        assert row[field] is not None and row[field] >= 0
+    assert row['coarsen_time'] + row['build_time'] + row['sample_time'] + row['refine_time'] <= row['total_time']
+
+
+def test_compare_to_baseline_reports_regressions(tmp_path):
+    base = {'benchmark': 'qubo', 'instance': 'c101.txt', 'solver': 'FullQuboSolver', 'num_customers': 8,
+            'total_time': 1.0, 'num_terms': 100, 'cost': 50.0, 'feasible': True}
+    path = tmp_path / "baseline.json"
+    path.write_text(json.dumps([base]))
+
+    assert benchmark.compare_to_baseline([dict(base, total_time=1.2)], str(path)) == []
+    found = benchmark.compare_to_baseline([dict(base, total_time=2.0, num_terms=90, cost=60.0, feasible=False)], str(path))
+    assert len(found) == 4
+    with pytest.raises(FileNotFoundError):
+        benchmark.compare_to_baseline([base], str(tmp_path / "missing.json"))
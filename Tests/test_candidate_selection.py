@@ -0,0 +1,48 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pytest
+
+import ld_daqc_with_graph_coarsening as ld_daqc
+from candidate_selection import RoutePool, select_best_route
+from ld_daqc_simulator import LDDAQCSimulator
+
+
+@pytest.fixture
+def step(solomon_path):
+    params = ld_daqc.load_and_prepare_data(solomon_path("r101.txt"), 200)
+    customers = list(range(1, 13))
+    linear, quadratic = ld_daqc.calculate_hamiltonian_coeffs(customers, params, 0.4, 1.0)
+    counts = ld_daqc.sample_ld_daqc(LDDAQCSimulator(), 3, 10, linear, quadratic, len(customers), shots=512)
+    return counts, dict(enumerate(customers)), params
+
+
+def exhaustive_best(counts, qubit_map, params):
+    best = (None, float('inf'))
+    for bitstring in sorted(counts, key=counts.get, reverse=True)[:100]:
+        customers = [qubit_map[i] for i, bit in enumerate(reversed(bitstring)) if bit == '1']
+        if not customers or sum(params['demands'][c] for c in customers) > params['vehicle_capacity']:
+            continue
+        cost, route = ld_daqc.solve_tsptw_with_insertion(customers, params)
+        if route and cost < best[1]:
+            best = (route, cost)
+    return best
+
+
+def test_pools_match_the_exhaustive_scan(step):
+    counts, qubit_map, params = step
+    expected = exhaustive_best(counts, qubit_map, params)
+    assert select_best_route(counts, qubit_map, params, ld_daqc.solve_tsptw_with_insertion) == expected
+    with ThreadPoolExecutor(2) as pool:
+        assert select_best_route(counts, qubit_map, params, ld_daqc.solve_tsptw_with_insertion,
+                                 executor=pool, batch_size=4) == expected
+    with RoutePool(params, 2) as pool:
+        assert select_best_route(counts, qubit_map, params, ld_daqc.solve_tsptw_with_insertion,
+                                 executor=pool, batch_size=4) == expected
+
+
+def test_process_pools_must_be_bound_to_the_params(step):
+    counts, qubit_map, params = step
+    with ProcessPoolExecutor(1) as pool, pytest.raises(ValueError):
+        select_best_route(counts, qubit_map, params, ld_daqc.solve_tsptw_with_insertion, executor=pool)
+    with RoutePool(dict(params), 1) as pool, pytest.raises(ValueError):
+        select_best_route(counts, qubit_map, params, ld_daqc.solve_tsptw_with_insertion, executor=pool)
@@ -0,0 +1,38 @@
+import numpy as np
+
+from input import read_solomon
+from vrp_problem import VRPProblem
+from vrp_solvers import ClusterFirstSolver
+
+
+def make_problem(solomon_path, num_customers, capacities):
+    data = read_solomon(solomon_path("r101.txt"), num_customers)
+    return VRPProblem(data['sources'], data['costs'], data['time_costs'],
+                      np.array(capacities), data['dests'], data['weights'])
+
+
+def test_clusters_cover_every_customer_within_capacity(solomon_path):
+    problem = make_problem(solomon_path, 12, [120, 120, 120])
+    solver = ClusterFirstSolver(problem)
+    clusters = solver.cluster_customers()
+    assert len(clusters) == 3
+    assert sorted(c for cluster in clusters for c in cluster) == sorted(problem.dests)
+    for cluster, capacity in zip(clusters, problem.capacities):
+        assert sum(problem.weights[c] for c in cluster) <= capacity
+    assert solver.cluster_sizes(clusters) == [len(cluster) for cluster in clusters]
+
+    solution = solver.solve(1.0, 1000.0, num_reads=20, max_workers=1)
+    assert solution.check()
+
+
+def test_customers_that_fit_nowhere_get_extra_vehicles(solomon_path):
+    problem = make_problem(solomon_path, 12, [60, 60])
+    clusters = ClusterFirstSolver(problem).cluster_customers()
+    assert len(clusters) > 2
+    assert sorted(c for cluster in clusters for c in cluster) == sorted(problem.dests)
+    for cluster in clusters:
+        assert sum(problem.weights[c] for c in cluster) <= 60
+
+    solution = ClusterFirstSolver(problem).solve(1.0, 1000.0, num_reads=20, max_workers=1)
+    assert len(solution.solution) == len(clusters)
+    assert not solution.check()
@@ -0,0 +1,55 @@
+import numpy as np
+
+from input import read_solomon
+from vrp_problem import VRPProblem
+from repo_paths import load_module
+
+cvrp_problem = load_module("Variants/CVRP/problem.py", "cvrp_problem")
+# The CVRP solver imports greedy_solver from its own directory.
+load_module("Variants/CVRP/solvers/greedy_solver.py", "greedy_solver")
+cvrp_solver = load_module("Variants/CVRP/solvers/qubo_dwave_solver.py", "cvrp_qubo_dwave_solver")
+
+
+def make_problem(solomon_path, num_customers=10, capacities=(60, 60, 60)):
+    data = read_solomon(solomon_path("r101.txt"), num_customers)
+    return cvrp_problem.CVRPProblem(data['sources'], data['costs'], data['time_costs'], np.array(capacities),
+                                    data['dests'], data['weights'])
+
+
+def test_pruning_only_drops_unreachable_steps(solomon_path):
+    problem = make_problem(solomon_path)
+    k_limits = [len(problem.dests)] * 3
+    report = problem.get_pruning_report(k_limits)
+    full = int(VRPProblem.get_active_grid(problem, k_limits).sum())
+    assert report['pruned_variables'] > 0
+    assert report['num_variables'] + report['pruned_variables'] == full
+
+    # Every step a vehicle can still reach within capacity is kept.
+    active = problem.get_active_grid(k_limits)
+    weights = np.sort(np.asarray(problem.weights)[problem.dests])
+    max_stops = int(np.searchsorted(np.cumsum(weights), 60, side='right'))
+    assert active[:, :max_stops].any(axis=2).all()
+    assert not active[:, max_stops:].any()
+
+
+def test_sparsity_report_counts_the_pruned_dense_model(solomon_path):
+    problem = make_problem(solomon_path)
+    k_limits = problem.get_max_stops()
+    report = problem.get_sparsity_report(k_limits, 3)
+    assert report['dense_num_terms'] == problem.get_qubo_template(k_limits).num_terms
+    assert report['num_terms'] == problem.get_qubo_template(k_limits, 3).num_terms
+
+
+def test_penalties_are_only_suggested_when_left_open(solomon_path, monkeypatch):
+    calls = []
+
+    def suggest(problem, A1):
+        calls.append(A1)
+        return {'A1': A1, 'A2': 500.0, 'A3': 7.0}
+
+    monkeypatch.setattr(cvrp_solver, "suggest_penalty_weights", suggest)
+    solver = cvrp_solver.CVRPQuboSolver(make_problem(solomon_path, 5, (100, 100)))
+    solver.solve(1.0, 300.0, 2.0, num_reads=5)
+    assert calls == [] and solver.A3 == 2.0
+    solver.solve(2.0, 300.0, num_reads=5)
+    assert calls == [2.0] and solver.A3 == 7.0
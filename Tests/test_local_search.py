@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from input import read_solomon
+from local_search import improve_routes, repair_routes
+from vrp_problem import VRPProblem
+from vrp_solvers import AveragePartitionSolver
+
+
+def tour_cost(costs, routes, depot=0):
+    return sum(costs[depot, r[0]] + costs[r[-1], depot] + sum(costs[a, b] for a, b in zip(r, r[1:])) for r in routes if r)
+
+
+def random_instance(seed, num_customers):
+    rng = np.random.default_rng(seed)
+    points = rng.random((num_customers + 1, 2)) * 100
+    costs = np.sqrt(((points[:, None, :] - points[None, :, :]) ** 2).sum(axis=2))
+    weights = np.concatenate(([0.0], rng.integers(5, 20, num_customers)))
+    return costs, weights
+
+
+def test_local_search_keeps_customers_and_capacity():
+    costs, weights = random_instance(0, 12)
+    capacities = [70.0, 70.0, 70.0]
+    customers = list(range(1, 13))
+
+    # Duplicates, a stranger (node 0 as a customer) and missing visits are repaired first.
+    routes = repair_routes([[1, 2, 2, 0], [3, 4, 5], [6, 1]], customers, costs, 0, weights, capacities)
+    assert sorted(c for route in routes for c in route) == customers
+    improved = improve_routes(routes, costs, 0, weights, capacities)
+
+    assert sorted(c for route in improved for c in route) == customers
+    assert all(weights[route].sum() <= capacity for route, capacity in zip(improved, capacities))
+    assert tour_cost(costs, improved) <= tour_cost(costs, routes) + 1e-9
+
+
+def test_repair_starts_empty_route_lists_per_vehicle():
+    costs = np.random.default_rng(1).random((6, 6))
+    assert len(repair_routes([], [1, 2, 3, 4, 5], costs)) == 1
+    routes = repair_routes([], [1, 2, 3, 4, 5], costs, weights=np.ones(6), capacities=[3, 3])
+    assert len(routes) == 2
+    assert sorted(c for route in routes for c in route) == [1, 2, 3, 4, 5]
+    assert all(len(route) <= 3 for route in routes)
+
+
+def test_moves_respect_the_stop_limits():
+    costs, weights = random_instance(2, 12)
+    customers = list(range(1, 13))
+    routes = repair_routes([], customers, costs, 0, weights, [1000.0] * 3, k_limits=[4, 4, 4])
+    assert [len(route) for route in routes] == [4, 4, 4]
+
+    free = improve_routes(routes, costs, 0, weights)
+    assert max(len(route) for route in free) > 4
+    limited = improve_routes(routes, costs, 0, weights, k_limits=[4, 4, 4])
+    assert [len(route) for route in limited] == [4, 4, 4]
+    assert sorted(c for route in limited for c in route) == customers
+    assert tour_cost(costs, limited) <= tour_cost(costs, routes) + 1e-9
+
+
+@pytest.mark.parametrize("instance, num_customers, num_vehicles", [("rc101.txt", 8, 2), ("c101.txt", 12, 3)])
+def test_refined_solver_routes_stay_within_k_limits(solomon_path, instance, num_customers, num_vehicles):
+    # Unlimited local search merges these into routes longer than k_max.
+    data = read_solomon(solomon_path(instance), num_customers)
+    problem = VRPProblem(data['sources'], data['costs'], data['time_costs'], np.array([1000] * num_vehicles),
+                         data['dests'], data['weights'])
+    solver = AveragePartitionSolver(problem)
+    limits = solver.get_vehicle_k_limits()
+    solution = solver.solve(1.0, 1000.0, num_reads=20, refine=True)
+    assert sorted(c for route in solution.solution for c in route) == sorted(problem.dests)
+    assert all(len(route) <= k for route, k in zip(solution.solution, limits))
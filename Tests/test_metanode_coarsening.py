@@ -0,0 +1,47 @@
+import shutil
+
+import pandas as pd
+import pytest
+
+from MetaNodeCoarsening import load_solomon_data, coarsen_cvrptw_problem, coarsen_meta_nodes
+from example import run_pipeline
+
+
+def summary(nodes):
+    return [(node.id, list(node.nodes), list(node.internal_sequence)) for node in nodes]
+
+
+@pytest.mark.parametrize("instance", ["c101.txt", "r201.txt"])
+@pytest.mark.parametrize("method", ["heap", "vectorized"])
+def test_methods_give_the_same_merges_as_exhaustive(solomon_path, instance, method):
+    df, capacity = load_solomon_data(solomon_path(instance))
+    df = df.iloc[:26]
+    exhaustive = summary(coarsen_cvrptw_problem(df, capacity, 8, method='exhaustive'))
+    assert summary(coarsen_cvrptw_problem(df, capacity, 8, method=method)) == exhaustive
+
+
+def test_continuing_a_coarsening_matches_a_fresh_one(solomon_path):
+    df, capacity = load_solomon_data(solomon_path("r201.txt"))
+    df = df.iloc[:41]
+    larger = coarsen_cvrptw_problem(df, capacity, 20, method='heap')
+    continued = coarsen_meta_nodes(larger, capacity, 10, method='vectorized')
+    fresh = coarsen_cvrptw_problem(df, capacity, 10, method='vectorized')
+    assert summary(continued) == summary(fresh)
+    assert sorted(c for node in fresh[1:] for c in node.nodes) == list(range(1, 41))
+
+
+def test_pipeline_skips_finished_runs(solomon_path, tmp_path, capsys):
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    shutil.copy(solomon_path("c101.txt"), data_dir)
+    output = str(tmp_path / "nodes.csv")
+
+    run_pipeline(str(data_dir), output, target_sizes=(60, 30), max_workers=1)
+    manifest = pd.read_csv(f"{output}.manifest.csv")
+    assert sorted(manifest["target_size"]) == [30, 60]
+    assert set(manifest["status"]) == {"ok"}
+    rows = len(pd.read_csv(output))
+
+    run_pipeline(str(data_dir), output, target_sizes=(60, 30), max_workers=1)
+    assert "0 coarsening runs to do, 2 already finished." in capsys.readouterr().out
+    assert len(pd.read_csv(output)) == rows
@@ -0,0 +1,21 @@
+import numpy as np
+import pytest
+
+from qubo_helper import QuboTemplate
+
+
+def test_weighted_sums_the_parts():
+    # (0, 1) and (1, 0) fold onto one term; the pattern is shared by both parts.
+    template = QuboTemplate(['a', 'b', 'c'], [0, 1, 1, 2], [1, 0, 1, 2],
+                            cost=[1.0, 2.0, 0.0, 4.0], constraint=[0.5, 0.0, -1.0, 0.0])
+    assert template.num_terms == 3
+    matrix = template.weighted(cost=2.0, constraint=10.0).to_numpy_matrix()
+    np.testing.assert_allclose(matrix, [[0, 11, 0], [0, -10, 0], [0, 0, 8]])
+    # A missing weight counts as 0.
+    np.testing.assert_allclose(template.weighted(cost=1.0).to_numpy_matrix().sum(), 7.0)
+
+
+def test_weighted_rejects_unknown_parts():
+    template = QuboTemplate(['a'], [0], [0], cost=[1.0])
+    with pytest.raises(ValueError):
+        template.weighted(penalty=1.0)
@@ -0,0 +1,31 @@
+import numpy as np
+
+from solomon_loader import load_solomon
+from input import read_solomon
+from MetaNodeCoarsening import load_solomon_data
+from ld_daqc_with_graph_coarsening import load_and_prepare_data
+
+
+def test_cached_matrix_matches_euclidean(solomon_path, tmp_path):
+    path = solomon_path("r101.txt")
+    fresh = load_solomon(path, cache_dir=str(tmp_path))
+    cached = load_solomon(path, cache_dir=str(tmp_path))
+    assert isinstance(cached['distance_matrix'], np.memmap)
+
+    coords = fresh['coords']
+    naive = np.array([[np.hypot(*(a - b)) for b in coords] for a in coords])
+    np.testing.assert_allclose(cached['distance_matrix'], naive)
+    np.testing.assert_array_equal(cached['demands'], fresh['demands'])
+
+
+def test_dtype_reaches_every_entry_point(solomon_path):
+    path = solomon_path("r101.txt")
+    problem = read_solomon(path, 10, dtype=np.float32)
+    df, capacity = load_solomon_data(path, dtype=np.float32)
+    params = load_and_prepare_data(path, 200, dtype=np.float32)
+
+    assert problem['costs'].dtype == np.float32
+    reference, _ = load_solomon_data(path)
+    assert capacity == 200
+    assert df.equals(reference)
+    assert params['distance_matrix'].dtype == np.float32
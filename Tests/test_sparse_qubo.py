@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from qubo_helper import Qubo, SparseQubo
+
+
+def folded(qubo_dict, order):
+    """ {(a, b): value} with both orientations summed onto one key, zeros dropped. """
+    result = {}
+    for (a, b), value in qubo_dict.items():
+        key = (a, b) if order[a] <= order[b] else (b, a)
+        result[key] = result.get(key, 0.0) + value
+    return {key: value for key, value in result.items() if value != 0}
+
+
+def test_constraints_match_dict_qubo():
+    labels = [(m, j, k) for m in range(2) for j in range(1, 4) for k in range(1, 3)]
+    order = {label: i for i, label in enumerate(labels)}
+    reference, sparse = Qubo(), SparseQubo(labels)
+
+    groups = [labels[:4], labels[3:9], labels[8:]]
+    for const, group in zip((1.5, 2.0, 0.5), groups):
+        reference.add_only_one_constraint(group, const)
+        sparse.add_only_one_constraint([order[v] for v in group], const)
+        reference.add_at_most_one_constraint(group, const / 2)
+        sparse.add_at_most_one_constraint([order[v] for v in group], const / 2)
+    for a, b, value in ((labels[0], labels[5], 3.0), (labels[5], labels[0], -1.0), (labels[7], labels[7], 4.0)):
+        reference.add((a, b), value)
+        sparse.add((a, b), value)
+
+    expected = folded(reference.get_dict(), order)
+    actual = folded(sparse.get_dict(), order)
+    assert actual.keys() == expected.keys()
+    for key, value in expected.items():
+        assert actual[key] == pytest.approx(value)
+
+
+def test_merge_and_matrix_views_agree():
+    labels = ['a', 'b', 'c']
+    first = SparseQubo(labels)
+    first.add_only_one_constraint([0, 1, 2], 1.0)
+    second = SparseQubo(['c', 'd'])
+    second.add_terms([0, 0], [1, 1], [2.0, 1.0])
+    first.merge_with(second, 1.0, 2.0)
+
+    assert first.labels == ['a', 'b', 'c', 'd']
+    matrix = first.to_numpy_matrix()
+    indptr, indices, data = first.to_csr()
+    from_csr = np.zeros_like(matrix)
+    for row in range(first.num_variables):
+        from_csr[row, indices[indptr[row]:indptr[row + 1]]] = data[indptr[row]:indptr[row + 1]]
+    np.testing.assert_allclose(from_csr, matrix)
+    assert matrix[2, 3] == pytest.approx(6.0)
+    assert matrix[0, 1] == pytest.approx(2.0)
+
+
+def test_bqm_energies_match_matrix():
+    dimod = pytest.importorskip("dimod")
+    rng = np.random.default_rng(0)
+    qubo = SparseQubo([(i,) for i in range(6)])
+    qubo.add_terms(rng.integers(0, 6, 30), rng.integers(0, 6, 30), rng.normal(size=30))
+    bqm = qubo.to_bqm()
+    matrix = qubo.to_numpy_matrix()
+    for _ in range(20):
+        bits = rng.integers(0, 2, 6)
+        sample = {(i,): int(b) for i, b in enumerate(bits)}
+        assert bqm.energy(sample) == pytest.approx(bits @ matrix @ bits)
+    assert bqm.vartype is dimod.BINARY
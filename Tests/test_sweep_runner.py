@@ -0,0 +1,28 @@
+import pytest
+
+from sweep_runner import make_sweep_jobs, run_sweep, split_reads
+
+
+def test_split_reads_sizes_and_independent_seeds():
+    chunks = split_reads(250, 100, 0)
+    assert [size for size, _ in chunks] == [100, 100, 50]
+    assert all(0 <= seed < 2 ** 31 for _, seed in chunks)
+    # Consecutive job seeds must not share chunk seeds (seed + i would).
+    other = {seed for _, seed in split_reads(250, 100, 1)}
+    assert not other & {seed for _, seed in chunks}
+    assert split_reads(30, 100, None) == [(30, None)]
+
+
+def test_sweep_rejects_solvers_with_their_own_algorithm(solomon_path):
+    with pytest.raises(ValueError):
+        make_sweep_jobs([solomon_path("r101.txt")], ['ClusterFirstSolver'], [1.0], [100.0], 5, 2)
+
+
+def test_run_sweep_merges_chunks(solomon_path, tmp_path):
+    jobs = make_sweep_jobs([solomon_path("r101.txt")], ['AveragePartitionSolver'], [1.0], [200.0],
+                           num_customers=5, num_vehicles=2, num_reads=30, seeds=[3])
+    output = tmp_path / "sweep.csv"
+    rows = run_sweep(jobs, str(output), max_workers=1, chunk_reads=20)
+    assert len(rows) == 1
+    assert rows[0]['reads_merged'] == 30 and not rows[0]['partial']
+    assert output.read_text().count("\n") == 2
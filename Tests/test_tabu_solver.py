@@ -0,0 +1,30 @@
+from solomon_loader import load_solomon
+from tabu_solver import FlatRoutes, TabuSearch
+
+
+def load_params(path, num_customers):
+    instance = load_solomon(path)
+    n = num_customers + 1
+    return {
+        'distance_matrix': instance['distance_matrix'][:n, :n],
+        'ready_times': instance['ready_times'][:n],
+        'due_dates': instance['due_dates'][:n],
+        'service_times': instance['service_times'][:n],
+        'demands': instance['demands'][:n],
+        'vehicle_capacity': instance['capacity'],
+    }
+
+
+def test_tabu_keeps_customers_and_feasibility(solomon_path):
+    params = load_params(solomon_path("c101.txt"), 25)
+    routes = [[0, c, 0] for c in range(1, 26)]
+    search = TabuSearch(params, seed=1)
+    initial_cost = search.total_cost(routes)
+    best, cost = search.search(routes, time_limit=10.0, max_iterations=60)
+
+    assert sorted(c for route in best for c in route[1:-1]) == list(range(1, 26))
+    assert all(route[0] == 0 and route[-1] == 0 for route in best)
+    assert FlatRoutes(best, search.data).feasible()
+    assert all(params['demands'][route].sum() <= params['vehicle_capacity'] for route in best)
+    assert cost < initial_cost
+    assert cost == search.total_cost(best)
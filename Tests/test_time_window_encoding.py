@@ -0,0 +1,56 @@
+from types import SimpleNamespace
+
+import numpy as np
+
+from time_window_encoding import (build_time_slots, earliest_start_times, latest_start_times,
+                                  slot_transition_ok)
+
+
+def line_problem():
+    """ Depot at x=0 and customers 1-3 at x=10, 20, 30; service 5 at each customer. """
+    x = np.array([0.0, 10.0, 20.0, 30.0])
+    return SimpleNamespace(
+        source_depot=0,
+        distance_matrix=np.abs(x[:, None] - x[None, :]),
+        ready_times=np.array([0.0, 0.0, 50.0, 0.0]),
+        due_dates=np.array([200.0, 100.0, 100.0, 35.0]),
+        service_times=np.array([0.0, 5.0, 5.0, 5.0]),
+    )
+
+
+def test_earliest_start_times_by_hand():
+    earliest = earliest_start_times(line_problem(), [1, 2, 3], 3)
+    expected = np.array([
+        [10.0, 50.0, 30.0],  # straight from the depot, waiting for customer 2
+        [55.0, 50.0, 35.0],  # e.g. 3 -> 1 is 30 + 5 + 20, and 1 -> 3 just meets its due date
+        [60.0, 50.0, np.inf],  # customer 3 cannot be a third stop before 35
+    ])
+    np.testing.assert_allclose(earliest, expected)
+
+
+def test_latest_start_times_by_hand():
+    # min(due date, depot due - service - way back)
+    np.testing.assert_allclose(latest_start_times(line_problem(), [1, 2, 3]), [100.0, 100.0, 35.0])
+
+
+def test_time_slots_cover_the_bounds():
+    problem = line_problem()
+    (vehicle, customer, step, slot), dropped = build_time_slots(problem, [1, 2, 3], [3], 10.0)
+    kept = {}
+    for k, c, t in zip(step.tolist(), customer.tolist(), slot.tolist()):
+        kept.setdefault((k, c), []).append(t)
+    assert kept == {
+        (1, 1): list(range(1, 11)), (1, 2): list(range(5, 11)), (1, 3): [3],
+        (2, 1): list(range(5, 11)), (2, 2): list(range(5, 11)), (2, 3): [3],
+        (3, 1): list(range(6, 11)), (3, 2): list(range(5, 11)),
+    }
+    assert (vehicle == 0).all()
+    # Unpruned grid: 3 steps x 3 customers x slots 0..10 (latest start 100).
+    assert dropped == 3 * 3 * 11 - len(slot)
+
+
+def test_slot_transitions():
+    problem = line_problem()
+    # Customer 1 started in slot 1 (10..20): customer 2 is reachable from slot 2 on.
+    assert not slot_transition_ok(problem, 1, 1, 2, 1, 10.0)
+    assert slot_transition_ok(problem, 1, 1, 2, 2, 10.0)
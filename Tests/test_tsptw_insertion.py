@@ -0,0 +1,75 @@
+import random
+
+import numpy as np
+
+from tsptw_insertion import TSPTWInsertionEngine, get_insertion_engine
+from ld_daqc_with_graph_coarsening import load_and_prepare_data
+
+
+def reference_insertion(customers, params):
+    """ Cheapest insertion that re-simulates every candidate route. """
+    dist = params['distance_matrix']
+
+    def feasible(route):
+        time = 0.0
+        for u, v in zip(route, route[1:]):
+            arrival = time + params['service_times'][u] + dist[u, v]
+            if arrival > params['due_dates'][v]:
+                return False
+            time = max(arrival, params['ready_times'][v])
+        return True
+
+    route, unrouted = [0, 0], list(customers)
+    while unrouted:
+        best = (float('inf'), None, None)
+        for customer in unrouted:
+            for i in range(len(route) - 1):
+                u, v = route[i], route[i + 1]
+                change = dist[u, customer] + dist[customer, v] - dist[u, v]
+                if change < best[0] and feasible(route[:i + 1] + [customer] + route[i + 1:]):
+                    best = (change, customer, i + 1)
+        if best[1] is None:
+            return None, None
+        route.insert(best[2], best[1])
+        unrouted.remove(best[1])
+    return sum(dist[u, v] for u, v in zip(route, route[1:])), route
+
+
+def test_cached_insertion_matches_the_reference(solomon_path):
+    # c101 has many equal distances, so ties are exercised too.
+    params = load_and_prepare_data(solomon_path("c101.txt"), 200)
+    engine = TSPTWInsertionEngine(params)
+    rng = random.Random(3)
+    for _ in range(40):
+        customers = rng.sample(range(1, 101), rng.randint(1, 8))
+        for order in (customers, customers[::-1], customers):
+            cost, route = engine.solve(order)
+            expected_cost, expected_route = reference_insertion(order, params)
+            assert route == expected_route
+            if route is not None:
+                assert np.isclose(cost, expected_cost)
+    assert engine.cache_info().hits >= 40
+
+
+def test_ties_follow_the_callers_order():
+    # Customers on a symmetric cross around the depot tie on every insertion.
+    coords = np.array([(0, 0), (1, 0), (0, 1), (-1, 0), (0, -1), (2, 0), (0, 2)], dtype=np.float64)
+    n = len(coords)
+    params = {
+        'distance_matrix': np.linalg.norm(coords[:, None] - coords[None, :], axis=2),
+        'ready_times': np.zeros(n), 'due_dates': np.full(n, 1000.0), 'service_times': np.zeros(n),
+    }
+    engine = TSPTWInsertionEngine(params)
+    rng = random.Random(0)
+    for _ in range(20):
+        customers = rng.sample(range(1, n), 4)
+        for order in (customers, customers[::-1]):
+            assert engine.solve(order)[1] == reference_insertion(order, params)[1]
+
+
+def test_engines_are_kept_off_the_params_dict(solomon_path):
+    params = load_and_prepare_data(solomon_path("c101.txt"), 200)
+    engine = get_insertion_engine(params)
+    assert get_insertion_engine(params) is engine
+    assert 'insertion_engine' not in params
+    assert get_insertion_engine(dict(params)) is not engine
@@ -0,0 +1,125 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from input import read_solomon
+from qubo_helper import Qubo
+from vrp_problem import VRPProblem
+
+
+@pytest.fixture
+def make_problem(solomon_path):
+    def make(num_customers=7, num_vehicles=2):
+        data = read_solomon(solomon_path("r101.txt"), num_customers)
+        return VRPProblem(data['sources'], data['costs'], data['time_costs'],
+                          np.array([200] * num_vehicles), data['dests'], data['weights'])
+    return make
+
+
+def folded(qubo_dict):
+    """ {(a, b): value} with (a, b) and (b, a) summed onto one key, zeros dropped. """
+    result = {}
+    for (a, b), value in qubo_dict.items():
+        key = (a, b) if a <= b else (b, a)
+        result[key] = result.get(key, 0.0) + value
+    return {key: value for key, value in result.items() if abs(value) > 1e-12}
+
+
+def baseline_qubo(problem, vehicle_k_limits, A1, A2):
+    """ The dict-based Gora et al. formulation the array version replaced. """
+    costs, depot, customers = problem.costs, problem.source_depot, problem.dests
+    cost_qubo, constraint_qubo = Qubo(), Qubo()
+    for m, k_max in enumerate(vehicle_k_limits):
+        for i in customers:
+            cost_qubo.add(((m, i, 1), (m, i, 1)), costs[depot][i])
+        for k in range(1, k_max + 1):
+            for i in customers:
+                cost_qubo.add(((m, i, k), (m, i, k)), costs[i][depot])
+                if k < k_max:
+                    for j in customers:
+                        if i != j:
+                            cost_qubo.add(((m, i, k), (m, j, k + 1)), costs[i][j] - costs[i][depot])
+    for j in customers:
+        constraint_qubo.add_only_one_constraint(
+            [(m, j, k) for m, k_max in enumerate(vehicle_k_limits) for k in range(1, k_max + 1)], 1.0)
+    for m, k_max in enumerate(vehicle_k_limits):
+        for k in range(1, k_max + 1):
+            constraint_qubo.add_at_most_one_constraint([(m, j, k) for j in customers], 1.0)
+
+    combined = Qubo()
+    for part, weight in ((cost_qubo, A1), (constraint_qubo, A2)):
+        for field, value in part.get_dict().items():
+            combined.add(field, weight * value)
+    return combined.get_dict()
+
+
+def route_energy(qubo, routes):
+    state = np.zeros(qubo.num_variables)
+    for m, route in enumerate(routes):
+        for k, customer in enumerate(route, start=1):
+            state[qubo.index[(m, customer, k)]] = 1
+        for k in range(2, len(route) + 1):
+            if (('next_stop', m), k) in qubo.index:
+                state[qubo.index[(('next_stop', m), k)]] = 1
+    return state @ qubo.to_numpy_matrix() @ state
+
+
+def route_cost(problem, routes):
+    costs = np.asarray(problem.costs)
+    return sum(costs[0, r[0]] + costs[r[-1], 0] + sum(costs[a, b] for a, b in zip(r, r[1:])) for r in routes if r)
+
+
+@pytest.mark.parametrize("vehicle_k_limits", [[4, 4], [5, 3]])
+def test_paper_qubo_matches_baseline(make_problem, vehicle_k_limits):
+    problem = make_problem()
+    expected = folded(baseline_qubo(problem, vehicle_k_limits, 1.5, 300.0))
+    actual = folded(problem.get_qubo_paper(vehicle_k_limits, 1.5, 300.0).get_dict())
+    assert actual.keys() == expected.keys()
+    for key, value in expected.items():
+        assert actual[key] == pytest.approx(value)
+
+
+def test_variable_grid_labels(make_problem):
+    problem = make_problem(5, 2)
+    index, labels = problem.get_variable_grid([3, 2])
+    assert index.shape == (2, 3, 5)
+    assert (index[1, 2] == -1).all()
+    assert len(labels) == (3 + 2) * 5
+    assert labels[index[1, 1, 4]] == (1, problem.dests[4], 2)
+
+
+def test_template_is_cached_and_reweighted(make_problem):
+    problem = make_problem()
+    template = problem.get_qubo_template([4, 4])
+    assert problem.get_qubo_template(np.array([4, 4])) is template
+    for A1, A2 in ((1.0, 100.0), (2.5, 40.0)):
+        expected = folded(baseline_qubo(problem, [4, 4], A1, A2))
+        actual = folded(template.weighted(cost=A1, constraint=A2).get_dict())
+        assert actual == pytest.approx(expected)
+
+
+def test_k_nearest_prices_every_route_at_least_its_cost(make_problem):
+    problem = make_problem()
+    A2 = 1000.0
+    qubo = problem.get_qubo_paper([4, 4], 1.0, A2, k_nearest=2)
+    neighbours = problem.get_neighbour_mask(2)
+    position = {c: i for i, c in enumerate(problem.dests)}
+    num_near = 0
+    for order in itertools.permutations(problem.dests):
+        for cut in (3, 4):
+            routes = [list(order[:cut]), list(order[cut:])]
+            energy = route_energy(qubo, routes) + A2 * len(problem.dests)
+            cost = route_cost(problem, routes)
+            assert energy >= cost - 1e-9
+            if all(neighbours[position[a], position[b]] for r in routes for a, b in zip(r, r[1:])):
+                assert energy == pytest.approx(cost)
+                num_near += 1
+    assert num_near
+
+
+def test_sparsity_report_matches_dense_template(make_problem):
+    problem = make_problem(10, 3)
+    report = problem.get_sparsity_report([4, 4, 3], 3)
+    assert report['dense_num_terms'] == problem.get_qubo_template([4, 4, 3]).num_terms
+    assert report['num_terms'] == problem.get_qubo_template([4, 4, 3], 3).num_terms
@@ -1 +1,50 @@
+import numpy as np
 
+from vrp_problem import VRPProblem
+
+
+class CVRPProblem(VRPProblem):
+    """
+    VRPProblem whose variable grid is pruned with the vehicle capacities.
+
+    The customer j can only be the k-th stop of vehicle m if j plus the
+    k - 1 lightest other customers fit in the vehicle, so any other
+    (m, j, k) variable is never created. The capacity inequalities
+    themselves are added by `unconstrained_qubo.build_cvrp_qubo`.
+    """
+
+    def get_min_step_loads(self):
+        """
+        (k_max, customers) array: the lightest possible load of a route
+        whose (k + 1)-th stop is dests[j].
+        """
+        weights = np.asarray(self.weights, dtype=np.float64)[np.asarray(self.dests, dtype=np.int64)]
+        order = np.argsort(weights, kind='stable')
+        rank = np.empty(len(weights), dtype=np.int64)
+        rank[order] = np.arange(len(weights))
+        lightest = np.concatenate(([0.0], np.cumsum(weights[order])))
+
+        k = np.arange(len(weights))[:, None]
+        # If j is itself among the k lightest, the other stops are the k + 1 lightest minus j.
+        return np.where(rank[None, :] < k, lightest[np.minimum(k + 1, len(weights))], weights[None, :] + lightest[k])
+
+    def get_max_stops(self):
+        """ Per vehicle, the most customers it can carry at once. """
+        weights = np.sort(np.asarray(self.weights, dtype=np.float64)[np.asarray(self.dests, dtype=np.int64)])
+        lightest = np.cumsum(weights)
+        return [int(np.searchsorted(lightest, capacity, side='right')) for capacity in self.capacities]
+
+    def get_active_grid(self, vehicle_k_limits):
+        active = super().get_active_grid(vehicle_k_limits)
+        k_max = active.shape[1]
+        loads = self.get_min_step_loads()[:k_max]
+        if k_max > len(loads):
+            loads = np.vstack((loads, np.full((k_max - len(loads), loads.shape[1]), np.inf)))
+        capacities = np.asarray(self.capacities, dtype=np.float64)
+        return active & (loads[None, :, :] <= capacities[:, None, None])
+
+    def get_pruning_report(self, vehicle_k_limits):
+        """ Variables kept and pruned by the capacity reachability check. """
+        kept = int(self.get_active_grid(vehicle_k_limits).sum())
+        full = int(VRPProblem.get_active_grid(self, vehicle_k_limits).sum())
+        return {'num_variables': kept, 'pruned_variables': full - kept}
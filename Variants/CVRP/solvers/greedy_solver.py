@@ -1 +1,33 @@
+from baseline_solver import SavingsSolver, routes_to_initial_state
+from penalty_utils import capacity_scale
+from qubo_helper import encode_slack
 
+
+class GreedySolver(SavingsSolver):
+    """
+    Clarke-Wright savings (sweep fallback) on a `CVRPProblem`, whose routes
+    also seed the capacity slack bits of the CVRP QUBO.
+    """
+
+    def initial_state(self, routes, variables):
+        return cvrp_initial_state(self.problem, routes, variables)
+
+
+def cvrp_initial_state(problem, routes, variables):
+    """
+    Initial state for the CVRP QUBO over `variables`: the routing bits of
+    `routes` plus, for every vehicle with a capacity constraint, the slack
+    bits of its unused capacity (see unconstrained_qubo.py).
+    """
+    state = routes_to_initial_state(routes, variables)
+    scale = capacity_scale(problem.weights, problem.capacities)
+    for m, route in enumerate(routes):
+        label = ('capacity_slack', m)
+        if (label, 0) not in state:
+            continue
+        bound = int(problem.capacities[m] // scale)
+        free = bound - int(round(sum(problem.weights[c] for c in route) / scale))
+        if 0 <= free <= bound:
+            for b, bit in enumerate(encode_slack(free, bound)):
+                state[(label, b)] = int(bit)
+    return state
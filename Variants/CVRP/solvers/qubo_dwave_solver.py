@@ -1 +1,53 @@
+from vrp_solvers import VRPSolver
+from penalty_utils import suggest_penalty_weights
+from unconstrained_qubo import add_capacity_constraints
+from greedy_solver import cvrp_initial_state
+import math
 
+
+class CVRPQuboSolver(VRPSolver):
+    """
+    Capacity-aware QUBO solver for a `CVRPProblem`.
+
+    Steps no vehicle can reach within its capacity are pruned before the
+    QUBO is built, every vehicle gets a capacity penalty (A3) and any
+    penalty left as None is derived from the cost matrix (penalty_utils.py).
+    """
+
+    def __init__(self, problem):
+        super().__init__(problem)
+        self.A3 = None
+        self.pruning = None
+        self.num_slack = 0
+
+    def get_vehicle_k_limits(self, limit_radius=None):
+        """
+        The most customers each vehicle can carry; with `limit_radius`, at
+        most the average share plus the radius (as in AveragePartitionSolver).
+        """
+        k_limits = self.problem.get_max_stops()
+        if limit_radius is not None:
+            average = math.ceil(len(self.problem.dests) / len(self.problem.capacities)) + limit_radius
+            k_limits = [min(k, average) for k in k_limits]
+        return k_limits
+
+    def build_qubo(self, vehicle_k_limits, A1, A2, k_nearest=None):
+        self.pruning = self.problem.get_pruning_report(vehicle_k_limits)
+        qubo = super().build_qubo(vehicle_k_limits, A1, A2, k_nearest)
+        self.num_slack = add_capacity_constraints(qubo, self.problem, self.A3)
+        return qubo
+
+    def encode_routes(self, routes, variables):
+        return cvrp_initial_state(self.problem, routes, variables)
+
+    def solve(self, A1=None, A2=None, A3=None, solver_type='simulated', num_reads=50, limit_radius=None, k_nearest=None, refine=False,
+              initial_routes=None, rounds=1):
+        A1 = A1 if A1 is not None else 1.0
+        if A2 is None or A3 is None:
+            # Only scanned for the weights the caller left open.
+            suggested = suggest_penalty_weights(self.problem, A1)
+            A2 = A2 if A2 is not None else suggested['A2']
+            A3 = A3 if A3 is not None else suggested['A3']
+        self.A3 = A3
+        vehicle_k_limits = self.get_vehicle_k_limits(limit_radius)
+        return self.solve_with_limits(vehicle_k_limits, A1, A2, solver_type, num_reads, k_nearest, refine, initial_routes, rounds)
@@ -1 +1,60 @@
+"""
+Penalty weights for the CVRP QUBO derived from the instance itself.
 
+A constraint penalty only works if breaking the constraint never pays off,
+so the weights are bounded from the cost matrix instead of hand-tuned:
+
+* A2 (one visit per customer, one stop per step): skipping a customer saves
+  at most its most expensive way in plus its most expensive way out,
+* A3 (capacity): the demands are divided by their common divisor and A3
+  is set so that an overload by the mean demand costs as much as a skipped
+  customer. Sizing it for a one-unit overload instead would let the
+  squared capacity terms swamp the routing terms.
+"""
+import math
+
+import numpy as np
+
+
+def capacity_scale(weights, capacities):
+    """
+    Greatest common divisor of the integral demands and capacities (1 if any
+    of them is fractional). Dividing by it keeps the slack encoding short.
+    """
+    values = np.concatenate((np.asarray(weights, dtype=np.float64), np.asarray(capacities, dtype=np.float64)))
+    if not np.all(values == np.round(values)):
+        return 1
+    scale = 0
+    for value in values.astype(np.int64):
+        scale = math.gcd(scale, int(value))
+    return max(scale, 1)
+
+
+def cost_statistics(problem):
+    """ Summary of the depot/customer cost matrix used to size the penalties. """
+    nodes = np.array([problem.source_depot] + list(problem.dests), dtype=np.int64)
+    costs = np.asarray(problem.costs, dtype=np.float64)[np.ix_(nodes, nodes)]
+    off_diagonal = costs[~np.eye(len(nodes), dtype=bool)]
+    masked = np.where(np.eye(len(nodes), dtype=bool), -np.inf, costs)
+    # Most expensive way into and out of every customer.
+    detour = masked[:, 1:].max(axis=0) + masked[1:, :].max(axis=1) if len(nodes) > 1 else np.zeros(0)
+    return {
+        'mean': float(off_diagonal.mean()) if len(off_diagonal) else 0.0,
+        'std': float(off_diagonal.std()) if len(off_diagonal) else 0.0,
+        'max': float(off_diagonal.max()) if len(off_diagonal) else 0.0,
+        'max_detour': float(detour.max()) if len(detour) else 0.0,
+    }
+
+
+def suggest_penalty_weights(problem, A1=1.0, margin=1.5):
+    """
+    Returns {'A1', 'A2', 'A3'} for the CVRP QUBO: A2 is `margin` times the
+    largest cost a skipped customer can save, A3 that over the squared mean
+    (scaled) demand.
+    """
+    stats = cost_statistics(problem)
+    penalty = margin * A1 * max(stats['max_detour'], 1.0)
+    scale = capacity_scale(problem.weights, problem.capacities)
+    weights = np.asarray(problem.weights, dtype=np.float64)[np.asarray(problem.dests, dtype=np.int64)] / scale
+    typical = max(float(weights.mean()), 1.0) if len(weights) else 1.0
+    return {'A1': A1, 'A2': penalty, 'A3': penalty / typical ** 2}
@@ -1 +1,47 @@
+"""
+CVRP QUBO: the routing blocks of the paper formulation plus one capacity
+inequality per vehicle, all as penalty terms of one unconstrained model.
 
+The routing part (cost, one visit per customer, one stop per step) comes
+from the cached template of the problem, over the capacity-pruned grid of
+`CVRPProblem`. For vehicle m the load sum_jk w_j x_mjk <= Q_m is added as
+A3 * (load + slack - Q_m)^2 with a log-encoded slack, see
+`SparseQubo.add_linear_inequality`.
+"""
+import numpy as np
+
+from penalty_utils import capacity_scale
+
+
+def add_capacity_constraints(qubo, problem, A3):
+    """
+    Adds the capacity inequality of every vehicle to `qubo`. A vehicle that
+    can take all of its candidate customers at once gets no constraint.
+    Returns the number of slack variables added.
+    """
+    scale = capacity_scale(problem.weights, problem.capacities)
+    weights = np.asarray(problem.weights, dtype=np.float64) / scale
+    labels = np.array([label for label in qubo.labels if len(label) == 3], dtype=np.int64).reshape(-1, 3)
+    indices = qubo.add_variables([tuple(label) for label in labels.tolist()])
+
+    num_slack = 0
+    for m, capacity in enumerate(problem.capacities):
+        bound = int(capacity // scale)
+        members = labels[:, 0] == m
+        customers = np.unique(labels[members, 1])
+        if weights[customers].sum() <= bound:
+            continue
+        slack = qubo.add_linear_inequality(indices[members], weights[labels[members, 1]], bound, A3, ('capacity_slack', m))
+        num_slack += len(slack)
+    return num_slack
+
+
+def build_cvrp_qubo(problem, vehicle_k_limits, A1, A2, A3, k_nearest=None):
+    """
+    Routing QUBO of `problem` with the capacity penalties added. Returns
+    (qubo, stats), stats being `get_pruning_report` plus 'num_slack'.
+    """
+    qubo = problem.get_qubo_paper(vehicle_k_limits, A1, A2, k_nearest)
+    stats = problem.get_pruning_report(vehicle_k_limits)
+    stats['num_slack'] = add_capacity_constraints(qubo, problem, A3)
+    return qubo, stats
@@ -1 +1,54 @@
+import numpy as np
 
+from solomon_loader import load_solomon
+
+
+class CVRPTWProblem:
+    """
+    Capacitated VRP with time windows. Node 0 is the depot; every array is
+    indexed by node id.
+    """
+
+    def __init__(self, distance_matrix, demands, ready_times, due_dates, service_times, capacity, num_vehicles, customers=None):
+        self.source_depot = 0
+        self.distance_matrix = np.asarray(distance_matrix, dtype=np.float64)
+        self.demands = np.asarray(demands)
+        self.ready_times = np.asarray(ready_times, dtype=np.float64)
+        self.due_dates = np.asarray(due_dates, dtype=np.float64)
+        self.service_times = np.asarray(service_times, dtype=np.float64)
+        self.capacity = capacity
+        self.num_vehicles = num_vehicles
+        self.customers = list(customers) if customers is not None else list(range(1, len(self.demands)))
+
+    @classmethod
+    def from_solomon(cls, path, num_customers=None, num_vehicles=None):
+        """ The depot and the first `num_customers` customers of a Solomon file. """
+        instance = load_solomon(path)
+        n = len(instance['ids']) if num_customers is None else num_customers + 1
+        return cls(
+            instance['distance_matrix'][:n, :n], instance['demands'][:n], instance['ready_times'][:n],
+            instance['due_dates'][:n], instance['service_times'][:n], instance['capacity'],
+            instance['num_vehicles'] if num_vehicles is None else num_vehicles
+        )
+
+    @classmethod
+    def from_params(cls, params, num_vehicles, customers=None):
+        """ Wraps the params dict used by the LD-DAQC solver. """
+        return cls(params['distance_matrix'], params['demands'], params['ready_times'], params['due_dates'],
+                   params['service_times'], params['vehicle_capacity'], num_vehicles, customers)
+
+    def route_cost(self, route):
+        """
+        Distance of a [0, ..., 0] route and whether it meets every time
+        window and the capacity.
+        """
+        dist, time, feasible = 0.0, 0.0, True
+        for u, v in zip(route[:-1], route[1:]):
+            dist += self.distance_matrix[u, v]
+            arrival = time + self.service_times[u] + self.distance_matrix[u, v]
+            if arrival > self.due_dates[v]:
+                feasible = False
+            time = max(arrival, self.ready_times[v])
+        if sum(self.demands[c] for c in route) > self.capacity:
+            feasible = False
+        return dist, feasible
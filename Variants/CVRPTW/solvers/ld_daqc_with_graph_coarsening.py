@@ -7,17 +7,39 @@ Original file is located at
     https://colab.research.google.com/drive/1uaW23FrK2PRbELmHDmAI0Ec1-CnCUOQZ
 """
 
-!pip install qiskit qiskit-aer
+# Qiskit is optional; without it the NumPy LDDAQCSimulator backend is used.
+# !pip install qiskit qiskit-aer
 
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
-from qiskit import QuantumCircuit, transpile
-from qiskit_aer import AerSimulator
+try:
+    from qiskit import QuantumCircuit, transpile
+    from qiskit.circuit import ParameterVector
+    from qiskit_aer import AerSimulator
+except ImportError:
+    QuantumCircuit = transpile = ParameterVector = AerSimulator = None
 import time
 import random
-
-def load_and_prepare_data(file_path, vehicle_capacity):
+from solomon_loader import load_solomon, euclidean_distance_matrix
+from ld_daqc_simulator import LDDAQCSimulator
+from tsptw_insertion import get_insertion_engine
+from candidate_selection import RoutePool, select_best_route
+from spatial_coarsening import cluster_by_radius, supernode_arrays
+from tabu_solver import refine_with_tabu
+
+SOLOMON_COLUMNS = {'ids': 'CUST_NO.', 'demands': 'DEMAND', 'ready_times': 'READY_TIME', 'due_dates': 'DUE_DATE', 'service_times': 'SERVICE_TIME'}
+
+def load_and_prepare_data(file_path, vehicle_capacity, dtype=np.float64):
+    # `dtype` is the float type of the distance matrix (float32 halves its memory).
+    if file_path.lower().endswith('.txt'):
+        # Raw Solomon file: parsed once and cached by the shared loader.
+        instance = load_solomon(file_path, dtype=dtype)
+        df = pd.DataFrame({column: instance[key] for key, column in SOLOMON_COLUMNS.items()})
+        df.insert(1, 'XCOORD.', instance['coords'][:, 0])
+        df.insert(2, 'YCOORD.', instance['coords'][:, 1])
+        params = {"dataframe": df, "distance_matrix": instance['distance_matrix'], "demands": df['DEMAND'].values, "ready_times": df['READY_TIME'].values, "due_dates": df['DUE_DATE'].values, "service_times": df['SERVICE_TIME'].values, "total_customers": df.shape[0] - 1, "vehicle_capacity": vehicle_capacity}
+        return params
     try:
         df = pd.read_csv(file_path)
     except FileNotFoundError:
@@ -28,7 +50,7 @@ def load_and_prepare_data(file_path, vehicle_capacity):
         df.loc[0, 'DUE_DATE'] = 10000
     total_customers = df.shape[0] - 1
     coords = df[['XCOORD.', 'YCOORD.']].values
-    dist_matrix = np.sqrt(((coords[:, np.newaxis, :] - coords[np.newaxis, :, :]) ** 2).sum(axis=2))
+    dist_matrix = np.sqrt(((coords[:, np.newaxis, :] - coords[np.newaxis, :, :]) ** 2).sum(axis=2)).astype(dtype, copy=False)
     params = {"dataframe": df, "distance_matrix": dist_matrix, "demands": df['DEMAND'].values, "ready_times": df['READY_TIME'].values, "due_dates": df['DUE_DATE'].values, "service_times": df['SERVICE_TIME'].values, "total_customers": total_customers, "vehicle_capacity": vehicle_capacity}
     return params
 
@@ -43,21 +65,8 @@ def get_route_cost_and_feasibility(route, params):
     return dist, time
 
 def solve_tsptw_with_insertion(customers, params):
-    route, unrouted = [0, 0], list(customers)
-    while unrouted:
-        best_insertion_cost, best_customer, best_position = float('inf'), None, None
-        for customer in unrouted:
-            for i in range(len(route) - 1):
-                u, v = route[i], route[i+1]
-                cost_change = params['distance_matrix'][u, customer] + params['distance_matrix'][customer, v] - params['distance_matrix'][u, v]
-                if cost_change < best_insertion_cost:
-                    temp_route = route[:i+1] + [customer] + route[i+1:]
-                    if get_route_cost_and_feasibility(temp_route, params)[1] is not None:
-                        best_insertion_cost, best_customer, best_position = cost_change, customer, i + 1
-        if best_customer is not None:
-            route.insert(best_position, best_customer); unrouted.remove(best_customer)
-        else: return None, None
-    return get_route_cost_and_feasibility(route, params)[0], route
+    # Incremental, memoised cheapest insertion (see shared/tsptw_insertion.py).
+    return get_insertion_engine(params).solve(customers)
 
 def adiabatic_schedule(t, T, a=0):
     tau = t / T
@@ -105,8 +114,69 @@ def build_ld_daqc_circuit(p_layers, T_time, linear_coeffs, quadratic_coeffs, n_q
     qc.measure_all()
     return qc
 
-def coarsen_graph(params, cluster_radius):
+# Transpiled parametric circuits, keyed by (n_qubits, p_layers, backend).
+_ld_daqc_templates = {}
+
+def build_ld_daqc_template(n_qubits, p_layers):
+    """
+    Parametric version of `build_ld_daqc_circuit`: the angles gamma_k,
+    beta_k and the coefficients h_j, J_ij (upper triangle, row-major) are
+    circuit parameters, so the topology only depends on (n_qubits, p).
+    """
+    gammas = ParameterVector('gamma', p_layers)
+    betas = ParameterVector('beta', p_layers)
+    h = ParameterVector('h', n_qubits)
+    J = ParameterVector('J', n_qubits * (n_qubits - 1) // 2)
+    pairs = list(zip(*np.triu_indices(n_qubits, k=1)))
+    qc = QuantumCircuit(n_qubits)
+    for k in range(p_layers):
+        for j in range(n_qubits): qc.rz(2 * betas[k] * h[j], j)
+        for idx, (i, j) in enumerate(pairs): qc.rzz(2 * betas[k] * J[idx], int(i), int(j))
+        for j in range(n_qubits): qc.rx(2 * gammas[k], j)
+        if n_qubits > 1:
+            for j in range(n_qubits): qc.rxx(2 * gammas[k], j, (j + 1) % n_qubits)
+    qc.measure_all()
+    return qc, (gammas, betas, h, J)
+
+def get_ld_daqc_template(n_qubits, p_layers, backend):
+    """ Builds and transpiles the template once per (n_qubits, p_layers, backend). """
+    key = (n_qubits, p_layers, backend)
+    if key not in _ld_daqc_templates:
+        circuit, parameters = build_ld_daqc_template(n_qubits, p_layers)
+        _ld_daqc_templates[key] = (transpile(circuit, backend), parameters)
+    return _ld_daqc_templates[key]
+
+def bind_ld_daqc_template(template, p_layers, T_time, linear_coeffs, quadratic_coeffs):
+    """ Binds the Trotter angles and Hamiltonian coefficients of one decision step. """
+    circuit, (gammas, betas, h, J) = template
+    angles = [calculate_trotter_angles(linear_coeffs, quadratic_coeffs, k, p_layers, T_time) for k in range(p_layers)]
+    values = {
+        gammas: [float(gamma_k) for gamma_k, _ in angles],
+        betas: [float(beta_k) for _, beta_k in angles],
+        h: [float(c) for c in linear_coeffs],
+        J: [float(c) for c in quadratic_coeffs[np.triu_indices(len(linear_coeffs), k=1)]],
+    }
+    return circuit.assign_parameters(values)
+
+def sample_ld_daqc(backend, p_layers, T_time, linear_coeffs, quadratic_coeffs, n_qubits, shots=2048):
+    """
+    Runs the LD-DAQC circuit on `backend` and returns the measurement counts.
+    An LDDAQCSimulator evaluates the layers directly in NumPy; any other
+    backend runs the cached transpiled template with this step's values bound.
+    """
+    if isinstance(backend, LDDAQCSimulator):
+        angles = [calculate_trotter_angles(linear_coeffs, quadratic_coeffs, k, p_layers, T_time) for k in range(p_layers)]
+        return backend.sample_counts(angles, linear_coeffs, quadratic_coeffs, shots=shots)
+    template = get_ld_daqc_template(n_qubits, p_layers, backend)
+    circuit = bind_ld_daqc_template(template, p_layers, T_time, linear_coeffs, quadratic_coeffs)
+    return backend.run(circuit, shots=shots).result().get_counts()
+
+def coarsen_graph(params, cluster_radius, method='kdtree'):
     print(f"Coarsening graph with radius {cluster_radius} and capacity constraint.")
+    if method == 'kdtree':
+        return _coarsen_graph_kdtree(params, cluster_radius)
+    if method != 'dense':
+        raise ValueError(f"Unknown coarsening method '{method}'")
 
     unvisited = set(range(1, params['total_customers'] + 1))
     clusters = {}
@@ -138,16 +208,18 @@ def coarsen_graph(params, cluster_radius):
 
     num_supernodes = len(clusters)
     coarse_params = {"total_customers": num_supernodes, "vehicle_capacity": params["vehicle_capacity"], 'cluster_map': clusters}
-    supernode_coords = [params['dataframe'][['XCOORD.', 'YCOORD.']].values[0]]
+    coords = params['coords'] if 'coords' in params else params['dataframe'][['XCOORD.', 'YCOORD.']].values
+    supernode_coords = [coords[0]]
     supernode_demands = [0]
     for sid in sorted(clusters.keys()):
         original_cust_ids = clusters[sid]
-        avg_coord = np.mean(params['dataframe'][['XCOORD.', 'YCOORD.']].iloc[original_cust_ids], axis=0)
+        avg_coord = np.mean(coords[original_cust_ids], axis=0)
         supernode_coords.append(avg_coord)
         total_demand = np.sum(params['demands'][original_cust_ids])
         supernode_demands.append(total_demand)
     supernode_coords = np.array(supernode_coords)
     coarse_dist_matrix = np.sqrt(((supernode_coords[:, np.newaxis, :] - supernode_coords[np.newaxis, :, :]) ** 2).sum(axis=2))
+    coarse_params['coords'] = supernode_coords
     coarse_params['distance_matrix'] = coarse_dist_matrix
     coarse_params['demands'] = np.array(supernode_demands)
     coarse_params['ready_times'] = np.zeros(num_supernodes + 1)
@@ -155,6 +227,23 @@ def coarsen_graph(params, cluster_radius):
     coarse_params['service_times'] = np.zeros(num_supernodes + 1)
     return coarse_params
 
+def _coarsen_graph_kdtree(params, cluster_radius):
+    # Radius queries on a KD-tree; the dense distance matrix is not used.
+    coords = params['coords'] if 'coords' in params else params['dataframe'][['XCOORD.', 'YCOORD.']].values
+    clusters = cluster_by_radius(coords, params['demands'], params['due_dates'], cluster_radius, params['vehicle_capacity'])
+    print(f"Original problem size: {params['total_customers']} -> Coarsened size: {len(clusters)}")
+
+    num_supernodes = len(clusters)
+    supernode_coords, supernode_demands = supernode_arrays(coords, params['demands'], clusters)
+    coarse_params = {"total_customers": num_supernodes, "vehicle_capacity": params["vehicle_capacity"], 'cluster_map': dict(enumerate(clusters, start=1))}
+    coarse_params['coords'] = supernode_coords
+    coarse_params['distance_matrix'] = euclidean_distance_matrix(supernode_coords)
+    coarse_params['demands'] = supernode_demands
+    coarse_params['ready_times'] = np.zeros(num_supernodes + 1)
+    coarse_params['due_dates'] = np.full(num_supernodes + 1, 1e9)
+    coarse_params['service_times'] = np.zeros(num_supernodes + 1)
+    return coarse_params
+
 def uncoarsen_and_refine_solution(coarse_routes, coarse_params, original_params):
     print("\n Uncoarsening solution and refining routes.")
     final_routes = []
@@ -169,7 +258,16 @@ def uncoarsen_and_refine_solution(coarse_routes, coarse_params, original_params)
                 final_routes.append(refined_route)
     return final_routes
 
-def solve_with_quantum_greedy(params, p, T, lam1, quadratic_weight, backend, subproblem_size_limit):
+def solve_with_quantum_greedy(params, p, T, lam1, quadratic_weight, backend, subproblem_size_limit, executor=None, batch_size=1,
+                              step_stats=None, processes=None):
+    # With a `step_stats` list, every decision step appends a 'step' entry
+    # with its qubit and Hamiltonian term counts and its build/sample/select
+    # times (seconds).
+    # `processes` routes candidates on a RoutePool of that many workers.
+    if processes:
+        with RoutePool(params, processes) as pool:
+            return solve_with_quantum_greedy(params, p, T, lam1, quadratic_weight, backend, subproblem_size_limit,
+                                             pool, batch_size, step_stats)
     unserved_customers = set(range(1, params["total_customers"] + 1))
     final_routes = []
 
@@ -180,23 +278,17 @@ def solve_with_quantum_greedy(params, p, T, lam1, quadratic_weight, backend, sub
         qubit_map = {i: cust_id for i, cust_id in enumerate(subproblem_customers)}
         n_qubits = len(subproblem_customers)
 
+        start = time.perf_counter()
         linear_coeffs, quadratic_coeffs = calculate_hamiltonian_coeffs(subproblem_customers, params, lam1, quadratic_weight)
-        circuit = build_ld_daqc_circuit(p, T, linear_coeffs, quadratic_coeffs, n_qubits)
-        result = backend.run(transpile(circuit, backend), shots=2048).result()
-        counts = result.get_counts()
-
-        best_route_found, best_cost_found = None, float('inf')
-        for bitstring in sorted(counts, key=counts.get, reverse=True)[:100]:
-            selected_qubits = [i for i, bit in enumerate(reversed(bitstring)) if bit == '1']
-            current_selection = [qubit_map[i] for i in selected_qubits]
-
-            if not current_selection or sum(params['demands'][c] for c in current_selection) > params['vehicle_capacity']:
-                continue
+        built = time.perf_counter()
+        counts = sample_ld_daqc(backend, p, T, linear_coeffs, quadratic_coeffs, n_qubits, shots=2048)
+        sampled = time.perf_counter()
 
-            cost, route = solve_tsptw_with_insertion(current_selection, params)
-            if route and cost < best_cost_found:
-                best_cost_found = cost
-                best_route_found = route
+        best_route_found, best_cost_found = select_best_route(counts, qubit_map, params, solve_tsptw_with_insertion, top=100, executor=executor, batch_size=batch_size)
+        if step_stats is not None:
+            step_stats.append({'stage': 'step', 'qubits': n_qubits, 'terms': int(np.count_nonzero(linear_coeffs) + np.count_nonzero(quadratic_coeffs)),
+                               'build_time': built - start, 'sample_time': sampled - built,
+                               'select_time': time.perf_counter() - sampled})
 
         if best_route_found and len(best_route_found) > 3:
             final_routes.append(best_route_found)
@@ -220,16 +312,129 @@ def solve_with_quantum_greedy(params, p, T, lam1, quadratic_weight, backend, sub
     total_cost = sum(get_route_cost_and_feasibility(r, params)[0] for r in final_routes)
     return final_routes, total_cost
 
-def solve_with_multilevel_quantum(params, p, T, lam1, quadratic_weight, backend, subproblem_size_limit, cluster_radius):
+def solve_with_multilevel_quantum(params, p, T, lam1, quadratic_weight, backend, subproblem_size_limit, cluster_radius, executor=None, batch_size=1,
+                                  processes=None, step_stats=None):
+    # `step_stats` also receives a 'coarsen' and a 'refine' entry with the
+    # time (seconds) of those stages around the decision steps.
+    start = time.perf_counter()
     coarse_params = coarsen_graph(params, cluster_radius)
+    if step_stats is not None:
+        step_stats.append({'stage': 'coarsen', 'time': time.perf_counter() - start})
     print("\n Solving the coarsened problem with the quantum solver.")
     coarse_solution_routes, _ = solve_with_quantum_greedy(
-        coarse_params, p, T, lam1, quadratic_weight, backend, subproblem_size_limit
+        coarse_params, p, T, lam1, quadratic_weight, backend, subproblem_size_limit, executor, batch_size, step_stats, processes
     )
+    start = time.perf_counter()
     final_routes = uncoarsen_and_refine_solution(coarse_solution_routes, coarse_params, params)
+    if step_stats is not None:
+        step_stats.append({'stage': 'refine', 'time': time.perf_counter() - start})
     total_cost = sum(get_route_cost_and_feasibility(r, params)[0] for r in final_routes)
     return final_routes, total_cost
 
+def coarsen_with_metanodes(params, target_node_count, method='vectorized'):
+    # Imported here so the MetaNode coarsener (Src/preprocessing) stays optional.
+    from MetaNodeCoarsening import coarsen_cvrptw_problem
+    print(f"Coarsening graph with MetaNodes to {target_node_count} nodes.")
+    coords = params['coords'] if 'coords' in params else params['dataframe'][['XCOORD.', 'YCOORD.']].values
+    df = pd.DataFrame({'x': coords[:, 0], 'y': coords[:, 1], 'demand': params['demands'], 'ready_time': params['ready_times'], 'due_date': params['due_dates'], 'service_time': params['service_times']})
+    nodes = coarsen_cvrptw_problem(df, params['vehicle_capacity'], target_node_count, method)
+    print(f"Original problem size: {params['total_customers']} -> Coarsened size: {len(nodes) - 1}")
+
+    supernode_coords = np.array([[node.x, node.y] for node in nodes], dtype=np.float64)
+    coarse_params = {"total_customers": len(nodes) - 1, "vehicle_capacity": params["vehicle_capacity"]}
+    coarse_params['cluster_map'] = {sid: [int(c) for c in node.internal_sequence] for sid, node in enumerate(nodes) if sid > 0}
+    coarse_params['coords'] = supernode_coords
+    coarse_params['distance_matrix'] = euclidean_distance_matrix(supernode_coords)
+    coarse_params['demands'] = np.array([node.demand for node in nodes], dtype=np.asarray(params['demands']).dtype)
+    coarse_params['ready_times'] = np.array([node.ready_time for node in nodes], dtype=np.float64)
+    coarse_params['due_dates'] = np.array([node.due_date for node in nodes], dtype=np.float64)
+    coarse_params['service_times'] = np.array([node.service_time for node in nodes], dtype=np.float64)
+    return coarse_params
+
+def route_distance(route, params):
+    return float(sum(params['distance_matrix'][route[i], route[i + 1]] for i in range(len(route) - 1)))
+
+def refine_with_split(customers, params):
+    # Inserts the customers into one route; if no feasible route exists, they
+    # are packed first-fit by due date into as few feasible routes as possible.
+    _, route = solve_tsptw_with_insertion(customers, params)
+    if route:
+        return [route]
+    groups = []
+    for cust in sorted(customers, key=lambda c: params['due_dates'][c]):
+        for group in groups:
+            if solve_tsptw_with_insertion(group + [cust], params)[1]:
+                group.append(cust)
+                break
+        else:
+            groups.append([cust])
+    return [solve_tsptw_with_insertion(group, params)[1] or [0, group[0], 0] for group in groups]
+
+def project_and_refine(coarse_routes, coarse_params, params):
+    final_routes = []
+    for coarse_route in coarse_routes:
+        customers_in_route = []
+        for supernode_id in coarse_route:
+            if supernode_id != 0:
+                customers_in_route.extend(coarse_params['cluster_map'][supernode_id])
+        if customers_in_route:
+            final_routes.extend(refine_with_split(customers_in_route, params))
+    return final_routes
+
+def solve_with_multilevel_vcycle(params, p, T, lam1, quadratic_weight, backend, subproblem_size_limit, cluster_radius,
+                                 coarsener='graph', radius_growth=2.0, max_levels=8, executor=None, batch_size=1, processes=None):
+    """
+    Coarsens level by level until the problem fits `subproblem_size_limit`
+    (coarsener='graph' grows the radius by `radius_growth` per level,
+    coarsener='metanode' uses MetaNodeCoarsening), solves the coarsest level
+    with the quantum greedy solver and projects the routes back, refining
+    with TSPTW insertion at every level. A thread pool `executor`, or
+    `processes` worker processes, route the candidate bitstrings in batches
+    of `batch_size` (see select_best_route).
+
+    Returns (routes, total_cost, level_stats); level_stats has one dict per
+    level with its size, coarsening/refinement time and route cost.
+    """
+    levels, level_stats = [params], [{'level': 0, 'customers': params['total_customers']}]
+    radius = cluster_radius
+    for _ in range(max_levels):
+        if levels[-1]['total_customers'] <= subproblem_size_limit:
+            break
+        start = time.time()
+        if coarsener == 'metanode':
+            coarse_params = coarsen_with_metanodes(levels[-1], subproblem_size_limit)
+        elif coarsener == 'graph':
+            coarse_params = coarsen_graph(levels[-1], radius)
+            radius *= radius_growth
+        else:
+            raise ValueError(f"Unknown coarsener '{coarsener}'")
+        if coarse_params['total_customers'] >= levels[-1]['total_customers']:
+            print("Coarsening made no progress; continuing with the current level.")
+            if coarsener == 'metanode':
+                break
+            continue
+        levels.append(coarse_params)
+        level_stats.append({'level': len(levels) - 1, 'customers': coarse_params['total_customers'], 'coarsen_time': time.time() - start})
+
+    print(f"\n Solving level {len(levels) - 1} ({levels[-1]['total_customers']} nodes) with the quantum solver.")
+    start = time.time()
+    routes, _ = solve_with_quantum_greedy(levels[-1], p, T, lam1, quadratic_weight, backend, subproblem_size_limit, executor, batch_size,
+                                          processes=processes)
+    level_stats[-1]['solve_time'] = time.time() - start
+    level_stats[-1]['cost'] = sum(route_distance(r, levels[-1]) for r in routes)
+
+    for level in range(len(levels) - 2, -1, -1):
+        start = time.time()
+        routes = project_and_refine(routes, levels[level + 1], levels[level])
+        level_stats[level]['refine_time'] = time.time() - start
+        level_stats[level]['cost'] = sum(route_distance(r, levels[level]) for r in routes)
+
+    print("\n Level | Nodes | Coarsen (s) | Solve/Refine (s) | Cost")
+    for stats in level_stats:
+        print(f" {stats['level']:5d} | {stats['customers']:5d} | {stats.get('coarsen_time', 0.0):11.2f} | "
+              f"{stats.get('solve_time', stats.get('refine_time', 0.0)):16.2f} | {stats['cost']:.2f}")
+    return routes, level_stats[0]['cost'], level_stats
+
 def visualize_routes(routes, params, title="CVRPTW Solution"):
     plt.style.use('seaborn-v0_8-whitegrid')
     fig, ax = plt.subplots(figsize=(14, 14))
@@ -258,18 +463,37 @@ if __name__ == "__main__":
     T_evolution_time, p_layers = 10, 5
     LAMBDA_1, quadratic_weight = 0.4, 1.0
     CLUSTER_RADIUS = 15.0
+    # Recursive V-cycle (coarsen until the problem fits SUBPROBLEM_QUBIT_LIMIT)
+    # instead of a single coarsening level; COARSENER is 'graph' or 'metanode'.
+    USE_VCYCLE = True
+    COARSENER = 'graph'
+    # Wall-clock seconds of tabu search on the final routes (0 to skip).
+    TABU_TIME_LIMIT = 10.0
+
+    USE_QISKIT = False
 
     problem_params = load_and_prepare_data(FILE_PATH, VEHICLE_CAPACITY)
-    qiskit_backend = AerSimulator()
+    qiskit_backend = AerSimulator() if USE_QISKIT else LDDAQCSimulator()
 
     print(f"Starting Multi-Level Quantum Solver with Graph Coarsening")
 
-    final_routes, total_cost = solve_with_multilevel_quantum(
-        params=problem_params, p=p_layers, T=T_evolution_time,
-        lam1=LAMBDA_1, quadratic_weight=quadratic_weight,
-        backend=qiskit_backend, subproblem_size_limit=SUBPROBLEM_QUBIT_LIMIT,
-        cluster_radius=CLUSTER_RADIUS
-    )
+    if USE_VCYCLE:
+        final_routes, total_cost, _ = solve_with_multilevel_vcycle(
+            params=problem_params, p=p_layers, T=T_evolution_time,
+            lam1=LAMBDA_1, quadratic_weight=quadratic_weight,
+            backend=qiskit_backend, subproblem_size_limit=SUBPROBLEM_QUBIT_LIMIT,
+            cluster_radius=CLUSTER_RADIUS, coarsener=COARSENER
+        )
+    else:
+        final_routes, total_cost = solve_with_multilevel_quantum(
+            params=problem_params, p=p_layers, T=T_evolution_time,
+            lam1=LAMBDA_1, quadratic_weight=quadratic_weight,
+            backend=qiskit_backend, subproblem_size_limit=SUBPROBLEM_QUBIT_LIMIT,
+            cluster_radius=CLUSTER_RADIUS
+        )
+    if TABU_TIME_LIMIT and final_routes:
+        print(f"\n Refining with tabu search for {TABU_TIME_LIMIT:.0f}s (cost before: {total_cost:.2f}).")
+        final_routes, total_cost = refine_with_tabu(final_routes, problem_params, time_limit=TABU_TIME_LIMIT)
 
     print("\n\n FINAL SOLUTION (Multi-Level Quantum Solver)")
     print(f"Number of Vehicles: {len(final_routes)}")
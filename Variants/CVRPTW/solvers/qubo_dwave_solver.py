@@ -1 +1,198 @@
+import importlib
+import math
 
+import numpy as np
+
+from qubo_helper import SparseQubo
+from time_window_encoding import build_time_slots, slot_transition_ok
+
+# The module file name contains a hyphen, so it cannot be imported directly.
+dwave_solvers = importlib.import_module('D-Wave_solvers')
+
+
+class CVRPTWQuboSolver:
+    """
+    Time-window-aware QUBO for the CVRPTW.
+
+    Variables are (m, i, k, t): vehicle m serves customer i as its k-th stop
+    starting in time slot t (see time_window_encoding.py). On top of the
+    routing cost and the one-visit / one-stop-per-step constraints of the
+    VRP formulation, consecutive stops whose slots are not reachable in time
+    are penalised with A3, and the capacity of every vehicle with A4 through
+    a log-encoded slack.
+    """
+
+    def __init__(self, problem, time_step=10.0):
+        self.problem = problem
+        self.time_step = time_step
+        self.pruning = None
+
+    def get_vehicle_k_limits(self, limit_radius=1):
+        k_max = math.ceil(len(self.problem.customers) / self.problem.num_vehicles) + limit_radius
+        return [min(k_max, len(self.problem.customers))] * self.problem.num_vehicles
+
+    def build_qubo(self, vehicle_k_limits, A1, A2, A3, A4=None):
+        problem = self.problem
+        depot = problem.source_depot
+        dist = problem.distance_matrix
+        (vehicle, customer, step, slot), dropped = build_time_slots(problem, problem.customers, vehicle_k_limits, self.time_step)
+        self.pruning = {'num_variables': len(vehicle), 'pruned_variables': dropped}
+
+        labels = list(zip(vehicle.tolist(), customer.tolist(), step.tolist(), slot.tolist()))
+        qubo = SparseQubo(labels)
+        index = np.arange(len(labels))
+
+        # --- OBJECTIVE FUNCTION ---
+        # C(i, depot) on every stop, C(depot, i) on the first one.
+        linear = dist[customer, depot] + np.where(step == 1, dist[depot, customer], 0.0)
+        qubo.add_linear(index, A1 * linear)
+
+        # --- CONSTRAINTS ---
+        # Every customer is served exactly once.
+        for node in problem.customers:
+            qubo.add_only_one_constraint(index[customer == node], A2)
+
+        for m, k_limit in enumerate(vehicle_k_limits):
+            groups = [index[(vehicle == m) & (step == k)] for k in range(1, k_limit + 1)]
+            for k, group in enumerate(groups):
+                # A vehicle is in at most one place (and slot) per step.
+                qubo.add_at_most_one_constraint(group, A2)
+                if k + 1 < len(groups):
+                    self._add_transitions(qubo, group, groups[k + 1], customer, slot, A1, A3)
+            if A4 is not None:
+                members = index[vehicle == m]
+                qubo.add_linear_inequality(members, problem.demands[customer[members]], problem.capacity, A4, ('capacity_slack', m))
+        return qubo
+
+    def _add_transitions(self, qubo, first, second, customer, slot, A1, A3):
+        """ Couplings between a stop and the next one of the same vehicle. """
+        problem = self.problem
+        dist = problem.distance_matrix
+        i, j = customer[first][:, None], customer[second][None, :]
+        t_i, t_j = slot[first][:, None], slot[second][None, :]
+        # C(i, j) replaces the C(i, depot) charged to i as a possible last stop.
+        cost = dist[i, j] - dist[i, problem.source_depot]
+        late = ~slot_transition_ok(problem, i, t_i, j, t_j, self.time_step)
+        values = np.where(i != j, A1 * cost + A3 * late, 0.0)
+        rows, cols = np.broadcast_to(first[:, None], values.shape), np.broadcast_to(second[None, :], values.shape)
+        mask = values != 0
+        qubo.add_terms(rows[mask], cols[mask], values[mask])
+
+    def decode(self, sample):
+        """ Routes [0, ..., 0] per vehicle from a {(m, i, k, t): bit} sample. """
+        chosen = np.array([label for label, value in sample.items() if value == 1 and len(label) == 4],
+                          dtype=np.int64).reshape(-1, 4)
+        m, i, k, t = chosen.T
+        order = np.lexsort((t, k, m))
+        depot = self.problem.source_depot
+        return [[depot] + i[order][m[order] == vehicle].tolist() + [depot] for vehicle in np.unique(m)]
+
+    def evaluate(self, routes):
+        """ (total distance, feasible) of decoded routes. """
+        visited = [c for route in routes for c in route[1:-1]]
+        feasible = sorted(visited) == sorted(self.problem.customers)
+        total = 0.0
+        for route in routes:
+            cost, ok = self.problem.route_cost(route)
+            total += cost
+            feasible = feasible and ok
+        return total, feasible
+
+    def solve(self, A1, A2, A3, A4=None, solver_type='simulated', num_reads=100, limit_radius=1):
+        """
+        Samples the QUBO and returns (routes, cost, feasible) of the cheapest
+        feasible read, or of the lowest-energy read if none is feasible.
+        """
+        vehicle_k_limits = self.get_vehicle_k_limits(limit_radius)
+        qubo = self.build_qubo(vehicle_k_limits, A1, A2, A3, A4)
+        try:
+            sampleset = dwave_solvers.sample_qubo(qubo, solver_type=solver_type, num_reads=num_reads)
+        except Exception as e:
+            print(f"Solver error: {e}")
+            return [], 0.0, False
+
+        evaluation = self.evaluate_sampleset(sampleset)
+        if not len(evaluation['cost']):
+            return [], 0.0, False
+        if evaluation['feasible'].any():
+            cost = np.where(evaluation['feasible'], evaluation['cost'], np.inf)
+            best = int(np.lexsort((evaluation['energy'], cost))[0])
+        else:
+            best = int(np.argmin(evaluation['energy']))
+        return evaluation['routes'](best), float(evaluation['cost'][best]), bool(evaluation['feasible'][best])
+
+    def evaluate_sampleset(self, sampleset):
+        """
+        Scores every read of a SampleSet over (m, i, k, t) variables at once
+        (as `evaluate_sampleset` in vrp_solution.py); slack bits are ignored.
+
+        Returns a dict of per-read arrays: 'energy', 'cost' (route distance),
+        'feasible' (every customer once, capacity and time windows met, as
+        `evaluate`), plus 'routes', which decodes one read like `decode`.
+        """
+        problem = self.problem
+        depot = problem.source_depot
+        dist = problem.distance_matrix
+        variables = list(sampleset.variables)
+        samples = np.asarray(sampleset.record.sample, dtype=np.int8).reshape(len(sampleset.record), len(variables))
+        routing = [c for c, v in enumerate(variables)
+                   if isinstance(v, tuple) and len(v) == 4 and all(isinstance(x, (int, np.integer)) for x in v)]
+        labels = np.array([variables[c] for c in routing], dtype=np.int64).reshape(-1, 4)
+        # Visit order within a route: by vehicle, then step, then slot.
+        order = np.lexsort((labels[:, 3], labels[:, 2], labels[:, 0]))
+        m, node = labels[order, 0], labels[order, 1]
+        samples = samples[:, np.asarray(routing, dtype=np.int64)[order]]
+        energy = np.asarray(sampleset.record.energy, dtype=np.float64)
+
+        customers = np.asarray(problem.customers, dtype=np.int64)
+        position = np.full(len(problem.demands), -1, dtype=np.int64)
+        position[customers] = np.arange(len(customers))
+        one_hot = np.zeros((len(node), len(customers)))
+        one_hot[position[node] >= 0, position[node][position[node] >= 0]] = 1.0
+        visits = samples @ one_hot
+        visits_ok = (visits == 1).all(axis=1) & ~samples[:, position[node] < 0].any(axis=1)
+
+        vehicle_demands = np.zeros((len(node), problem.num_vehicles))
+        vehicle_demands[np.arange(len(node)), m] = problem.demands[node]
+        capacity_ok = (samples @ vehicle_demands <= problem.capacity).all(axis=1)
+
+        # One entry per chosen variable, grouped by (read, vehicle) route.
+        read, column = np.nonzero(samples)
+        stop, vehicle = node[column], m[column]
+        first = np.ones(len(read), dtype=bool)
+        first[1:] = (read[1:] != read[:-1]) | (vehicle[1:] != vehicle[:-1])
+        route = np.cumsum(first) - 1
+        route_read = read[first]
+        rank = np.arange(len(read)) - np.flatnonzero(first)[route]
+
+        leg = np.where(first, dist[depot, stop], 0.0)
+        leg[1:] += np.where(~first[1:], dist[stop[:-1], stop[1:]], 0.0)
+        last = np.append(first[1:], True)
+        leg += np.where(last, dist[stop, depot], 0.0)
+        cost = np.bincount(read, weights=leg, minlength=len(samples))
+
+        # Service start times, one stop position of every route at a time.
+        stops = np.full((len(route_read), rank.max(initial=-1) + 1), -1, dtype=np.int64)
+        stops[route, rank] = stop
+        time = np.zeros(len(route_read))
+        previous = np.full(len(route_read), depot)
+        late = np.zeros(len(route_read), dtype=bool)
+        for nxt in list(stops.T) + [np.full(len(route_read), depot)]:
+            active = nxt >= 0
+            target = np.where(active, nxt, depot)
+            arrival = time + problem.service_times[previous] + dist[previous, target]
+            late |= active & (arrival > problem.due_dates[target])
+            time = np.where(active, np.maximum(arrival, problem.ready_times[target]), time)
+            previous = np.where(active, target, previous)
+        time_ok = np.bincount(route_read, weights=late, minlength=len(samples)) == 0
+
+        def routes(r):
+            chosen = np.flatnonzero(samples[r])
+            return [[depot] + node[chosen[m[chosen] == v]].tolist() + [depot] for v in np.unique(m[chosen])]
+
+        return {
+            'energy': energy,
+            'cost': cost,
+            'feasible': visits_ok & capacity_ok & time_ok,
+            'routes': routes,
+        }
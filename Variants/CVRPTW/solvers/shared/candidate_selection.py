@@ -0,0 +1,141 @@
+"""
+Batched decoding and pre-filtering of measured bitstrings.
+
+The top count strings of one decision step are turned into a single bit
+matrix. Capacity is checked with one matrix-vector product, duplicate
+selections are dropped, and every survivor gets a cheap tour lower bound.
+Candidates are then routed in lower-bound order and skipped as soon as their
+bound exceeds the best route found so far.
+"""
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+_worker_params = None
+
+
+def _init_route_worker(params):
+    global _worker_params
+    _worker_params = params
+
+
+def _route_in_worker(work):
+    customers, solve_route = work
+    return solve_route(customers, _worker_params)
+
+
+class RoutePool(ProcessPoolExecutor):
+    """
+    Process pool bound to one params dict for select_best_route.
+
+    Every worker receives `params` once at start-up and keeps its own
+    insertion cache, so a work item only carries the candidate customers
+    and the routing function, which must be defined at module level.
+    """
+
+    def __init__(self, params, max_workers=None):
+        super().__init__(max_workers=max_workers, initializer=_init_route_worker, initargs=(params,))
+        self.params = params
+
+
+def counts_to_bit_matrix(counts, top=100):
+    """
+    Returns (bits, ranked_counts) for the `top` most frequent bitstrings.
+
+    bits[r, i] is the value of qubit i in the r-th string; Qiskit strings
+    are big endian, so the columns are reversed. Ties in the counts keep the
+    dict order, as `sorted(counts, key=counts.get, reverse=True)` does.
+    """
+    strings = list(counts)
+    hits = np.array([counts[s] for s in strings], dtype=np.int64)
+    order = np.argsort(-hits, kind='stable')[:top]
+    n_qubits = len(strings[0]) if strings else 0
+    raw = np.frombuffer(''.join(strings[r] for r in order).encode('ascii'), dtype=np.uint8)
+    bits = (raw.reshape(len(order), n_qubits) == ord('1'))[:, ::-1]
+    return np.ascontiguousarray(bits), hits[order]
+
+
+def filter_candidates(bits, demands, vehicle_capacity):
+    """
+    Keeps non-empty, capacity-feasible, distinct rows of `bits`.
+
+    `demands` holds the demand of each qubit's customer. Returns the kept
+    rows and their positions in `bits` (first occurrence of each row).
+    """
+    loads = bits.astype(np.float64) @ np.asarray(demands, dtype=np.float64)
+    keep = bits.any(axis=1) & (loads <= vehicle_capacity)
+    rows = np.flatnonzero(keep)
+    _, first = np.unique(bits[rows], axis=0, return_index=True)
+    rows = rows[np.sort(first)]
+    return bits[rows], rows
+
+
+def tour_lower_bounds(bits, customer_ids, distance_matrix):
+    """
+    Lower bound on the closed depot tour through each selected customer set.
+
+    Every node on the tour leaves exactly once, so the cost is at least the
+    cheapest depot-to-customer leg plus, for each customer, its cheapest leg
+    to another selected customer or back to the depot.
+    """
+    ids = np.asarray(customer_ids, dtype=np.int64)
+    dist = np.asarray(distance_matrix, dtype=np.float64)
+    between = dist[np.ix_(ids, ids)].copy()
+    np.fill_diagonal(between, np.inf)
+    to_depot, from_depot = dist[ids, 0], dist[0, ids]
+
+    # (candidates, from, to) distances restricted to selected customers.
+    masked = np.where(bits[:, None, :], between[None, :, :], np.inf)
+    nearest = np.minimum(masked.min(axis=2), to_depot[None, :])
+    leave = np.where(bits, nearest, 0.0).sum(axis=1)
+    depot = np.where(bits, from_depot[None, :], np.inf).min(axis=1)
+    return depot + leave
+
+
+def select_best_route(counts, qubit_map, params, solve_route, top=100, executor=None, batch_size=1):
+    """
+    Cheapest feasible route among the `top` most frequent bitstrings.
+
+    Same result as routing every string in count order and keeping the first
+    cheapest one. `solve_route(customers, params)` returns (cost, route) or
+    (None, None). With an `executor` survivors are routed in parallel
+    batches of `batch_size`, pruned between batches. Threads share `params`
+    and the memoised insertion engine but hold the GIL while routing; a
+    RoutePool built for `params` routes on separate cores. Returns
+    (route, cost), or (None, inf) if nothing is feasible.
+    """
+    if isinstance(executor, ProcessPoolExecutor) and not (isinstance(executor, RoutePool) and executor.params is params):
+        raise ValueError("select_best_route needs a thread pool or a RoutePool created for these params.")
+    if batch_size < 1:
+        raise ValueError(f"batch_size must be at least 1, got {batch_size}")
+    best_key, best_route = (float('inf'), 0), None
+    if not counts:
+        return best_route, best_key[0]
+
+    ids = np.array([qubit_map[i] for i in range(len(qubit_map))], dtype=np.int64)
+    bits, _ = counts_to_bit_matrix(counts, top)
+    bits, ranks = filter_candidates(bits, np.asarray(params['demands'])[ids], params['vehicle_capacity'])
+    if not len(ranks):
+        return best_route, best_key[0]
+
+    bounds = tour_lower_bounds(bits, ids, params['distance_matrix'])
+    order = np.lexsort((ranks, bounds))
+    # Small slack so float rounding in the bound never prunes the optimum.
+    tolerance = 1e-9 * max(1.0, float(np.abs(bounds[np.isfinite(bounds)]).max(initial=1.0)))
+    selections = [ids[row].tolist() for row in bits]
+
+    for start in range(0, len(order), batch_size):
+        batch = [k for k in order[start:start + batch_size] if bounds[k] <= best_key[0] + tolerance]
+        if not batch:
+            break
+        customers = [selections[k] for k in batch]
+        if executor is None:
+            results = [solve_route(c, params) for c in customers]
+        elif isinstance(executor, RoutePool):
+            results = executor.map(_route_in_worker, [(c, solve_route) for c in customers])
+        else:
+            results = executor.map(lambda c: solve_route(c, params), customers)
+        for k, (cost, route) in zip(batch, results):
+            if route and (cost, ranks[k]) < best_key:
+                best_key, best_route = (cost, ranks[k]), route
+    return best_route, best_key[0]
@@ -0,0 +1,108 @@
+"""
+NumPy simulation backend for the LD-DAQC circuits.
+
+Every LD-DAQC layer is an RZ/RZZ cost block followed by an RX/RXX ring
+mixer. The cost block is diagonal in the computational basis and all mixer
+terms are X-type, so the mixer is diagonal in the Hadamard basis. A layer is
+therefore two element-wise phase multiplications around Walsh-Hadamard
+transforms, each done with batched reshapes of the state vector. The result
+is sampled directly into a Qiskit-style counts dict, so no circuit has to be
+built, transpiled or run.
+"""
+import numpy as np
+
+
+def ising_energies(linear_coeffs, quadratic_coeffs):
+    """
+    E(z) = sum_j h_j z_j + sum_{i<j} J_ij z_i z_j for every basis state.
+
+    z_j = +1 for bit 0 and -1 for bit 1, and the state index is little
+    endian (qubit 0 is the least significant bit, as in Qiskit). The vector
+    is built qubit by qubit by doubling, so it costs O(2^n) memory and time
+    instead of O(n 2^n).
+    """
+    n_qubits = len(linear_coeffs)
+    energies = np.zeros(1)
+    for j in range(n_qubits):
+        # Local field on qubit j from the qubits already placed.
+        field = np.zeros(1)
+        for i in range(j):
+            field = np.concatenate((field + quadratic_coeffs[i, j], field - quadratic_coeffs[i, j]))
+        local = linear_coeffs[j] + field
+        energies = np.concatenate((energies + local, energies - local))
+    return energies
+
+
+def hadamard_transform(state, n_qubits, group_size=5):
+    """
+    Applies H on every qubit (normalised Walsh-Hadamard transform).
+
+    Qubits are processed `group_size` at a time: the state is reshaped to
+    (rest, 2^g, 2^j) and multiplied by the 2^g x 2^g Hadamard matrix, which
+    needs far fewer passes over a large state than one qubit at a time.
+    Real and imaginary parts are transformed together through a float view.
+    """
+    values = np.ascontiguousarray(state, dtype=np.complex128).view(np.float64)
+    j = 0
+    while j < n_qubits:
+        g = min(group_size, n_qubits - j)
+        values = np.matmul(_hadamard_matrix(g), values.reshape(-1, 2 ** g, 2 ** (j + 1))).reshape(-1)
+        j += g
+    return values.view(np.complex128) * 2 ** (-n_qubits / 2)
+
+
+def _hadamard_matrix(n_qubits):
+    """ Unnormalised 2^n x 2^n Sylvester Hadamard matrix. """
+    matrix = np.ones((1, 1))
+    for _ in range(n_qubits):
+        matrix = np.block([[matrix, matrix], [matrix, -matrix]])
+    return matrix
+
+
+class LDDAQCSimulator:
+    """
+    Drop-in backend for the LD-DAQC layer structure.
+
+    One layer with angles (gamma_k, beta_k) applies, like
+    `build_ld_daqc_layer`, RZ(2 beta h_j) and RZZ(2 beta J_ij) followed by
+    RX(2 gamma) on every qubit and RXX(2 gamma) on the ring (j, j+1 mod n).
+    The initial state is |0...0>.
+    """
+
+    def __init__(self, seed=None):
+        self.rng = np.random.default_rng(seed)
+        self._mixer_energies = {}
+
+    def mixer_energies(self, n_qubits):
+        """ Eigenvalues of sum_j X_j + sum_j X_j X_{j+1} in the Hadamard basis. """
+        if n_qubits not in self._mixer_energies:
+            ring = np.zeros((n_qubits, n_qubits))
+            if n_qubits > 1:
+                for j in range(n_qubits):
+                    a, b = sorted((j, (j + 1) % n_qubits))
+                    ring[a, b] += 1
+            self._mixer_energies[n_qubits] = ising_energies(np.ones(n_qubits), ring)
+        return self._mixer_energies[n_qubits]
+
+    def statevector(self, angles, linear_coeffs, quadratic_coeffs):
+        """ Final state for the layer angles [(gamma_k, beta_k), ...]. """
+        n_qubits = len(linear_coeffs)
+        cost = ising_energies(np.asarray(linear_coeffs, dtype=np.float64), np.asarray(quadratic_coeffs, dtype=np.float64))
+        mixer = self.mixer_energies(n_qubits)
+        state = np.zeros(2 ** n_qubits, dtype=np.complex128)
+        state[0] = 1.0
+        for gamma_k, beta_k in angles:
+            state *= np.exp(-1j * beta_k * cost)
+            state = hadamard_transform(state, n_qubits)
+            state *= np.exp(-1j * gamma_k * mixer)
+            state = hadamard_transform(state, n_qubits)
+        return state
+
+    def sample_counts(self, angles, linear_coeffs, quadratic_coeffs, shots=2048):
+        """ Measures the final state `shots` times; returns {bitstring: count}. """
+        n_qubits = len(linear_coeffs)
+        probabilities = np.abs(self.statevector(angles, linear_coeffs, quadratic_coeffs)) ** 2
+        probabilities /= probabilities.sum()
+        hits = self.rng.multinomial(shots, probabilities)
+        outcomes = np.flatnonzero(hits)
+        return {format(int(idx), f'0{n_qubits}b'): int(hits[idx]) for idx in outcomes}
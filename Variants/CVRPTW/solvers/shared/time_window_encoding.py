@@ -1 +1,99 @@
+"""
+Time-slot encoding of service start times for the CVRPTW QUBO.
 
+A variable (m, i, k, t) means vehicle m serves customer i as its k-th stop,
+starting service in [t * time_step, (t + 1) * time_step). Start times are
+bounded-unary: each visit picks one slot. Before any variable is created the
+slots are pruned with the Solomon ready and due times:
+
+* a stop k can start no earlier than the earliest start of any k-step path
+  from the depot (dynamic programming over k, waiting included),
+* service must start by the due date, and the vehicle must still be able to
+  get back to the depot before the depot closes.
+
+Every feasible schedule maps to slots whose consecutive stops satisfy
+`slot_transition_ok`, so no feasible route is lost. The check is optimistic
+by less than one slot per stop, so decoded routes are re-checked exactly;
+a smaller time_step tightens it.
+"""
+import math
+
+import numpy as np
+
+
+def earliest_start_times(problem, customers, k_max):
+    """
+    (k_max, len(customers)) earliest service start of each customer as the
+    (k+1)-th stop; inf where no k+1-stop path reaches it in time.
+    """
+    dist = problem.distance_matrix
+    depot = problem.source_depot
+    nodes = np.asarray(customers, dtype=np.int64)
+    ready, due, service = problem.ready_times[nodes], problem.due_dates[nodes], problem.service_times[nodes]
+    between = dist[np.ix_(nodes, nodes)] + np.where(np.eye(len(nodes), dtype=bool), np.inf, 0.0)
+
+    earliest = np.full((k_max, len(nodes)), np.inf)
+    start = np.maximum(problem.ready_times[depot] + problem.service_times[depot] + dist[depot, nodes], ready)
+    for k in range(k_max):
+        if k:
+            # Leave the previous stop j after its service: min over j of EA(j) + s_j + d(j, i).
+            start = np.maximum((earliest[k - 1] + service)[:, None] + between, ready[None, :]).min(axis=0)
+        start = np.where(start <= due, start, np.inf)
+        earliest[k] = start
+    return earliest
+
+
+def latest_start_times(problem, customers):
+    """ Latest service start that still meets the due date and the depot closing time. """
+    depot = problem.source_depot
+    nodes = np.asarray(customers, dtype=np.int64)
+    back = problem.due_dates[depot] - problem.service_times[nodes] - problem.distance_matrix[nodes, depot]
+    return np.minimum(problem.due_dates[nodes], back)
+
+
+def build_time_slots(problem, customers, vehicle_k_limits, time_step):
+    """
+    Returns the pruned variables as aligned int arrays (vehicle, customer,
+    step, slot) plus `dropped`, the number of (m, i, k, t) combinations of
+    the unpruned grid that were never created. The unpruned grid holds the
+    slots [0, horizon // time_step], with `horizon` the latest time any
+    customer can start service and still get back to the depot in time.
+    """
+    k_max = max(vehicle_k_limits) if len(vehicle_k_limits) else 0
+    earliest = earliest_start_times(problem, customers, k_max)
+    latest = latest_start_times(problem, customers)
+    horizon = float(latest.max(initial=-np.inf))
+    num_slots = int(math.floor(horizon / time_step)) + 1 if horizon >= 0 else 0
+
+    per_step = []
+    for k in range(k_max):
+        for c, customer in enumerate(customers):
+            if not np.isfinite(earliest[k, c]):
+                continue
+            first, last = math.floor(earliest[k, c] / time_step), math.floor(latest[c] / time_step)
+            if first <= last:
+                per_step.append((k + 1, customer, np.arange(first, last + 1)))
+
+    vehicle, customer, step, slot = [], [], [], []
+    for m, k_limit in enumerate(vehicle_k_limits):
+        for k, node, slots in per_step:
+            if k <= k_limit:
+                vehicle.append(np.full(len(slots), m))
+                customer.append(np.full(len(slots), node))
+                step.append(np.full(len(slots), k))
+                slot.append(slots)
+    arrays = [np.concatenate(part).astype(np.int64) if part else np.zeros(0, dtype=np.int64)
+              for part in (vehicle, customer, step, slot)]
+    full_grid = sum(vehicle_k_limits) * len(customers) * num_slots
+    return arrays, full_grid - len(arrays[0])
+
+
+def first_reachable_slot(problem, node_from, slot_from, node_to, time_step):
+    """ Earliest slot node_to can start in after node_from started in slot_from. """
+    ready_at = slot_from * time_step + problem.service_times[node_from] + problem.distance_matrix[node_from, node_to]
+    return np.floor(ready_at / time_step + 1e-9)
+
+
+def slot_transition_ok(problem, node_from, slot_from, node_to, slot_to, time_step):
+    """ Whether node_to in slot_to can follow node_from in slot_from. """
+    return slot_to >= first_reachable_slot(problem, node_from, slot_from, node_to, time_step)
@@ -0,0 +1,126 @@
+"""
+Cheapest-insertion TSPTW heuristic with O(1) time-window checks.
+
+For the current route the engine keeps, per position, the forward service
+start time and the backward latest feasible arrival time. Inserting customer
+c between positions i and i+1 is then feasible iff c is reached before its
+due date and the shifted arrival at position i+1 does not exceed that
+position's latest arrival, so no candidate route is ever built or
+re-simulated. All (customer, position) candidates of one insertion step are
+scored at once with NumPy. Results are memoised per customer sequence.
+"""
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+import numpy as np
+
+# Engines of the most recently used params dicts (see get_insertion_engine).
+ENGINE_CACHE_SIZE = 8
+_ENGINES = OrderedDict()
+_ENGINES_LOCK = threading.Lock()
+
+
+class TSPTWInsertionEngine:
+    """
+    Same insertion rule as the original `solve_tsptw_with_insertion`: each
+    step inserts the cheapest feasible (customer, position) pair, the first
+    one in (customer, position) order on ties. Customers are taken in the
+    caller's order, and the cache is keyed on that order, so cached results
+    match uncached ones exactly.
+    """
+
+    def __init__(self, params, cache_size=4096):
+        self.distance_matrix = np.asarray(params['distance_matrix'], dtype=np.float64)
+        self.ready_times = np.asarray(params['ready_times'], dtype=np.float64)
+        self.due_dates = np.asarray(params['due_dates'], dtype=np.float64)
+        self.service_times = np.asarray(params['service_times'], dtype=np.float64)
+        self._solve_cached = lru_cache(maxsize=cache_size)(self._solve)
+
+    def __getstate__(self):
+        # The lru_cache wrapper cannot be pickled; worker processes start empty.
+        state = self.__dict__.copy()
+        state['cache_size'] = self._solve_cached.cache_parameters()['maxsize']
+        del state['_solve_cached']
+        return state
+
+    def __setstate__(self, state):
+        cache_size = state.pop('cache_size')
+        self.__dict__.update(state)
+        self._solve_cached = lru_cache(maxsize=cache_size)(self._solve)
+
+    def solve(self, customers):
+        """ Returns (cost, route) for the customers, or (None, None). """
+        cost, route = self._solve_cached(tuple(int(c) for c in customers))
+        return cost, (list(route) if route is not None else None)
+
+    def cache_info(self):
+        return self._solve_cached.cache_info()
+
+    def schedule(self, route):
+        """
+        Forward service start times and backward latest arrival times of a
+        feasible route. latest[k] = -inf marks a position that cannot be
+        reached in time whatever the arrival.
+        """
+        dist, ready, due, service = self.distance_matrix, self.ready_times, self.due_dates, self.service_times
+        n = len(route)
+        start = [0.0] * n
+        for k in range(1, n):
+            u, v = route[k - 1], route[k]
+            start[k] = max(start[k - 1] + service[u] + dist[u, v], ready[v])
+        latest = [0.0] * n
+        latest[-1] = due[route[-1]]
+        for k in range(n - 2, -1, -1):
+            u, v = route[k], route[k + 1]
+            slack = latest[k + 1] - service[u] - dist[u, v]
+            latest[k] = min(due[u], slack) if ready[u] <= slack else -np.inf
+        return np.array(start), np.array(latest)
+
+    def _solve(self, customers):
+        dist, ready, due, service = self.distance_matrix, self.ready_times, self.due_dates, self.service_times
+        route, unrouted = [0, 0], np.array(customers, dtype=np.int64)
+        while len(unrouted):
+            start, latest = self.schedule(route)
+            r = np.array(route)
+            u, v = r[:-1], r[1:]
+
+            # Rows are candidate customers, columns insertion positions.
+            cost_change = dist[u][:, unrouted].T + dist[unrouted][:, v] - dist[u, v]
+            arrival = start[:-1] + service[u] + dist[u][:, unrouted].T
+            begin = np.maximum(arrival, ready[unrouted, None])
+            shifted = begin + service[unrouted, None] + dist[unrouted][:, v]
+            feasible = (arrival <= due[unrouted, None]) & (shifted <= latest[1:])
+
+            cost_change = np.where(feasible, cost_change, np.inf)
+            best = int(np.argmin(cost_change))
+            c_idx, position = divmod(best, cost_change.shape[1])
+            if not np.isfinite(cost_change[c_idx, position]):
+                return None, None
+            route.insert(position + 1, int(unrouted[c_idx]))
+            unrouted = np.delete(unrouted, c_idx)
+
+        cost = 0.0
+        for i in range(len(route) - 1):
+            cost += dist[route[i], route[i + 1]]
+        return cost, tuple(route)
+
+
+def get_insertion_engine(params):
+    """
+    Returns the engine (and its cache) for a params dict. Engines are kept
+    per dict object in a small LRU instead of on the dict, so copies of
+    params never carry a stale engine.
+    """
+    key = id(params)
+    with _ENGINES_LOCK:
+        entry = _ENGINES.get(key)
+        # The stored reference keeps params alive, so its id is not reused.
+        if entry is not None and entry[0] is params:
+            _ENGINES.move_to_end(key)
+            return entry[1]
+        engine = TSPTWInsertionEngine(params)
+        _ENGINES[key] = (params, engine)
+        if len(_ENGINES) > ENGINE_CACHE_SIZE:
+            _ENGINES.popitem(last=False)
+        return engine
@@ -1 +1,257 @@
+"""
+Tabu search for the CVRPTW on the LD-DAQC `params` dict.
 
+Routes are [0, ..., 0] lists as everywhere else in the CVRPTW solvers.
+Every iteration flattens them into integer position arrays (node, route;
+the depot copies at both ends make the neighbours of a position the
+adjacent ones) with, per position, the cumulative load, the forward
+service start and the backward latest feasible start (the gap between the
+two is the time slack of that position). Joining a route
+prefix ending at u to a suffix starting at v is then feasible iff
+
+    start[u] + service[u] + d(u, v) <= latest[v]
+
+so the inter-route relocate, exchange and 2-opt* moves are all checked
+and priced in O(1), and each move type is evaluated for every candidate
+pair at once with NumPy.
+
+Removed arcs are made tabu for a random tenure in a hashed attribute table
+(a fixed-size array indexed by a hash of (u, v)); a move re-creating a tabu
+arc is only taken if it gives a new best solution (aspiration).
+"""
+import time
+
+import numpy as np
+
+EPSILON = 1e-9
+
+
+class TabuMemory:
+    """ Iteration until which each (u, v) arc is tabu, in a hashed table. """
+
+    def __init__(self, table_bits=16):
+        self.mask = (1 << table_bits) - 1
+        self.table = np.zeros(1 << table_bits, dtype=np.int64)
+
+    def keys(self, u, v):
+        u, v = np.asarray(u, dtype=np.int64), np.asarray(v, dtype=np.int64)
+        return ((u * 73856093) ^ (v * 19349663)) & self.mask
+
+    def is_tabu(self, u, v, iteration):
+        return self.table[self.keys(u, v)] > iteration
+
+    def add(self, arcs, until):
+        for u, v in arcs:
+            self.table[self.keys(u, v)] = until
+
+
+class FlatRoutes:
+    """ Position arrays of a set of [0, ..., 0] routes (see module docstring). """
+
+    def __init__(self, routes, data):
+        self.routes = [list(route) for route in routes]
+        dist, ready, due, service, demand = data
+        lengths = np.array([len(route) for route in self.routes], dtype=np.int64)
+        offsets = np.concatenate(([0], np.cumsum(lengths)))
+        self.first, self.last = offsets[:-1], offsets[1:] - 1
+        self.node = np.concatenate([np.asarray(route, dtype=np.int64) for route in self.routes])
+        self.route = np.repeat(np.arange(len(self.routes)), lengths)
+
+        n = len(self.node)
+        self.start = np.zeros(n)
+        self.latest = np.zeros(n)
+        self.load = np.zeros(n)
+        for r, route in enumerate(self.routes):
+            base = int(offsets[r])
+            time, load = 0.0, 0.0
+            for k, v in enumerate(route):
+                if k:
+                    u = route[k - 1]
+                    time = max(time + service[u] + dist[u, v], ready[v])
+                load += demand[v]
+                self.start[base + k], self.load[base + k] = time, load
+            latest = due[route[-1]]
+            self.latest[base + len(route) - 1] = latest
+            for k in range(len(route) - 2, -1, -1):
+                u, v = route[k], route[k + 1]
+                latest = min(due[u], latest - service[u] - dist[u, v])
+                # Cannot be met whatever the arrival: the start is at least the ready time.
+                self.latest[base + k] = latest if ready[u] <= latest else -np.inf
+        self.route_load = self.load[self.last]
+
+        is_end = np.zeros(n, dtype=bool)
+        is_end[self.first] = is_end[self.last] = True
+        # Customer positions, and the positions an arc (k, k + 1) starts at.
+        self.customers = np.flatnonzero(~is_end)
+        self.arcs = np.setdiff1d(np.arange(n), self.last)
+
+    def feasible(self):
+        return bool(np.all(self.start <= self.latest + EPSILON))
+
+
+class TabuSearch:
+    """
+    Inter-route relocate / exchange / 2-opt* tabu search under capacity and
+    time windows. The number of routes never grows; routes emptied by a
+    move stay available and are dropped from the result.
+    """
+
+    def __init__(self, params, tenure=(7, 15), table_bits=16, seed=0):
+        self.dist = np.asarray(params['distance_matrix'], dtype=np.float64)
+        self.ready = np.asarray(params['ready_times'], dtype=np.float64)
+        self.due = np.asarray(params['due_dates'], dtype=np.float64)
+        self.service = np.asarray(params['service_times'], dtype=np.float64)
+        self.demand = np.asarray(params['demands'], dtype=np.float64)
+        self.capacity = params['vehicle_capacity']
+        self.tenure = tenure
+        self.table_bits = table_bits
+        self.rng = np.random.default_rng(seed)
+        self.iterations = 0
+
+    @property
+    def data(self):
+        return self.dist, self.ready, self.due, self.service, self.demand
+
+    def route_cost(self, route):
+        return float(self.dist[route[:-1], route[1:]].sum()) if len(route) > 1 else 0.0
+
+    def total_cost(self, routes):
+        return sum(self.route_cost(np.asarray(route, dtype=np.int64)) for route in routes)
+
+    def _joins(self, left, node, right):
+        """ Feasibility of left -> node -> right, with `node` a customer inserted between two positions. """
+        f = self.flat
+        arrival = f.start[left] + self.service[f.node[left]] + self.dist[f.node[left], node]
+        begin = np.maximum(arrival, self.ready[node])
+        return (arrival <= self.due[node] + EPSILON) & (
+            begin + self.service[node] + self.dist[node, f.node[right]] <= f.latest[right] + EPSILON)
+
+    def _bypass(self, left, right):
+        """ Feasibility of joining position left directly to position right. """
+        f = self.flat
+        return f.start[left] + self.service[f.node[left]] + self.dist[f.node[left], f.node[right]] <= f.latest[right] + EPSILON
+
+    def evaluate_relocate(self):
+        """ Customer at position i moved onto the arc (p, p + 1) of another route. """
+        f, d = self.flat, self.dist
+        i, p = f.customers[:, None], f.arcs[None, :]
+        c, a, b = f.node[i], f.node[i - 1], f.node[i + 1]
+        u, v = f.node[p], f.node[p + 1]
+        delta = d[a, b] - d[a, c] - d[c, b] + d[u, c] + d[c, v] - d[u, v]
+        feasible = ((f.route[i] != f.route[p]) & self._bypass(i - 1, i + 1) & self._joins(p, c, p + 1)
+                    & (f.route_load[f.route[p]] + self.demand[c] <= self.capacity))
+        created = [(u, c), (c, v), (a, b)]
+        removed = lambda k, q: [(f.node[k - 1], f.node[k]), (f.node[k], f.node[k + 1]), (f.node[q], f.node[q + 1])]
+        return delta, feasible, created, (i, p), removed
+
+    def evaluate_exchange(self):
+        """ Customers at positions i and j of two routes swap places. """
+        f, d = self.flat, self.dist
+        i, j = f.customers[:, None], f.customers[None, :]
+        c1, a1, b1 = f.node[i], f.node[i - 1], f.node[i + 1]
+        c2, a2, b2 = f.node[j], f.node[j - 1], f.node[j + 1]
+        delta = (d[a1, c2] + d[c2, b1] - d[a1, c1] - d[c1, b1]
+                 + d[a2, c1] + d[c1, b2] - d[a2, c2] - d[c2, b2])
+        shift = self.demand[c2] - self.demand[c1]
+        feasible = ((f.route[i] < f.route[j]) & self._joins(i - 1, c2, i + 1) & self._joins(j - 1, c1, j + 1)
+                    & (f.route_load[f.route[i]] + shift <= self.capacity)
+                    & (f.route_load[f.route[j]] - shift <= self.capacity))
+        created = [(a1, c2), (c2, b1), (a2, c1), (c1, b2)]
+        removed = lambda k, q: [(f.node[k - 1], f.node[k]), (f.node[k], f.node[k + 1]),
+                                (f.node[q - 1], f.node[q]), (f.node[q], f.node[q + 1])]
+        return delta, feasible, created, (i, j), removed
+
+    def evaluate_two_opt_star(self):
+        """ Tails after positions i and j of two routes are exchanged. """
+        f, d = self.flat, self.dist
+        i, j = f.arcs[:, None], f.arcs[None, :]
+        u, v, x, y = f.node[i], f.node[i + 1], f.node[j], f.node[j + 1]
+        delta = d[u, y] + d[x, v] - d[u, v] - d[x, y]
+        r1, r2 = f.route[i], f.route[j]
+        load1 = f.load[i] + f.route_load[r2] - f.load[j]
+        load2 = f.load[j] + f.route_load[r1] - f.load[i]
+        # Swapping two whole routes or two empty tails changes nothing.
+        trivial = ((i == f.first[r1]) & (j == f.first[r2])) | ((i + 1 == f.last[r1]) & (j + 1 == f.last[r2]))
+        feasible = ((r1 < r2) & ~trivial & self._bypass(i, j + 1) & self._bypass(j, i + 1)
+                    & (load1 <= self.capacity) & (load2 <= self.capacity))
+        created = [(u, y), (x, v)]
+        removed = lambda k, q: [(f.node[k], f.node[k + 1]), (f.node[q], f.node[q + 1])]
+        return delta, feasible, created, (i, j), removed
+
+    def apply(self, kind, k, q):
+        f = self.flat
+        routes = [list(route) for route in f.routes]
+        r1, p1 = int(f.route[k]), int(k - f.first[f.route[k]])
+        r2, p2 = int(f.route[q]), int(q - f.first[f.route[q]])
+        if kind == 'relocate':
+            customer = routes[r1].pop(p1)
+            routes[r2].insert(p2 + 1, customer)
+        elif kind == 'exchange':
+            routes[r1][p1], routes[r2][p2] = routes[r2][p2], routes[r1][p1]
+        else:
+            head1, tail1 = routes[r1][:p1 + 1], routes[r1][p1 + 1:]
+            head2, tail2 = routes[r2][:p2 + 1], routes[r2][p2 + 1:]
+            routes[r1], routes[r2] = head1 + tail2, head2 + tail1
+        return routes
+
+    def search(self, routes, time_limit=1.0, max_iterations=None, max_no_improve=None):
+        """
+        Improves feasible routes until the wall-clock `time_limit` (seconds)
+        or an iteration limit is hit; returns (best routes, best cost).
+        """
+        deadline = time.perf_counter() + time_limit
+        memory = TabuMemory(self.table_bits)
+        current = [list(route) for route in routes]
+        self.flat = FlatRoutes(current, self.data)
+        if not self.flat.feasible():
+            raise ValueError("Tabu search needs feasible initial routes.")
+        cost = best_cost = self.total_cost(current)
+        best, since_best, self.iterations = current, 0, 0
+
+        while time.perf_counter() < deadline:
+            if max_iterations is not None and self.iterations >= max_iterations:
+                break
+            if max_no_improve is not None and since_best >= max_no_improve:
+                break
+            chosen = None
+            for kind, evaluate in (('relocate', self.evaluate_relocate), ('exchange', self.evaluate_exchange),
+                                   ('two_opt_star', self.evaluate_two_opt_star)):
+                delta, feasible, created, (rows, cols), removed = evaluate()
+                tabu = np.zeros(delta.shape, dtype=bool)
+                for u, v in created:
+                    tabu |= memory.is_tabu(u, v, self.iterations)
+                aspiration = cost + delta < best_cost - EPSILON
+                allowed = feasible & (~tabu | aspiration)
+                if not allowed.any():
+                    continue
+                masked = np.where(allowed, delta, np.inf)
+                flat_index = int(np.argmin(masked))
+                value = float(masked.flat[flat_index])
+                if chosen is None or value < chosen[0]:
+                    r, c = np.unravel_index(flat_index, masked.shape)
+                    k, q = int(np.broadcast_to(rows, masked.shape)[r, c]), int(np.broadcast_to(cols, masked.shape)[r, c])
+                    chosen = (value, kind, k, q, removed)
+            if chosen is None:
+                break
+
+            value, kind, k, q, removed = chosen
+            tenure = int(self.rng.integers(self.tenure[0], self.tenure[1] + 1))
+            memory.add([(int(u), int(v)) for u, v in removed(k, q)], self.iterations + tenure)
+            current = self.apply(kind, k, q)
+            self.flat = FlatRoutes(current, self.data)
+            cost += value
+            self.iterations += 1
+            since_best += 1
+            if cost < best_cost - EPSILON:
+                best, best_cost, since_best = current, cost, 0
+
+        best = [route for route in best if len(route) > 2]
+        return best, self.total_cost(best)
+
+
+def refine_with_tabu(routes, params, time_limit=5.0, **kwargs):
+    """
+    Refines feasible routes, e.g. those of `solve_with_multilevel_quantum`,
+    under a wall-clock budget; returns (routes, cost).
+    """
+    return TabuSearch(params, **kwargs).search(routes, time_limit=time_limit)
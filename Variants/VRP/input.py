@@ -1,53 +1,37 @@
 
 import numpy as np
-import math
+
+from solomon_loader import load_solomon
 
 # ==============================================================================
 # new Solomon parser function for our experiment
 # ==============================================================================
-def read_solomon(path, num_customers):
+def read_solomon(path, num_customers, dtype=np.float64):
     """
     Parses a Solomon VRPTW file to create a problem dictionary.
     
     This function loads core VRP data (coordinates, costs) and also
     CVRP-specific data (demands, capacities) for post-analysis and
-    future solver development. Time windows are ignored.
+    future solver development. Time windows are ignored. `dtype` is the
+    float type of the cost matrix (float32 halves its memory).
     """
-    with open(path, 'r') as f:
-        lines = f.readlines()
-
-    # Get vehicle info from line 5 (index 4)
-    vehicle_line = lines[4].split()
-    num_vehicles = int(vehicle_line[0])
-    capacity = int(vehicle_line[1])
+    # Parsing and the distance matrix come from the shared (cached) loader.
+    instance = load_solomon(path, dtype=dtype)
+    num_vehicles = instance['num_vehicles']
+    capacity = instance['capacity']
 
-    # Get customer data, starting from line 10 (index 9)
-    customer_data = []
-    # We read depot (at index 9) + num_customers
-    for i in range(9, 9 + num_customers + 1):
-        line = lines[i].split()
-        customer_data.append({
-            'id': int(line[0]),
-            'x': int(line[1]),
-            'y': int(line[2]),
-            'demand': int(line[3])
-        })
-    
-    num_nodes = len(customer_data)
+    # We read depot (at index 0) + num_customers
+    num_nodes = num_customers + 1
+    if num_nodes > len(instance['ids']):
+        raise ValueError(f"{path} has only {len(instance['ids']) - 1} customers, {num_customers} requested.")
     dests = list(range(1, num_nodes)) # Node 0 is the depot
     
-    # Create cost matrix (Euclidean distance)
-    costs = np.zeros((num_nodes, num_nodes))
-    for i in range(num_nodes):
-        for j in range(num_nodes):
-            p1 = customer_data[i]
-            p2 = customer_data[j]
-            costs[i][j] = math.sqrt((p1['x'] - p2['x'])**2 + (p1['y'] - p2['y'])**2)
+    # Cost matrix (Euclidean distance): a read-only view of the cached
+    # (memory-mapped) matrix; callers that modify it take their own copy.
+    costs = np.asarray(instance['distance_matrix'][:num_nodes, :num_nodes])
     
     # Extract weights/demands
-    weights = np.zeros(num_nodes)
-    for i in range(num_nodes):
-        weights[i] = customer_data[i]['demand']
+    weights = np.asarray(instance['demands'][:num_nodes], dtype=np.float64)
     
     # --- Assemble the problem dictionary ---
     # NOTE: CVRP data ('weights', 'capacities') is included to enable
@@ -1,6 +1,19 @@
-from dwave.system import DWaveSampler, EmbeddingComposite, LeapHybridSampler
+import dimod
+import numpy as np
+from dwave.system import DWaveSampler, LeapHybridSampler
 from dwave.samplers import SimulatedAnnealingSampler
-from dimod import ExactSolver
+from dwave.samplers.sa.sampler import default_beta_range
+from dimod import BinaryQuadraticModel, ExactSolver
+from embedding_cache import CachedEmbeddingComposite
+
+_solver_cache = {}
+
+# Warm starts: short anneals that begin part-way between the default hot and
+# cold temperatures (geometrically), so seeds are refined rather than erased.
+WARM_NUM_SWEEPS = 100
+WARM_BETA_FRACTION = 0.4
+# QPU reverse anneal: back to s=0.45, pause, then forward to the end.
+REVERSE_ANNEAL_SCHEDULE = [[0.0, 1.0], [5.0, 0.45], [15.0, 0.45], [20.0, 1.0]]
 
 def get_solver(solver_type):
     """
@@ -8,7 +21,8 @@ def get_solver(solver_type):
     Uses latest D-Wave Ocean SDK components.
     """
     if solver_type == 'qpu':
-        return EmbeddingComposite(DWaveSampler())
+        # Embeddings are cached on disk per QUBO graph and QPU topology.
+        return CachedEmbeddingComposite(DWaveSampler())
     elif solver_type == 'hybrid':
         return LeapHybridSampler()
     elif solver_type == 'simulated':
@@ -19,21 +33,151 @@ def get_solver(solver_type):
         raise ValueError(f"Solver type '{solver_type}' is not supported.")
 
 
-def solve_qubo(qubo, solver_type='simulated', limit=1, num_reads=50):
+def to_bqm(qubo):
     """
-    Solve QUBO using specified solver type.
-    Updated for latest Ocean SDK.
+    Converts a `Qubo`, `SparseQubo` or BQM into a BinaryQuadraticModel.
+    Array-backed qubos are converted without going through a dict.
+    """
+    if isinstance(qubo, BinaryQuadraticModel):
+        return qubo
+    if hasattr(qubo, 'to_bqm'):
+        return qubo.to_bqm()
+    return BinaryQuadraticModel.from_qubo(qubo.dict)
+
+
+def get_cached_solver(solver_type):
+    """
+    Same as `get_solver`, but reuses one sampler object per solver type
+    for the lifetime of the process (e.g. inside a sweep worker).
+    """
+    if solver_type not in _solver_cache:
+        _solver_cache[solver_type] = get_solver(solver_type)
+    return _solver_cache[solver_type]
+
+
+def warm_beta_range(bqm, fraction=WARM_BETA_FRACTION):
+    """ Low-temperature part of the default SA beta range of `bqm`. """
+    hot, cold = default_beta_range(bqm)
+    return (hot ** (1 - fraction) * cold ** fraction, cold)
+
+
+def complete_states(states, bqm):
+    """
+    List of {variable: bit} covering every variable of `bqm` (missing ones
+    are 0) from dicts or a SampleSet (its reads, best first).
+    """
+    if isinstance(states, dimod.SampleSet):
+        states = [dict(sample) for sample in states.samples()]
+    elif isinstance(states, dict):
+        states = [states]
+    return [{v: int(state.get(v, 0)) for v in bqm.variables} for state in states]
+
+
+def sample_qubo(qubo, solver_type='simulated', num_reads=50, seed=None, sampler=None, initial_states=None,
+                num_sweeps=None, beta_range=None):
+    """
+    Samples a QUBO and returns the full dimod SampleSet.
+    `seed` is only forwarded to the simulated annealer.
+
+    With `initial_states` (dicts or a SampleSet) the simulated annealer
+    starts from them, tiled over `num_reads`, and the QPU reverse-anneals
+    from each in turn; the hybrid and exact solvers ignore them.
+    `num_sweeps` and `beta_range` are simulated-annealer settings.
     """
-    sampler = get_solver(solver_type)
+    if sampler is None:
+        sampler = get_solver(solver_type)
+    bqm = to_bqm(qubo)
     
     # Handle different solver types appropriately
     if solver_type == 'hybrid':
         # Hybrid solver doesn't use num_reads parameter
-        response = sampler.sample_qubo(qubo.dict)
+        return sampler.sample(bqm)
     elif solver_type == 'exact':
         # Exact solver doesn't use num_reads parameter
-        response = sampler.sample_qubo(qubo.dict)
+        return sampler.sample(bqm)
+    elif solver_type == 'simulated':
+        parameters = {}
+        if initial_states is not None:
+            parameters.update(initial_states=complete_states(initial_states, bqm), initial_states_generator='tile')
+        if num_sweeps is not None:
+            parameters['num_sweeps'] = num_sweeps
+        if beta_range is not None:
+            parameters['beta_range'] = beta_range
+        return sampler.sample(bqm, num_reads=num_reads, seed=seed, **parameters)
+    elif initial_states is not None:
+        # Reverse annealing takes one initial state per call.
+        states = complete_states(initial_states, bqm)
+        reads = np.array_split(np.arange(num_reads), len(states))
+        return dimod.concatenate([
+            sampler.sample(bqm, num_reads=len(chunk), initial_state=state,
+                           anneal_schedule=REVERSE_ANNEAL_SCHEDULE, reinitialize_state=True)
+            for state, chunk in zip(states, reads) if len(chunk)
+        ])
+    else:
+        # QPU uses num_reads
+        return sampler.sample(bqm, num_reads=num_reads)
+
+
+def select_seeds(sampleset, num_seeds, is_feasible=None):
+    """
+    The `num_seeds` best distinct reads as dicts: feasible ones first (per
+    `is_feasible(sampleset)`, a bool array over reads), then by energy.
+    """
+    sampleset = sampleset.aggregate()
+    energy = sampleset.record.energy
+    feasible = np.zeros(len(energy), dtype=bool) if is_feasible is None else np.asarray(is_feasible(sampleset), dtype=bool)
+    order = np.lexsort((energy, ~feasible))[:num_seeds]
+    variables = list(sampleset.variables)
+    return [dict(zip(variables, sampleset.record.sample[r].tolist())) for r in order]
+
+
+def warm_start_sample(qubo, initial_states=None, solver_type='simulated', num_reads=50, rounds=1, num_seeds=5,
+                      is_feasible=None, seed=None, sampler=None, num_sweeps=WARM_NUM_SWEEPS, beta_fraction=WARM_BETA_FRACTION):
+    """
+    Seeded sampling over several rounds; returns all reads as one SampleSet.
+
+    Every round runs short low-temperature anneals (`num_sweeps`, the
+    coldest `beta_fraction` of the default beta range) from the seeds, and
+    the next round is seeded with the best `num_seeds` reads so far (see
+    `select_seeds`). Without `initial_states` the first round is an
+    ordinary cold start. The initial states are kept as reads too, so the
+    result is never worse than its seeds.
+    """
+    if sampler is None:
+        sampler = get_solver(solver_type)
+    bqm = to_bqm(qubo)
+    states = initial_states
+    results = []
+    if states is not None:
+        states = complete_states(states, bqm)
+        results.append(dimod.SampleSet.from_samples_bqm((
+            [[state[v] for v in bqm.variables] for state in states], list(bqm.variables)), bqm))
+    for r in range(rounds):
+        round_seed = None if seed is None else seed + r
+        if states is None:
+            sampleset = sample_qubo(bqm, solver_type, num_reads, seed=round_seed, sampler=sampler)
+        else:
+            sampleset = sample_qubo(bqm, solver_type, num_reads, seed=round_seed, sampler=sampler, initial_states=states,
+                                    num_sweeps=num_sweeps, beta_range=warm_beta_range(bqm, beta_fraction))
+        results.append(sampleset)
+        states = select_seeds(dimod.concatenate(results), num_seeds, is_feasible)
+    return dimod.concatenate(results)
+
+
+def solve_qubo(qubo, solver_type='simulated', limit=1, num_reads=50, seed=None, sampler=None, initial_states=None,
+               rounds=1, num_seeds=5, is_feasible=None):
+    """
+    Solve QUBO using specified solver type.
+    Updated for latest Ocean SDK.
+
+    With `initial_states` or several `rounds` the QUBO is sampled by
+    `warm_start_sample`; with `is_feasible` feasible reads come first.
+    """
+    if initial_states is None and rounds == 1:
+        response = sample_qubo(qubo, solver_type, num_reads, seed=seed, sampler=sampler)
     else:
-        # QPU and simulated annealing use num_reads
-        response = sampler.sample_qubo(qubo.dict, num_reads=num_reads)
-    return [sample for sample in response.lowest()][:limit]
\ No newline at end of file
+        response = warm_start_sample(qubo, initial_states, solver_type, num_reads, rounds, num_seeds,
+                                     is_feasible, seed=seed, sampler=sampler)
+    if is_feasible is None:
+        return [sample for sample in response.lowest()][:limit]
+    return select_seeds(response, limit, is_feasible)
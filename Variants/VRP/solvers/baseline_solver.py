@@ -1 +1,200 @@
+"""
+Classical baseline for the QUBO solvers: Clarke-Wright savings with a sweep
+fallback.
 
+Savings s(i, j) = C(i, depot) + C(depot, j) - C(i, j) of every ordered pair
+are kept in a heap and merged greedily; a union-find over the customers
+tells in O(1) (amortised) whether two customers already share a route.
+Merges are only done tail-to-head, so asymmetric costs are handled too.
+If the savings routes need more vehicles than the problem has (or do not
+fit their capacities / step limits), the customers are swept by polar
+angle around the depot instead, with coordinates recovered from the cost
+matrix by classical multidimensional scaling.
+
+The routes can be turned into an initial state for
+`SimulatedAnnealingSampler` with `routes_to_initial_state`.
+"""
+import heapq
+import time
+
+import numpy as np
+
+from vrp_solution import VRPSolution
+from local_search import improve_routes
+
+
+class UnionFind:
+    def __init__(self, items):
+        self.parent = {item: item for item in items}
+
+    def find(self, item):
+        parent = self.parent
+        while parent[item] != item:
+            # Path halving.
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    def union(self, a, b):
+        """ Merges the sets of a and b; returns the new root. """
+        root_a, root_b = self.find(a), self.find(b)
+        self.parent[root_b] = root_a
+        return root_a
+
+
+def savings_routes(costs, customers, depot, weights, capacity, max_stops=None):
+    """ Clarke-Wright routes (lists of customers) within `capacity` and `max_stops`. """
+    costs = np.asarray(costs, dtype=np.float64)
+    customers = [int(c) for c in customers]
+    nodes = np.array(customers, dtype=np.int64)
+    savings = costs[nodes, depot][:, None] + costs[depot, nodes][None, :] - costs[np.ix_(nodes, nodes)]
+    first, second = np.nonzero(~np.eye(len(nodes), dtype=bool) & (savings > 0))
+    heap = list(zip((-savings[first, second]).tolist(), nodes[first].tolist(), nodes[second].tolist()))
+    heapq.heapify(heap)
+
+    sets = UnionFind(customers)
+    routes = {c: [c] for c in customers}
+    loads = {c: float(weights[c]) for c in customers}
+    while heap:
+        _, i, j = heapq.heappop(heap)
+        root_i, root_j = sets.find(i), sets.find(j)
+        if root_i == root_j:
+            continue
+        route_i, route_j = routes[root_i], routes[root_j]
+        # i must end its route and j must start the other one.
+        if route_i[-1] != i or route_j[0] != j:
+            continue
+        if loads[root_i] + loads[root_j] > capacity:
+            continue
+        if max_stops is not None and len(route_i) + len(route_j) > max_stops:
+            continue
+        root = sets.union(i, j)
+        merged, load = route_i + route_j, loads[root_i] + loads[root_j]
+        for old in (root_i, root_j):
+            del routes[old], loads[old]
+        routes[root], loads[root] = merged, load
+    return list(routes.values())
+
+
+def embed_points(costs, nodes):
+    """ 2-D coordinates whose distances approximate the costs (classical MDS). """
+    costs = np.asarray(costs, dtype=np.float64)[np.ix_(nodes, nodes)]
+    squared = ((costs + costs.T) / 2) ** 2
+    centering = np.eye(len(nodes)) - 1.0 / len(nodes)
+    gram = -0.5 * centering @ squared @ centering
+    values, vectors = np.linalg.eigh(gram)
+    top = np.argsort(values)[::-1][:2]
+    return vectors[:, top] * np.sqrt(np.maximum(values[top], 0.0))
+
+
+def route_cost(route, costs, depot):
+    if not route:
+        return 0.0
+    path = [depot] + list(route) + [depot]
+    return float(sum(costs[u][v] for u, v in zip(path[:-1], path[1:])))
+
+
+def assign_vehicles(routes, weights, capacities, vehicle_k_limits=None):
+    """
+    Gives every route its own vehicle: heaviest route first, to the
+    smallest vehicle that can take it. Returns one route per vehicle
+    (empty lists for unused ones), or None if they do not fit.
+    """
+    num_vehicles = len(capacities)
+    k_limits = vehicle_k_limits if vehicle_k_limits is not None else [None] * num_vehicles
+    assigned = [None] * num_vehicles
+    for route in sorted(routes, key=lambda r: -sum(weights[c] for c in r)):
+        load = sum(weights[c] for c in route)
+        fitting = [m for m in range(num_vehicles) if assigned[m] is None and load <= capacities[m]
+                   and (k_limits[m] is None or len(route) <= k_limits[m])]
+        if not fitting:
+            return None
+        m = min(fitting, key=lambda m: (capacities[m], k_limits[m] or 0))
+        assigned[m] = list(route)
+    return [route if route is not None else [] for route in assigned]
+
+
+def sweep_routes(costs, customers, depot, weights, capacities, vehicle_k_limits=None):
+    """
+    Sweep heuristic: customers by polar angle around the depot, cut into
+    consecutive vehicle loads. Every customer is tried as the starting angle
+    and the cheapest assignment is kept; if none fits, the last vehicle
+    takes whatever is left over.
+    """
+    nodes = [depot] + [int(c) for c in customers]
+    points = embed_points(costs, nodes)
+    relative = points[1:] - points[0]
+    order = [nodes[1:][i] for i in np.argsort(np.arctan2(relative[:, 1], relative[:, 0]), kind='stable')]
+    num_vehicles = len(capacities)
+    k_limits = vehicle_k_limits if vehicle_k_limits is not None else [len(order)] * num_vehicles
+
+    best, fallback = None, None
+    for start in range(max(len(order), 1)):
+        sequence = order[start:] + order[:start]
+        routes, m, load = [[] for _ in range(num_vehicles)], 0, 0.0
+        for customer in sequence:
+            while m < num_vehicles - 1 and (load + weights[customer] > capacities[m] or len(routes[m]) >= k_limits[m]):
+                m, load = m + 1, 0.0
+            routes[m].append(customer)
+            load += weights[customer]
+        cost = sum(route_cost(route, costs, depot) for route in routes)
+        fits = all(sum(weights[c] for c in route) <= capacities[r] and len(route) <= k_limits[r] for r, route in enumerate(routes))
+        if fits and (best is None or cost < best[0]):
+            best = (cost, routes)
+        if fallback is None or cost < fallback[0]:
+            fallback = (cost, routes)
+    return (best or fallback)[1]
+
+
+class SavingsSolver:
+    """
+    Clarke-Wright savings baseline on `VRPProblem` data, with the sweep
+    heuristic as fallback and optional local-search polishing.
+    """
+
+    def __init__(self, problem):
+        self.problem = problem
+        self.method = None
+        self.timings = {}
+
+    def solve(self, vehicle_k_limits=None, improve=False):
+        """
+        Returns a VRPSolution with one route per vehicle. With
+        `vehicle_k_limits` no route has more stops than its vehicle's limit,
+        so the routes can seed the QUBO of the same limits.
+        """
+        problem = self.problem
+        capacities = np.asarray(problem.capacities, dtype=np.float64)
+        max_stops = max(vehicle_k_limits) if vehicle_k_limits is not None else None
+        start = time.perf_counter()
+        routes = savings_routes(problem.costs, problem.dests, problem.source_depot, problem.weights, capacities.max(), max_stops)
+        routes = assign_vehicles(routes, problem.weights, capacities, vehicle_k_limits)
+        self.method = 'savings'
+        if routes is None:
+            routes = sweep_routes(problem.costs, problem.dests, problem.source_depot, problem.weights, capacities, vehicle_k_limits)
+            self.method = 'sweep'
+        self.timings = {'construct': time.perf_counter() - start}
+        if improve:
+            start = time.perf_counter()
+            improved = improve_routes(routes, problem.costs, problem.source_depot, problem.weights, capacities)
+            if vehicle_k_limits is None or all(len(r) <= k for r, k in zip(improved, vehicle_k_limits)):
+                routes = improved
+            self.timings['improve'] = time.perf_counter() - start
+        return VRPSolution(problem, {}, vehicle_k_limits, solution=routes)
+
+
+def routes_to_initial_state(routes, variables):
+    """
+    {variable: bit} over the (m, j, k) `variables` of a QUBO (e.g.
+    `bqm.variables`) with routes[m][k - 1] == j set to 1, and the next-stop
+    indicator of every used step k > 1 (k-nearest QUBO) set to 1. Visits
+    without a matching variable are left out; any other variable is 0.
+    """
+    state = {variable: 0 for variable in variables}
+    for m, route in enumerate(routes):
+        for k, customer in enumerate(route, start=1):
+            if (m, customer, k) in state:
+                state[(m, customer, k)] = 1
+            if (('next_stop', m), k) in state:
+                state[(('next_stop', m), k)] = 1
+    return state
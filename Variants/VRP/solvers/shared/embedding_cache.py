@@ -0,0 +1,145 @@
+"""
+Persistent minor-embedding cache for QPU runs.
+
+An embedding only depends on the QUBO interaction graph and on the working
+graph of the target QPU, not on the coefficients. Both are hashed in index
+space (variables numbered in BQM order), so an A1/A2 sweep, or instances
+with the same customer count and `vehicle_k_limits`, reuse one embedding.
+Embeddings are stored as JSON files in `.embedding_cache` and applied
+through a `FixedEmbeddingComposite`.
+
+Any structured dimod sampler can be the target, so the cache can be
+exercised offline with e.g. a `dimod.StructureComposite` over a
+`dwave_networkx.pegasus_graph`.
+"""
+import hashlib
+import json
+import os
+
+import dimod
+import minorminer
+import networkx as nx
+import numpy as np
+from dwave.embedding import is_valid_embedding
+from dwave.system import FixedEmbeddingComposite
+
+CACHE_DIR_NAME = ".embedding_cache"
+
+
+def _digest(*arrays):
+    sha = hashlib.sha256()
+    for array in arrays:
+        array = np.ascontiguousarray(array, dtype=np.int64)
+        sha.update(str(array.shape).encode())
+        sha.update(array.tobytes())
+    return sha.hexdigest()
+
+
+def _sorted_edges(edges):
+    edges = np.sort(np.asarray(edges, dtype=np.int64).reshape(-1, 2), axis=1)
+    return edges[np.lexsort((edges[:, 1], edges[:, 0]))]
+
+
+def interaction_graph(bqm):
+    """ (num_variables, edges) of a BQM, with variables numbered in BQM order. """
+    _, (irow, icol, _), _ = bqm.to_numpy_vectors(variable_order=list(bqm.variables))
+    return len(bqm.variables), _sorted_edges(np.stack((irow, icol), axis=1))
+
+
+def graph_key(bqm):
+    num_variables, edges = interaction_graph(bqm)
+    return _digest([num_variables], edges)
+
+
+def topology_key(sampler):
+    """ Hash of the sampler's working graph (and topology name, if any). """
+    nodes = np.sort(np.asarray(sampler.nodelist, dtype=np.int64))
+    edges = _sorted_edges(sampler.edgelist)
+    topology = sampler.properties.get('topology', {})
+    name = f"{topology.get('type', '')}{topology.get('shape', '')}".encode()
+    return _digest(np.frombuffer(name, dtype=np.uint8), nodes, edges)
+
+
+class EmbeddingCache:
+    """
+    Finds embeddings with minorminer and keeps them on disk, one JSON file
+    per (interaction graph, target graph) pair. Cached embeddings are
+    re-validated against the target, so a QPU whose working graph changed
+    simply gets a fresh embedding.
+    """
+
+    def __init__(self, cache_dir=None, **embedding_parameters):
+        self.cache_dir = cache_dir if cache_dir is not None else os.path.join(os.getcwd(), CACHE_DIR_NAME)
+        self.embedding_parameters = embedding_parameters
+        self.hits = 0
+        self.misses = 0
+
+    def path(self, bqm, sampler):
+        return os.path.join(self.cache_dir, f"{graph_key(bqm)[:32]}-{topology_key(sampler)[:32]}.json")
+
+    def get_embedding(self, bqm, sampler):
+        """ Returns {variable: chain} for `bqm` on the structured `sampler`. """
+        variables = list(bqm.variables)
+        num_variables, edges = interaction_graph(bqm)
+        source = nx.Graph()
+        source.add_nodes_from(range(num_variables))
+        source.add_edges_from(edges.tolist())
+        target = nx.Graph()
+        target.add_nodes_from(sampler.nodelist)
+        target.add_edges_from(sampler.edgelist)
+
+        path = self.path(bqm, sampler)
+        embedding = self._load(path, num_variables)
+        if embedding is not None and is_valid_embedding(embedding, source, target):
+            self.hits += 1
+        else:
+            self.misses += 1
+            embedding = minorminer.find_embedding(source, target, **self.embedding_parameters)
+            if len(embedding) != num_variables:
+                raise ValueError("No embedding found for the QUBO on the target topology.")
+            self._save(path, embedding, num_variables)
+        return {variables[i]: list(chain) for i, chain in embedding.items()}
+
+    def _load(self, path, num_variables):
+        try:
+            with open(path) as f:
+                chains = json.load(f)['embedding']
+        except (OSError, ValueError, KeyError):
+            return None
+        if len(chains) != num_variables:
+            return None
+        return {i: chain for i, chain in enumerate(chains)}
+
+    def _save(self, path, embedding, num_variables):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump({'embedding': [[int(q) for q in embedding[i]] for i in range(num_variables)]}, f)
+        os.replace(tmp, path)
+
+
+class CachedEmbeddingComposite(dimod.ComposedSampler):
+    """
+    Drop-in replacement for `EmbeddingComposite` that looks embeddings up
+    in an `EmbeddingCache` and samples through a `FixedEmbeddingComposite`.
+    """
+
+    def __init__(self, child_sampler, cache=None):
+        self._child = child_sampler
+        self.cache = cache if cache is not None else EmbeddingCache()
+
+    @property
+    def children(self):
+        return [self._child]
+
+    @property
+    def parameters(self):
+        return FixedEmbeddingComposite(self._child, {}).parameters
+
+    @property
+    def properties(self):
+        return {'child_properties': self._child.properties.copy()}
+
+    def sample(self, bqm, **parameters):
+        embedding = self.cache.get_embedding(bqm, self._child)
+        return FixedEmbeddingComposite(self._child, embedding).sample(bqm, **parameters)
@@ -0,0 +1,214 @@
+"""
+Repair and local-search refinement for decoded VRP routes.
+
+`repair_routes` turns any decoded read into a feasible assignment: unknown
+and repeated visits are dropped and missing customers are inserted at their
+cheapest position. `improve_routes` then applies the best 2-opt, relocate or
+swap move until none improves the cost. Routes are flattened into position
+arrays (node, route, predecessor, successor) and every move type is scored
+for all candidates at once from those arrays, so each iteration is a few
+NumPy passes instead of re-costing whole routes.
+"""
+import numpy as np
+
+EPSILON = 1e-9
+
+
+def _insertion_deltas(routes, customer, costs, depot):
+    """ Cost of inserting `customer` at every position of every route. """
+    deltas = []
+    for route in routes:
+        path = np.array([depot] + list(route) + [depot], dtype=np.int64)
+        deltas.append(costs[path[:-1], customer] + costs[customer, path[1:]] - costs[path[:-1], path[1:]])
+    return deltas
+
+
+def repair_routes(routes, customers, costs, depot=0, weights=None, capacities=None, k_limits=None):
+    """
+    Keeps the first visit of every customer, drops anything else, and
+    inserts missed customers at their cheapest position on a route with
+    spare capacity and fewer than `k_limits[r]` stops. Without such a
+    route the stop limit alone is kept, then neither. An empty `routes`
+    list starts from one empty route per vehicle (per capacity, else one).
+    """
+    costs = np.asarray(costs, dtype=np.float64)
+    if not len(routes):
+        routes = [[] for _ in range(len(capacities) if capacities is not None else 1)]
+    wanted = set(int(c) for c in customers)
+    seen = set()
+    repaired = []
+    for route in routes:
+        kept = []
+        for node in route:
+            node = int(node)
+            if node in wanted and node not in seen:
+                kept.append(node)
+                seen.add(node)
+        repaired.append(kept)
+
+    load = [sum(weights[c] for c in route) if weights is not None else 0.0 for route in repaired]
+    for customer in customers:
+        customer = int(customer)
+        if customer in seen:
+            continue
+        deltas = _insertion_deltas(repaired, customer, costs, depot)
+        best = None
+        for check_capacity, check_length in ((True, True), (False, True), (False, False)):
+            for r, delta in enumerate(deltas):
+                if check_capacity and capacities is not None and weights is not None and load[r] + weights[customer] > capacities[r]:
+                    continue
+                if check_length and k_limits is not None and len(repaired[r]) >= k_limits[r]:
+                    continue
+                i = int(np.argmin(delta))
+                if best is None or delta[i] < best[0]:
+                    best = (delta[i], r, i)
+            if best is not None:
+                break
+        _, r, i = best
+        repaired[r].insert(i, customer)
+        load[r] += weights[customer] if weights is not None else 0.0
+        seen.add(customer)
+    return repaired
+
+
+class RouteArrays:
+    """
+    Flat view of a set of routes: one entry per visited customer with its
+    node, route, position, predecessor and successor (depot at both ends),
+    plus per-route loads and lengths.
+    """
+
+    def __init__(self, routes, depot, weights):
+        self.routes = [list(route) for route in routes]
+        self.node = np.array([c for route in self.routes for c in route], dtype=np.int64)
+        self.route = np.array([r for r, route in enumerate(self.routes) for _ in route], dtype=np.int64)
+        self.position = np.array([i for route in self.routes for i in range(len(route))], dtype=np.int64)
+        self.prev = np.array([route[i - 1] if i else depot for route in self.routes for i in range(len(route))], dtype=np.int64)
+        self.next = np.array([route[i + 1] if i + 1 < len(route) else depot for route in self.routes for i in range(len(route))], dtype=np.int64)
+        self.load = np.array([sum(weights[c] for c in route) for route in self.routes], dtype=np.float64)
+        self.length = np.array([len(route) for route in self.routes], dtype=np.int64)
+        self.weight = np.asarray(weights, dtype=np.float64)[self.node] if len(self.node) else np.zeros(0)
+        # Insertion edges (u, v): every arc of every route, depot arcs included.
+        self.edge_from = np.array([([depot] + route)[i] for route in self.routes for i in range(len(route) + 1)], dtype=np.int64)
+        self.edge_to = np.array([(route + [depot])[i] for route in self.routes for i in range(len(route) + 1)], dtype=np.int64)
+        self.edge_route = np.array([r for r, route in enumerate(self.routes) for _ in range(len(route) + 1)], dtype=np.int64)
+        self.edge_position = np.array([i for route in self.routes for i in range(len(route) + 1)], dtype=np.int64)
+
+
+def best_relocate(arrays, costs, capacities, k_limits):
+    """ Best move of one customer to any arc of any route: (delta, move). """
+    a = arrays
+    if not len(a.node):
+        return 0.0, None
+    removal = costs[a.prev, a.next] - costs[a.prev, a.node] - costs[a.node, a.next]
+    insertion = (costs[a.edge_from[None, :], a.node[:, None]] + costs[a.node[:, None], a.edge_to[None, :]]
+                 - costs[a.edge_from, a.edge_to][None, :])
+    same = a.route[:, None] == a.edge_route[None, :]
+    # Arcs touching the customer itself are not valid targets.
+    touching = same & ((a.edge_position[None, :] == a.position[:, None]) | (a.edge_position[None, :] == a.position[:, None] + 1))
+    fits = same | ((a.load[a.edge_route][None, :] + a.weight[:, None] <= capacities[a.edge_route][None, :])
+                   & (a.length[a.edge_route] < k_limits[a.edge_route])[None, :])
+    delta = np.where(~touching & fits, removal[:, None] + insertion, np.inf)
+    i, e = np.unravel_index(np.argmin(delta), delta.shape)
+    return delta[i, e], ('relocate', int(i), int(e))
+
+
+def best_swap(arrays, costs, capacities):
+    """
+    Best exchange of two customers on different routes: (delta, move).
+    Route lengths do not change, so stop limits cannot be exceeded.
+    """
+    a = arrays
+    if len(a.node) < 2:
+        return 0.0, None
+    x, y = a.node[:, None], a.node[None, :]
+    # x takes y's place and y takes x's place.
+    delta = (costs[a.prev[None, :], x] + costs[x, a.next[None, :]] - costs[a.prev[None, :], y] - costs[y, a.next[None, :]]
+             + costs[a.prev[:, None], y] + costs[y, a.next[:, None]] - costs[a.prev[:, None], x] - costs[x, a.next[:, None]])
+    shift = a.weight[None, :] - a.weight[:, None]
+    fits = ((a.load[a.route][:, None] + shift <= capacities[a.route][:, None])
+            & (a.load[a.route][None, :] - shift <= capacities[a.route][None, :]))
+    valid = (a.route[:, None] < a.route[None, :]) & fits
+    delta = np.where(valid, delta, np.inf)
+    i, j = np.unravel_index(np.argmin(delta), delta.shape)
+    return delta[i, j], ('swap', int(i), int(j))
+
+
+def best_two_opt(arrays, costs, depot):
+    """ Best segment reversal inside one route: (delta, move). """
+    best_delta, best_move = np.inf, None
+    for r, route in enumerate(arrays.routes):
+        if len(route) < 2:
+            continue
+        path = np.array([depot] + route + [depot], dtype=np.int64)
+        forward = np.concatenate(([0.0], np.cumsum(costs[path[:-1], path[1:]])))
+        backward = np.concatenate(([0.0], np.cumsum(costs[path[1:], path[:-1]])))
+        # Reverse path[i..j] for 1 <= i < j <= len(route).
+        i, j = np.triu_indices(len(path) - 1, k=1)
+        keep = i >= 1
+        i, j = i[keep], j[keep]
+        inner = (backward[j] - backward[i]) - (forward[j] - forward[i])
+        delta = (costs[path[i - 1], path[j]] + costs[path[i], path[j + 1]]
+                 - costs[path[i - 1], path[i]] - costs[path[j], path[j + 1]] + inner)
+        k = int(np.argmin(delta))
+        if delta[k] < best_delta:
+            best_delta, best_move = delta[k], ('two_opt', r, int(i[k]) - 1, int(j[k]) - 1)
+    return best_delta, best_move
+
+
+def apply_move(arrays, move):
+    routes = [list(route) for route in arrays.routes]
+    kind = move[0]
+    if kind == 'relocate':
+        _, i, e = move
+        r, position = int(arrays.route[i]), int(arrays.position[i])
+        target, target_position = int(arrays.edge_route[e]), int(arrays.edge_position[e])
+        customer = routes[r].pop(position)
+        if target == r and target_position > position:
+            target_position -= 1
+        routes[target].insert(target_position, customer)
+    elif kind == 'swap':
+        _, i, j = move
+        ri, pi, rj, pj = int(arrays.route[i]), int(arrays.position[i]), int(arrays.route[j]), int(arrays.position[j])
+        routes[ri][pi], routes[rj][pj] = routes[rj][pj], routes[ri][pi]
+    else:
+        _, r, i, j = move
+        routes[r][i:j + 1] = routes[r][i:j + 1][::-1]
+    return routes
+
+
+def improve_routes(routes, costs, depot=0, weights=None, capacities=None, max_iterations=1000, k_limits=None):
+    """
+    Best-improvement local search over relocate, swap and 2-opt moves.
+    Inter-route moves respect `capacities` and the per-route stop limits
+    `k_limits` when given.
+    """
+    # Self-loops are free, so an empty route (depot -> depot) costs nothing.
+    costs = np.array(costs, dtype=np.float64)
+    np.fill_diagonal(costs, 0.0)
+    if weights is None:
+        weights = np.zeros(len(costs))
+    capacities = np.full(len(routes), np.inf) if capacities is None else np.asarray(capacities, dtype=np.float64)
+    k_limits = np.full(len(routes), np.inf) if k_limits is None else np.asarray(k_limits, dtype=np.float64)
+    routes = [list(route) for route in routes]
+    for _ in range(max_iterations):
+        arrays = RouteArrays(routes, depot, weights)
+        candidates = [best_relocate(arrays, costs, capacities, k_limits), best_swap(arrays, costs, capacities), best_two_opt(arrays, costs, depot)]
+        delta, move = min(candidates, key=lambda candidate: candidate[0])
+        if move is None or delta >= -EPSILON:
+            break
+        routes = apply_move(arrays, move)
+    return routes
+
+
+def refine_routes(problem, routes, vehicle_k_limits=None, max_iterations=1000):
+    """
+    Repairs and then improves decoded routes of a VRPProblem, keeping every
+    route within its `vehicle_k_limits` stops when given.
+    """
+    num_vehicles = len(problem.capacities)
+    routes = [list(route) for route in routes] + [[] for _ in range(num_vehicles - len(routes))]
+    routes = repair_routes(routes, problem.dests, problem.costs, problem.source_depot, problem.weights, problem.capacities,
+                           vehicle_k_limits)
+    return improve_routes(routes, problem.costs, problem.source_depot, problem.weights, problem.capacities, max_iterations,
+                          vehicle_k_limits)
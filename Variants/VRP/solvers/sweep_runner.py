@@ -0,0 +1,192 @@
+"""
+Parallel penalty-grid sweeps for the VRP QUBO solvers.
+
+A sweep is a list of job dicts, one per (instance, solver, A1, A2,
+num_reads, seed) point, see `make_sweep_jobs`. Every job is split into
+chunks of at most `chunk_reads` reads that run on a process pool. Workers
+keep their parsed problems (and so the cached QUBO templates) and sampler
+objects between chunks. The chunks of a job are merged into one SampleSet,
+decoded, and appended to a CSV file as soon as the job completes.
+"""
+import csv
+import importlib
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import dimod
+import numpy as np
+
+from input import read_solomon
+from vrp_problem import VRPProblem
+from vrp_solution import VRPSolution
+import vrp_solvers
+
+dwave_solvers = importlib.import_module('D-Wave_solvers')
+
+RESULT_FIELDS = [
+    'instance', 'num_customers', 'num_vehicles', 'solver', 'solver_type', 'A1', 'A2',
+    'num_reads', 'reads_merged', 'partial', 'seed', 'k_nearest', 'num_variables', 'energy', 'cost', 'valid',
+    'wall_time_sec',
+]
+
+# Solvers whose `solve` samples one paper QUBO over `get_vehicle_k_limits()`,
+# which is what a sweep job samples. Others (e.g. ClusterFirstSolver) run a
+# different algorithm and cannot be swept chunk by chunk.
+SWEEP_SOLVERS = ('FullQuboSolver', 'AveragePartitionSolver')
+
+# Per-process cache of parsed problems, keyed on (instance, customers, vehicles).
+_problem_cache = {}
+
+
+def load_problem(instance, num_customers, num_vehicles):
+    key = (instance, num_customers, num_vehicles)
+    if key not in _problem_cache:
+        problem_data = read_solomon(instance, num_customers)
+        vehicle_capacity = problem_data['capacities'][0]
+        _problem_cache[key] = VRPProblem(
+            sources=problem_data['sources'],
+            costs=problem_data['costs'],
+            time_costs=problem_data['time_costs'],
+            capacities=np.array([vehicle_capacity] * num_vehicles),
+            dests=problem_data['dests'],
+            weights=problem_data['weights']
+        )
+    return _problem_cache[key]
+
+
+def check_sweep_solver(solver):
+    if solver not in SWEEP_SOLVERS:
+        raise ValueError(f"{solver} does not solve one paper QUBO over per-vehicle k-limits; "
+                         f"sweepable solvers are {', '.join(SWEEP_SOLVERS)}.")
+
+
+def make_sweep_jobs(instances, solvers, A1_values, A2_values, num_customers, num_vehicles,
+                    num_reads=50, seeds=(None,), solver_type='simulated', solver_kwargs=None, k_nearest=None):
+    """ Expands a penalty grid into a list of sweep job dicts. """
+    for solver in solvers:
+        check_sweep_solver(solver)
+    jobs = []
+    for instance, solver, A1, A2, seed in itertools.product(instances, solvers, A1_values, A2_values, seeds):
+        jobs.append({
+            'instance': instance,
+            'num_customers': num_customers,
+            'num_vehicles': num_vehicles,
+            'solver': solver,
+            'solver_type': solver_type,
+            'solver_kwargs': dict(solver_kwargs or {}),
+            'A1': A1,
+            'A2': A2,
+            'num_reads': num_reads,
+            'seed': seed,
+            'k_nearest': k_nearest,
+        })
+    return jobs
+
+
+def get_job_k_limits(job, problem):
+    solver = getattr(vrp_solvers, job['solver'])(problem)
+    return solver.get_vehicle_k_limits(**job['solver_kwargs'])
+
+
+def sample_chunk(job, num_reads, seed):
+    """ Worker task: samples `num_reads` reads of one job's QUBO. """
+    problem = load_problem(job['instance'], job['num_customers'], job['num_vehicles'])
+    vehicle_k_limits = get_job_k_limits(job, problem)
+    qubo = problem.get_qubo_paper(vehicle_k_limits, job['A1'], job['A2'], job.get('k_nearest'))
+    sampler = dwave_solvers.get_cached_solver(job['solver_type'])
+    return dwave_solvers.sample_qubo(qubo, job['solver_type'], num_reads, seed=seed, sampler=sampler)
+
+
+def split_reads(num_reads, chunk_reads, seed):
+    """
+    Splits a job's reads into (num_reads, seed) chunks. Chunk seeds are
+    spawned from `np.random.SeedSequence(seed)`, so the chunks of jobs with
+    different seeds never share a seed.
+    """
+    sizes = [min(chunk_reads, num_reads - start) for start in range(0, num_reads, chunk_reads)]
+    if seed is None:
+        return [(size, None) for size in sizes]
+    children = np.random.SeedSequence(seed).spawn(len(sizes))
+    # The simulated annealer takes seeds below 2**31.
+    return [(size, int(child.generate_state(1)[0] >> 1)) for size, child in zip(sizes, children)]
+
+
+def summarize_job(job, samplesets, wall_time, reads_merged=None):
+    """ Result row of a job; `reads_merged` counts the reads of the chunks that succeeded. """
+    problem = load_problem(job['instance'], job['num_customers'], job['num_vehicles'])
+    vehicle_k_limits = get_job_k_limits(job, problem)
+    sampleset = dimod.concatenate(samplesets)
+    if reads_merged is None:
+        reads_merged = job['num_reads']
+    solution = VRPSolution.from_sampleset(problem, sampleset, vehicle_k_limits)
+    row = {field: job.get(field) for field in RESULT_FIELDS}
+    row.update({
+        'instance': os.path.basename(job['instance']),
+        'reads_merged': reads_merged,
+        # Some chunks failed: fewer reads than requested were merged.
+        'partial': reads_merged < job['num_reads'],
+        'num_variables': len(sampleset.variables),
+        'energy': solution.evaluation['energy'][solution.best_read],
+        'cost': solution.total_cost(),
+        'valid': solution.check(),
+        'wall_time_sec': wall_time,
+    })
+    return row
+
+
+def run_sweep(jobs, output_csv, max_workers=None, chunk_reads=100):
+    """
+    Runs all jobs on a process pool and appends one CSV row per finished job.
+    Returns the list of result rows in completion order.
+    """
+    for job in jobs:
+        check_sweep_solver(job['solver'])
+    write_header = not os.path.exists(output_csv) or os.path.getsize(output_csv) == 0
+    results = []
+    pending = {}
+    with open(output_csv, 'a', newline='') as f, ProcessPoolExecutor(max_workers=max_workers) as pool:
+        writer = csv.DictWriter(f, fieldnames=RESULT_FIELDS)
+        if write_header:
+            writer.writeheader()
+
+        futures = {}
+        for job_id, job in enumerate(jobs):
+            chunks = split_reads(job['num_reads'], chunk_reads, job['seed'])
+            pending[job_id] = {'remaining': len(chunks), 'samplesets': [], 'reads': 0, 'start': time.time()}
+            for num_reads, seed in chunks:
+                futures[pool.submit(sample_chunk, job, num_reads, seed)] = (job_id, num_reads)
+
+        for future in as_completed(futures):
+            job_id, num_reads = futures[future]
+            state = pending[job_id]
+            try:
+                state['samplesets'].append(future.result())
+                state['reads'] += num_reads
+            except Exception as e:
+                print(f"Sweep job {job_id} failed: {e}")
+            state['remaining'] -= 1
+            if state['remaining'] or not state['samplesets']:
+                continue
+
+            row = summarize_job(jobs[job_id], state['samplesets'], time.time() - state['start'], state['reads'])
+            writer.writerow(row)
+            f.flush()
+            results.append(row)
+            del pending[job_id]
+            print(f"Finished {row['instance']} {row['solver']} A1={row['A1']} A2={row['A2']}: "
+                  f"cost={row['cost']:.2f}, valid={row['valid']}"
+                  + (f" (partial: {row['reads_merged']}/{row['num_reads']} reads)" if row['partial'] else ""))
+    return results
+
+
+if __name__ == "__main__":
+    data_dir = os.path.join("Data", "Global_Datasets", "Solomon")
+    instances = sorted(os.path.join(data_dir, name) for name in os.listdir(data_dir) if name.endswith(".txt"))
+    sweep_jobs = make_sweep_jobs(
+        instances, ['FullQuboSolver', 'AveragePartitionSolver'],
+        A1_values=[1.0], A2_values=[10.0, 100.0, 1000.0],
+        num_customers=6, num_vehicles=2, num_reads=200, seeds=[0],
+    )
+    run_sweep(sweep_jobs, "sweep_results.csv", chunk_reads=50)
@@ -1,55 +1,212 @@
-import D-Wave_solvers
-from vrp_solution import VRPSolution
+import importlib
+from concurrent.futures import ProcessPoolExecutor
+from vrp_problem import VRPProblem
+from vrp_solution import VRPSolution, evaluate_sampleset
+from local_search import refine_routes, repair_routes, improve_routes
+from baseline_solver import routes_to_initial_state
 import math
+import time
+import numpy as np
+
+# The module file name contains a hyphen, so it cannot be imported directly.
+dwave_solvers = importlib.import_module('D-Wave_solvers')
 
 class VRPSolver:
     def __init__(self, problem):
         self.problem = problem
+        self.sparsity = None
+        self.timings = {}
 
     def solve(self, A1, A2, solver_type, num_reads):
         pass
 
-class FullQuboSolver(VRPSolver):
-    def solve(self, A1, A2, solver_type='simulated', num_reads=50):
-        num_customers = len(self.problem.dests)
-        num_vehicles = len(self.problem.capacities)
-        
-        k_max = num_customers
-        vehicle_k_limits = [k_max] * num_vehicles
+    def build_qubo(self, vehicle_k_limits, A1, A2, k_nearest=None):
+        return self.problem.get_qubo_paper(vehicle_k_limits, A1, A2, k_nearest)
 
-        vrp_qubo = self.problem.get_qubo_paper(vehicle_k_limits, A1, A2)
-        
+    def encode_routes(self, routes, variables):
+        """ Initial state of the QUBO over `variables` for per-vehicle routes. """
+        return routes_to_initial_state(routes, variables)
+
+    def solve_with_limits(self, vehicle_k_limits, A1, A2, solver_type='simulated', num_reads=50, k_nearest=None, refine=False,
+                          initial_routes=None, rounds=1):
+        """
+        Samples the paper QUBO for the given per-vehicle step limits.
+        The cost/constraint template is cached on the problem, so repeated
+        calls with other A1/A2 values only re-weight it. With `k_nearest`
+        the sparse k-nearest-neighbour formulation is used and its size
+        reduction is kept in `self.sparsity`. With `refine` the chosen read
+        is repaired and improved by local search (see local_search.py).
+        Wall times of the stages are kept in `self.timings` (seconds).
+
+        `initial_routes` (e.g. the solution of a previous A1/A2 point or of
+        SavingsSolver) warm-start the annealer; with `rounds` > 1 every
+        round is seeded with the best feasible reads of the ones before
+        (see `warm_start_sample` in D-Wave_solvers.py).
+        """
+        self.timings = {}
+        start = time.perf_counter()
+        vrp_qubo = self.build_qubo(vehicle_k_limits, A1, A2, k_nearest)
+        self.timings['build'] = time.perf_counter() - start
+        if k_nearest is not None:
+            self.sparsity = self.problem.get_sparsity_report(vehicle_k_limits, k_nearest)
+
+        start = time.perf_counter()
         try:
-            samples = D-Wave_solvers.solve_qubo(vrp_qubo, solver_type=solver_type, limit=1, num_reads=num_reads)
+            if initial_routes is None and rounds == 1:
+                sampleset = dwave_solvers.sample_qubo(vrp_qubo, solver_type=solver_type, num_reads=num_reads)
+            else:
+                initial_states = None if initial_routes is None else [self.encode_routes(initial_routes, vrp_qubo.labels)]
+                sampleset = dwave_solvers.warm_start_sample(
+                    vrp_qubo, initial_states, solver_type=solver_type, num_reads=num_reads, rounds=rounds,
+                    is_feasible=lambda reads: evaluate_sampleset(self.problem, reads)['valid'])
         except Exception as e:
             print(f"Solver error: {e}")
             return VRPSolution(self.problem, {}, vehicle_k_limits, solution=[])
-        
-        if not samples:
-             return VRPSolution(self.problem, {}, vehicle_k_limits, solution=[])
+        self.timings['sample'] = time.perf_counter() - start
 
-        solution = VRPSolution(self.problem, samples[0], vehicle_k_limits)
+        # Every read is scored; the cheapest feasible one is returned.
+        start = time.perf_counter()
+        solution = VRPSolution.from_sampleset(self.problem, sampleset, vehicle_k_limits)
+        self.timings['decode'] = time.perf_counter() - start
+        if refine:
+            start = time.perf_counter()
+            solution.solution = refine_routes(self.problem, solution.solution, vehicle_k_limits)
+            self.timings['refine'] = time.perf_counter() - start
         return solution
 
+class FullQuboSolver(VRPSolver):
+    def get_vehicle_k_limits(self):
+        num_customers = len(self.problem.dests)
+        num_vehicles = len(self.problem.capacities)
+        
+        k_max = num_customers
+        return [k_max] * num_vehicles
+
+    def solve(self, A1, A2, solver_type='simulated', num_reads=50, k_nearest=None, refine=False, initial_routes=None, rounds=1):
+        vehicle_k_limits = self.get_vehicle_k_limits()
+        return self.solve_with_limits(vehicle_k_limits, A1, A2, solver_type, num_reads, k_nearest, refine, initial_routes, rounds)
+
 class AveragePartitionSolver(VRPSolver):
-    def solve(self, A1, A2, solver_type='simulated', num_reads=50, limit_radius=1):
+    def get_vehicle_k_limits(self, limit_radius=1):
         num_customers = len(self.problem.dests)
         num_vehicles = len(self.problem.capacities)
 
         avg_per_vehicle = math.ceil(num_customers / num_vehicles)
         k_max = avg_per_vehicle + limit_radius
-        vehicle_k_limits = [k_max] * num_vehicles
+        return [k_max] * num_vehicles
+
+    def solve(self, A1, A2, solver_type='simulated', num_reads=50, limit_radius=1, k_nearest=None, refine=False,
+              initial_routes=None, rounds=1):
+        vehicle_k_limits = self.get_vehicle_k_limits(limit_radius)
+        return self.solve_with_limits(vehicle_k_limits, A1, A2, solver_type, num_reads, k_nearest, refine, initial_routes, rounds)
+
+class ClusterFirstSolver(VRPSolver):
+    """
+    Splits the customers among the vehicles with a capacity-aware
+    clustering, then solves one single-vehicle (TSP) QUBO per cluster.
+    The cluster QUBOs are independent and run on a process pool.
+    """
+
+    def cluster_customers(self):
+        """
+        Farthest-first seeds, then regret assignment: the customer whose
+        best and second-best seed (with spare capacity) differ the most is
+        assigned first. Returns one list of customers per vehicle. Customers
+        that fit no vehicle go first-fit into extra clusters at the largest
+        capacity; VRPSolution.check() flags the surplus routes.
+        """
+        costs = np.asarray(self.problem.costs, dtype=np.float64)
+        customers = np.asarray(self.problem.dests, dtype=np.int64)
+        weights = np.asarray(self.problem.weights, dtype=np.float64)[customers]
+        capacities = np.asarray(self.problem.capacities, dtype=np.float64)
+        depot = self.problem.source_depot
+        num_vehicles = min(len(capacities), len(customers))
+
+        # Seeds: the customer farthest from the depot, then the one farthest
+        # from every seed chosen so far.
+        seeds = [int(np.argmax(costs[depot, customers]))]
+        nearest_seed = costs[customers[seeds[0]], customers]
+        while len(seeds) < num_vehicles:
+            nearest_seed = np.minimum(nearest_seed, costs[customers[seeds[-1]], customers])
+            seeds.append(int(np.argmax(nearest_seed)))
+
+        clusters = [[] for _ in capacities]
+        load = np.zeros(len(capacities))
+        unassigned = np.ones(len(customers), dtype=bool)
+        for m, j in enumerate(seeds):
+            clusters[m].append(int(customers[j]))
+            load[m] += weights[j]
+            unassigned[j] = False
+
+        # (customers, vehicles) distance to each vehicle's seed.
+        to_seed = np.full((len(customers), len(capacities)), np.inf)
+        to_seed[:, :num_vehicles] = costs[np.ix_(customers, customers[seeds])]
+        while unassigned.any():
+            open_cost = np.where(load[None, :] + weights[:, None] <= capacities[None, :], to_seed, np.inf)
+            open_cost[~unassigned] = np.inf
+            if not np.isfinite(open_cost[unassigned]).any():
+                # Nothing fits any more: open extra vehicles for the rest.
+                extra_capacity = capacities.max(initial=0.0)
+                extra_loads = []
+                for j in np.flatnonzero(unassigned):
+                    fits = [e for e, extra_load in enumerate(extra_loads) if extra_load + weights[j] <= extra_capacity]
+                    if not fits:
+                        clusters.append([])
+                        extra_loads.append(0.0)
+                        fits = [len(extra_loads) - 1]
+                    clusters[len(capacities) + fits[0]].append(int(customers[j]))
+                    extra_loads[fits[0]] += weights[j]
+                break
+            ordered = np.sort(open_cost, axis=1)
+            best = ordered[:, 0]
+            second = ordered[:, 1] if ordered.shape[1] > 1 else np.full(len(best), np.inf)
+            # Customers with one option left get infinite regret.
+            with np.errstate(invalid='ignore'):
+                regret = np.where(np.isfinite(best), second - best, -np.inf)
+            j = int(np.argmax(regret))
+            m = int(np.argmin(open_cost[j]))
+            clusters[m].append(int(customers[j]))
+            load[m] += weights[j]
+            unassigned[j] = False
+        return clusters
+
+    def cluster_sizes(self, clusters=None):
+        """ Number of customers per cluster, i.e. the stops of each route. """
+        if clusters is None:
+            clusters = self.cluster_customers()
+        return [len(cluster) for cluster in clusters]
 
-        vrp_qubo = self.problem.get_qubo_paper(vehicle_k_limits, A1, A2)
+    def solve(self, A1, A2, solver_type='simulated', num_reads=50, max_workers=None, refine=False):
+        clusters = self.cluster_customers()
+        vehicle_k_limits = self.cluster_sizes(clusters)
+        capacities = list(self.problem.capacities)
+        capacities += [max(capacities, default=0)] * (len(clusters) - len(capacities))
+        tasks = [(self.problem, cluster, capacity, A1, A2, solver_type, num_reads, refine)
+                 for cluster, capacity in zip(clusters, capacities)]
 
         try:
-            samples = D-Wave_solvers.solve_qubo(vrp_qubo, solver_type=solver_type, limit=1, num_reads=num_reads)
+            if max_workers == 1 or sum(len(cluster) > 1 for cluster in clusters) <= 1:
+                routes = [_solve_cluster(*task) for task in tasks]
+            else:
+                with ProcessPoolExecutor(max_workers=max_workers) as pool:
+                    routes = list(pool.map(_solve_cluster, *zip(*tasks)))
         except Exception as e:
             print(f"Solver error: {e}")
             return VRPSolution(self.problem, {}, vehicle_k_limits, solution=[])
 
-        if not samples:
-             return VRPSolution(self.problem, {}, vehicle_k_limits, solution=[])
+        return VRPSolution(self.problem, {}, vehicle_k_limits, solution=routes)
 
-        solution = VRPSolution(self.problem, samples[0], vehicle_k_limits)
-        return solution
\ No newline at end of file
+def _solve_cluster(problem, cluster, capacity, A1, A2, solver_type, num_reads, refine=False):
+    """ Worker task: solves the single-vehicle QUBO of one cluster. """
+    if len(cluster) <= 1:
+        return list(cluster)
+    sub_problem = VRPProblem([problem.source_depot], problem.costs, problem.time_costs, [capacity], cluster, problem.weights)
+    vehicle_k_limits = [len(cluster)]
+    sampleset = dwave_solvers.sample_qubo(sub_problem.get_qubo_paper(vehicle_k_limits, A1, A2),
+                                          solver_type=solver_type, num_reads=num_reads)
+    solution = VRPSolution.from_sampleset(sub_problem, sampleset, vehicle_k_limits)
+    # Repeated visits are dropped and missed customers inserted cheaply.
+    routes = repair_routes(solution.solution, cluster, problem.costs, problem.source_depot)
+    if refine:
+        routes = improve_routes(routes, problem.costs, problem.source_depot)
+    return routes[0]
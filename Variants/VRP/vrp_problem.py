@@ -1,4 +1,6 @@
-from qubo_helper import Qubo
+import numpy as np
+
+from qubo_helper import QuboTemplate
 
 class VRPProblem:
     def __init__(self, sources, costs, time_costs, capacities, dests, weights):
@@ -8,90 +10,184 @@ class VRPProblem:
         self.capacities = capacities
         self.dests = dests
         self.weights = weights
+        self._qubo_templates = {}
+        self._neighbour_masks = {}
 
-    def get_qubo_paper(self, vehicle_k_limits, A1, A2):
+    def get_active_grid(self, vehicle_k_limits):
         """
-        Generates the QUBO for the VRP as specified
-        in the Gora et al. paper
+        Boolean (vehicles, k_max, customers) array, True where the variable
+        (m, dests[j], k + 1) exists. Subclasses prune it further.
+        """
+        k_limits = np.asarray(vehicle_k_limits, dtype=np.int64)
+        k_max = int(k_limits.max()) if len(k_limits) else 0
+        active = np.arange(1, k_max + 1)[None, :] <= k_limits[:, None]
+        return np.repeat(active[:, :, None], len(self.dests), axis=2)
+
+    def get_variable_grid(self, vehicle_k_limits):
+        """
+        Lays out the (m, j, k) variables of the paper formulation.
+
+        Returns `index`, an int array of shape (vehicles, k_max, customers)
+        holding the variable index of (m, dests[j], k + 1), or -1 where it
+        does not exist (see `get_active_grid`), and the matching labels.
+        """
+        customers = np.asarray(self.dests, dtype=np.int64)
+        active = self.get_active_grid(vehicle_k_limits)
+        index = np.full(active.shape, -1, dtype=np.int64)
+        index[active] = np.arange(active.sum())
+
+        m, k, j = np.nonzero(active)
+        labels = list(zip(m.tolist(), customers[j].tolist(), (k + 1).tolist()))
+        return index, labels
+
+    def get_neighbour_mask(self, k_nearest):
+        """
+        Boolean (customers, customers) mask, True where dests[j] is one of
+        the `k_nearest` cheapest successors of dests[i]. Cached per k.
+        """
+        if k_nearest not in self._neighbour_masks:
+            customers = np.asarray(self.dests, dtype=np.int64)
+            between = np.asarray(self.costs, dtype=np.float64)[np.ix_(customers, customers)].copy()
+            np.fill_diagonal(between, np.inf)
+            k = min(int(k_nearest), max(len(customers) - 1, 0))
+            nearest = np.argsort(between, axis=1, kind='stable')[:, :k]
+            mask = np.zeros(between.shape, dtype=bool)
+            np.put_along_axis(mask, nearest, True, axis=1)
+            self._neighbour_masks[k_nearest] = mask
+        return self._neighbour_masks[k_nearest]
+
+    def get_qubo_paper_terms(self, vehicle_k_limits, k_nearest=None):
+        """
+        Builds every block of the Gora et al. QUBO as whole arrays.
+
+        Returns (labels, rows, cols, cost, constraint): the cost and
+        constraint arrays are aligned with rows/cols, so any A1/A2 weighting
+        is a single `A1 * cost + A2 * constraint` pass. Terms are not yet
+        deduplicated.
+
+        With `k_nearest`, the (i at k) -> (j at k+1) couplings are only
+        created when j is among the k nearest neighbours of i. Any other
+        hop out of i is charged a uniform upper bound U(i), the largest
+        non-neighbour step cost, so the energy never makes a far hop
+        cheaper than a near one. This needs one indicator y(m, k+1) =
+        "vehicle m has a stop at step k+1" per step, labelled
+        (('next_stop', m), k+1): x(m, i, k) * y(m, k+1) carries U(i), the
+        neighbour couplings carry their real cost minus U(i), and
+        A2 * x(m, j, k+1) * (1 - y(m, k+1)) forces y on when the step is used.
         """
-        num_vehicles = len(self.capacities)
-        customer_nodes = self.dests
+        customers = np.asarray(self.dests, dtype=np.int64)
         depot_node = self.source_depot
+        costs = np.asarray(self.costs, dtype=np.float64)
+        index, labels = self.get_variable_grid(vehicle_k_limits)
+        num_vehicles, k_max, num_customers = index.shape
 
-        cost_qubo = Qubo()
-        constraint_qubo = Qubo()
+        blocks = []
+
+        def add_block(rows, cols, cost, constraint, mask):
+            shape = mask.shape
+            blocks.append((
+                np.broadcast_to(rows, shape)[mask],
+                np.broadcast_to(cols, shape)[mask],
+                np.broadcast_to(cost, shape)[mask],
+                np.broadcast_to(constraint, shape)[mask],
+            ))
 
         # --- OBJECTIVE FUNCTION 'C' ---
 
-        # Part 1: Cost from Depot to First Customer
-        # Adds C(depot, i) if customer i is the first stop (k=1) for vehicle m.
-        for m in range(num_vehicles):
-            for i_cust_node in customer_nodes:
-                cost = self.costs[depot_node][i_cust_node]
-                var = (m, i_cust_node, 1)
-                cost_qubo.add((var, var), cost)
-
-        # Part 2: Cost between Intermediate Customers
-        # Adds C(i, j) if vehicle m goes from customer i (at step k) to customer j (at step k+1).
-        for m in range(num_vehicles):
-            k_max = vehicle_k_limits[m]
-            for k in range(1, k_max):
-                for i_cust_node in customer_nodes:
-                    for j_cust_node in customer_nodes:
-                        if i_cust_node == j_cust_node: continue
-                        cost = self.costs[i_cust_node][j_cust_node]
-                        var1 = (m, i_cust_node, k)
-                        var2 = (m, j_cust_node, k + 1)
-                        cost_qubo.add((var1, var2), cost)
-
-        # Part 3: Cost from Last Customer to DepoT
-        # Adds C(i, depot) only if customer i is the last stop for vehicle m.
-        # This is done by adding C(i,depot) as a linear term, and then subtracting it
-        # via a quadratic term if another stop follows.
-        for m in range(num_vehicles):
-            k_max = vehicle_k_limits[m]
-            for k in range(1, k_max + 1):
-                for i_cust_node in customer_nodes:
-                    cost_to_depot = self.costs[i_cust_node][depot_node]
-                    var_i = (m, i_cust_node, k)
-                    
-                    # Add the cost as if this IS the last stop
-                    cost_qubo.add((var_i, var_i), cost_to_depot)
-                    
-                    # If there's a NEXT stop, subtract the cost we just added
-                    if k < k_max:
-                        for j_cust_node in customer_nodes:
-                            if i_cust_node == j_cust_node: continue
-                            var_j_next = (m, j_cust_node, k + 1)
-                            cost_qubo.add((var_i, var_j_next), -cost_to_depot)
+        # Linear part: C(depot, i) when i is the first stop (k=1), plus
+        # C(i, depot) as if every stop were the last one.
+        to_depot = costs[customers, depot_node]
+        linear_cost = np.broadcast_to(to_depot, index.shape).copy()
+        if k_max:
+            linear_cost[:, 0, :] += costs[depot_node, customers]
+        # Constraint 1 contributes -1 on every variable.
+        add_block(index, index, linear_cost, -1.0, index >= 0)
+
+        # Quadratic part: C(i, j) for i at step k followed by j at step k+1,
+        # minus the C(i, depot) added above since i was not the last stop.
+        if k_max > 1:
+            step_cost = costs[np.ix_(customers, customers)] - to_depot[:, None]
+            src = index[:, :-1, :, None]
+            dst = index[:, 1:, None, :]
+            mask = (src >= 0) & (dst >= 0) & ~np.eye(num_customers, dtype=bool)
+            if k_nearest is None:
+                add_block(src, dst, step_cost, 0.0, mask)
+            else:
+                neighbours = self.get_neighbour_mask(k_nearest)
+                far = ~neighbours & ~np.eye(num_customers, dtype=bool)
+                bound = np.maximum(np.where(far, step_cost, -np.inf).max(axis=1, initial=-np.inf), 0.0)
+                add_block(src, dst, step_cost - bound[:, None], 0.0, mask & neighbours)
 
+                # Indicators y(m, k+1) for every step that has a variable.
+                used = (index[:, 1:, :] >= 0).any(axis=2)
+                next_stop = np.full(used.shape, -1, dtype=np.int64)
+                next_stop[used] = len(labels) + np.arange(used.sum())
+                m, k = np.nonzero(used)
+                labels = labels + [(('next_stop', int(v)), int(step) + 2) for v, step in zip(m, k)]
+                y = next_stop[:, :, None]
+                add_block(index[:, :-1, :], y, bound[None, None, :], 0.0, (index[:, :-1, :] >= 0) & (y >= 0))
+                add_block(index[:, 1:, :], index[:, 1:, :], 0.0, 1.0, index[:, 1:, :] >= 0)
+                add_block(index[:, 1:, :], y, 0.0, -1.0, (index[:, 1:, :] >= 0) & (y >= 0))
 
         # --- CONSTRAINT FUNCTION 'Q' ---
-        
+
         # Constraint 1: Each customer is visited exactly once.
-        for j_cust_node in customer_nodes:
-            variables = []
-            for m in range(num_vehicles):
-                # Ensure k goes up to the vehicle's specific limit
-                for k in range(1, vehicle_k_limits[m] + 1):
-                    variables.append((m, j_cust_node, k))
-            constraint_qubo.add_only_one_constraint(variables, 1.0)
+        # Every pair of (m, k) slots holding the same customer gets +2.
+        slots = index.reshape(num_vehicles * k_max, num_customers)
+        first, second = np.triu_indices(len(slots), k=1)
+        rows, cols = slots[first], slots[second]
+        add_block(rows, cols, 0.0, 2.0, (rows >= 0) & (cols >= 0))
 
         # Constraint 2: Each vehicle is in AT MOST one place at a given time.
-        for m in range(num_vehicles):
-            k_max = vehicle_k_limits[m]
-            for k in range(1, k_max + 1):
-                variables = [(m, j_cust_node, k) for j_cust_node in customer_nodes]
-                constraint_qubo.add_at_most_one_constraint(variables, 1.0)
-
-
-        # --- Combine C and Q into the final QUBO ---
-        final_qubo = Qubo()
-        # Add values from cost_qubo, scaled by A1
-        for field, value in cost_qubo.get_dict().items():
-            final_qubo.add(field, value * A1)
-        # Add values from constraint_qubo, scaled by A2
-        for field, value in constraint_qubo.get_dict().items():
-            final_qubo.add(field, value * A2)
-            
-        return final_qubo
\ No newline at end of file
+        first, second = np.triu_indices(num_customers, k=1)
+        rows, cols = index[:, :, first], index[:, :, second]
+        add_block(rows, cols, 0.0, 1.0, (rows >= 0) & (cols >= 0))
+
+        rows, cols, cost, constraint = (np.concatenate(part) for part in zip(*blocks))
+        return labels, rows, cols, cost, constraint
+
+    def get_qubo_template(self, vehicle_k_limits, k_nearest=None):
+        """
+        Returns the cost/constraint template for `vehicle_k_limits`.
+        It is built once per problem instance, limits and k_nearest, then cached.
+        """
+        key = (tuple(int(k) for k in vehicle_k_limits), k_nearest)
+        if key not in self._qubo_templates:
+            labels, rows, cols, cost, constraint = self.get_qubo_paper_terms(key[0], k_nearest)
+            self._qubo_templates[key] = QuboTemplate(labels, rows, cols, cost=cost, constraint=constraint)
+        return self._qubo_templates[key]
+
+    def get_sparsity_report(self, vehicle_k_limits, k_nearest):
+        """
+        How much the k-nearest-neighbour formulation shrinks the QUBO, over
+        the variables of `get_active_grid` (so pruned grids count right).
+        Step couplings and next-stop indicator terms never coincide with
+        other blocks' terms, so the dense size follows without building
+        the dense model.
+        """
+        active = self.get_active_grid(vehicle_k_limits).astype(np.int64)
+        first, second = active[:, :-1, :], active[:, 1:, :]
+        num_first, num_second = first.sum(axis=2), second.sum(axis=2)
+        # Pairs (i at k, j at k+1) with i != j, and the ones among neighbours.
+        dense_steps = int((num_first * num_second - (first * second).sum(axis=2)).sum())
+        mask = self.get_neighbour_mask(k_nearest).astype(np.int64)
+        kept_steps = int(np.einsum('mki,ij,mkj->', first, mask, second))
+        # Each indicator couples to the stops of its own step and the one before.
+        indicator_terms = int(np.where(num_second > 0, num_first + num_second, 0).sum())
+        num_terms = self.get_qubo_template(vehicle_k_limits, k_nearest).num_terms
+        dense_terms = num_terms + dense_steps - kept_steps - indicator_terms
+        return {
+            'k_nearest': k_nearest,
+            'kept_step_terms': kept_steps,
+            'dropped_step_terms': dense_steps - kept_steps,
+            'num_terms': num_terms,
+            'dense_num_terms': dense_terms,
+            'reduction': 1 - num_terms / dense_terms if dense_terms else 0.0,
+        }
+
+    def get_qubo_paper(self, vehicle_k_limits, A1, A2, k_nearest=None):
+        """
+        Generates the QUBO for the VRP as specified
+        in the Gora et al. paper; `k_nearest` selects the sparse variant.
+        """
+        return self.get_qubo_template(vehicle_k_limits, k_nearest).weighted(cost=A1, constraint=A2)
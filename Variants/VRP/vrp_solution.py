@@ -1,3 +1,5 @@
+import numpy as np
+
 
 class VRPSolution:
     def __init__(self, problem, sample, vehicle_k_limits, solution=None):
@@ -10,7 +12,8 @@ class VRPSolution:
             temp_routes = {i: [] for i in range(num_vehicles)}
 
             for var, val in sample.items():
-                if val == 1:
+                # Auxiliary variables (slack bits, next-stop indicators) are not visits.
+                if val == 1 and len(var) == 3:
                     i, j, k = var
                     temp_routes[i].append((k, j))
 
@@ -22,6 +25,28 @@ class VRPSolution:
             
             self.solution = final_routes
 
+    @classmethod
+    def from_sampleset(cls, problem, sampleset, vehicle_k_limits):
+        """
+        Best read of a whole SampleSet: the cheapest feasible read, or the
+        lowest-energy read if none is feasible. The evaluation of all reads
+        is kept in `solution.evaluation`.
+        """
+        evaluation = evaluate_sampleset(problem, sampleset)
+        if not len(evaluation['cost']):
+            best, routes = None, []
+        elif evaluation['valid'].any():
+            cost = np.where(evaluation['valid'], evaluation['cost'], np.inf)
+            best = int(np.lexsort((evaluation['energy'], cost))[0])
+            routes = evaluation['routes'](best)
+        else:
+            best = int(np.argmin(evaluation['energy']))
+            routes = evaluation['routes'](best)
+        solution = cls(problem, {}, vehicle_k_limits, solution=routes)
+        solution.evaluation = evaluation
+        solution.best_read = best
+        return solution
+
     def check(self):
         
         # --- Check for duplicate visits ---
@@ -46,7 +71,10 @@ class VRPSolution:
         # solver is required for this problem instance.
         capacities = self.problem.capacities
         weights = self.problem.weights
-        for i, route in enumerate(self.solution):
+        if any(self.solution[len(capacities):]):
+            print(f"Warning: Solution uses more routes than the {len(capacities)} vehicles available.")
+            return False
+        for i, route in enumerate(self.solution[:len(capacities)]):
             vehicle_load = sum(weights[dest] for dest in route)
             if vehicle_load > capacities[i]:
                 print(f"Warning: Vehicle {i} exceeds capacity. Load: {vehicle_load}, Capacity: {capacities[i]}")
@@ -83,3 +111,79 @@ class VRPSolution:
         print(f"\nTotal Cost: {self.total_cost():.2f}")
         print(f"Is Solution Valid: {self.check()}")
 
+
+def evaluate_sampleset(problem, sampleset):
+    """
+    Scores every read of a SampleSet over (m, j, k) variables at once;
+    any other variable is ignored.
+
+    Returns a dict of per-read arrays: 'energy', 'cost' (tour cost as in
+    `VRPSolution.total_cost`), 'visits_ok' (every customer visited exactly
+    once), 'capacity_ok', 'valid' (both), plus 'routes', a function that
+    decodes one read into per-vehicle routes.
+    """
+    variables = list(sampleset.variables)
+    samples = np.asarray(sampleset.record.sample, dtype=np.int8).reshape(len(sampleset.record), len(variables))
+    # Auxiliary variables (capacity slack bits, next-stop indicators) are not visits.
+    routing = [c for c, v in enumerate(variables)
+               if isinstance(v, tuple) and len(v) == 3 and all(isinstance(x, (int, np.integer)) for x in v)]
+    if len(routing) < len(variables):
+        variables, samples = [variables[c] for c in routing], samples[:, routing]
+    energy = np.asarray(sampleset.record.energy, dtype=np.float64)
+    num_vehicles = len(problem.capacities)
+    depot = problem.source_depot
+    costs = np.asarray(problem.costs, dtype=np.float64)
+    customers = np.asarray(problem.dests, dtype=np.int64)
+
+    labels = np.array(variables, dtype=np.int64).reshape(len(variables), 3)
+    m, j, k = labels[:, 0], labels[:, 1], labels[:, 2]
+    # Visit order within a route: by vehicle, then step, then variable order.
+    order = np.lexsort((np.arange(len(variables)), k, m))
+    m, j, samples = m[order], j[order], samples[:, order]
+
+    position = np.full(max(int(customers.max(initial=0)), int(j.max(initial=0))) + 1, -1, dtype=np.int64)
+    position[customers] = np.arange(len(customers))
+    customer_index = position[j]
+
+    # Visit counts: columns grouped by customer and summed with reduceat.
+    known = customer_index >= 0
+    by_customer = np.flatnonzero(known)
+    by_customer = by_customer[np.argsort(customer_index[by_customer], kind='stable')]
+    present, starts = np.unique(customer_index[by_customer], return_index=True)
+    visits = np.zeros((len(samples), len(customers)), dtype=np.int64)
+    if len(by_customer):
+        visits[:, present] = np.add.reduceat(samples[:, by_customer].astype(np.int64), starts, axis=1)
+
+    # Loads: one product with the (variables, vehicles) demand matrix.
+    vehicle_weights = np.zeros((len(variables), num_vehicles))
+    vehicle_weights[np.arange(len(variables)), m] = np.asarray(problem.weights, dtype=np.float64)[j]
+    load = samples.astype(np.float64) @ vehicle_weights
+    # A variable for a non-customer node is always an invalid visit.
+    visits_ok = (visits == 1).all(axis=1) & ~samples[:, ~known].any(axis=1)
+    capacity_ok = (load <= np.asarray(problem.capacities, dtype=np.float64)[None, :]).all(axis=1)
+
+    # Tour cost from the chosen variables in visit order: depot legs at the
+    # first and last stop of each (read, vehicle), C(i, j) in between.
+    read, column = np.nonzero(samples)
+    node, vehicle = j[column], m[column]
+    same_route = (read[1:] == read[:-1]) & (vehicle[1:] == vehicle[:-1])
+    first = np.ones(len(read), dtype=bool)
+    first[1:] = ~same_route
+    last = np.ones(len(read), dtype=bool)
+    last[:-1] = ~same_route
+    leg = np.where(first, costs[depot, node], 0.0) + np.where(last, costs[node, depot], 0.0)
+    leg[1:] += np.where(same_route, costs[node[:-1], node[1:]], 0.0)
+    cost = np.bincount(read, weights=leg, minlength=len(samples))
+
+    def routes(r):
+        chosen = np.flatnonzero(samples[r])
+        return [j[chosen[m[chosen] == vehicle_id]].tolist() for vehicle_id in range(num_vehicles)]
+
+    return {
+        'energy': energy,
+        'cost': cost,
+        'visits_ok': visits_ok,
+        'capacity_ok': capacity_ok,
+        'valid': visits_ok & capacity_ok,
+        'routes': routes,
+    }